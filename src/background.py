@@ -0,0 +1,25 @@
+import queue
+import threading
+from typing import Callable, Optional
+
+
+class BackgroundWorker:
+    "Run tasks one after the other in a separate thread, so the simulation never waits for them"
+
+    def __init__(self, name: str):
+        self.tasks: queue.Queue[Optional[Callable[[], None]]] = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while (task := self.tasks.get()) is not None:
+            task()
+
+    def submit(self, task: Callable[[], None]):
+        "Queue a task to run in the background"
+        self.tasks.put(task)
+
+    def close(self):
+        "Wait for every queued task to be done, then stop the thread"
+        self.tasks.put(None)
+        self.thread.join()
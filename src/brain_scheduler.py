@@ -0,0 +1,47 @@
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from creature import Creature
+
+# fractional part of the golden ratio, spreading consecutive ids evenly over the cycle
+GOLDEN_RATIO_FRACTION = (5 ** 0.5 - 1) / 2
+
+
+def get_brain_slot(creature_id: int) -> float:
+    "Return the fixed position (between 0 and 1) of a creature in the update cycle"
+    return (creature_id * GOLDEN_RATIO_FRACTION) % 1.0
+
+
+class BrainScheduler:
+    """Choose which creatures update their network at each simulation step, so each of them does it
+    `rate` times per second of simulation time (or at every step if rate is None)
+    Every creature has a fixed slot in a cycle, and each step goes through the slots covered by its
+    duration, like round-robin buckets whose size follows the step duration"""
+
+    def __init__(self, rate: Optional[float]):
+        if rate is not None and rate <= 0:
+            raise ValueError("The neural update rate must be positive")
+        self.rate = rate
+        self.phase = 0.0
+
+    def select(self, creatures: list["Creature"], delta_t: int) -> list["Creature"]:
+        "Return the creatures which have to update their network during a step of delta_t milliseconds"
+        if self.rate is None:
+            return creatures
+        start = self.phase
+        advance = self.rate * delta_t / 1000
+        self.phase = (self.phase + advance) % 1.0
+        if advance >= 1.0:
+            return creatures
+        end = start + advance
+        if end <= 1.0:
+            return [
+                creature for creature in creatures
+                if start <= get_brain_slot(creature.creature_id) < end
+            ]
+        # the window wraps around the end of the cycle
+        end -= 1.0
+        return [
+            creature for creature in creatures
+            if not end <= get_brain_slot(creature.creature_id) < start
+        ]
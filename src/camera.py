@@ -0,0 +1,79 @@
+from pygame.math import Vector2
+from pygame.rect import Rect
+
+from . import config
+
+
+class Camera:
+    "Convert world coordinates into window coordinates, and allow to pan and zoom over the map"
+
+    def __init__(self, screen_size: tuple[int, int]):
+        self.screen_width, self.screen_height = screen_size
+        # world position of the top left corner of the window
+        self.offset = Vector2(0, 0)
+        self.zoom = 1.0
+
+    @property
+    def dots_only(self):
+        "Check if entities should be drawn as simple dots, due to a low zoom level"
+        return self.zoom < config.CAMERA_DOTS_ZOOM
+
+    @property
+    def viewport(self) -> Rect:
+        "Region of the world currently visible in the window"
+        return Rect(
+            int(self.offset.x),
+            int(self.offset.y),
+            int(self.screen_width / self.zoom) + 1,
+            int(self.screen_height / self.zoom) + 1
+        )
+
+    def world_to_screen(self, position: Vector2) -> Vector2:
+        "Convert a world position into a window position"
+        return (position - self.offset) * self.zoom
+
+    def screen_to_world(self, position: Vector2) -> Vector2:
+        "Convert a window position into a world position"
+        return position / self.zoom + self.offset
+
+    def world_rect_to_screen(self, rectangle: Rect) -> Rect:
+        "Convert a world rectangle into a window rectangle, keeping at least 1 pixel of size"
+        if self.zoom == 1.0:
+            return rectangle.move(-int(self.offset.x), -int(self.offset.y))
+        top_left = self.world_to_screen(Vector2(rectangle.topleft))
+        return Rect(
+            round(top_left.x),
+            round(top_left.y),
+            max(1, round(rectangle.width * self.zoom)),
+            max(1, round(rectangle.height * self.zoom))
+        )
+
+    def pan(self, screen_dx: float, screen_dy: float):
+        "Move the camera by a given amount of window pixels"
+        self.offset += Vector2(screen_dx, screen_dy) / self.zoom
+        self._clamp()
+
+    def zoom_at(self, factor: float, screen_position: Vector2):
+        "Multiply the zoom level by a factor, keeping the world point under the given position in place"
+        anchor = self.screen_to_world(screen_position)
+        self.zoom = min(config.CAMERA_MAX_ZOOM, max(config.CAMERA_MIN_ZOOM, self.zoom * factor))
+        self.offset = anchor - screen_position / self.zoom
+        self._clamp()
+
+    def reset(self):
+        "Go back to the default position and zoom level"
+        self.offset = Vector2(0, 0)
+        self.zoom = 1.0
+
+    def _clamp(self):
+        "Make sure the camera does not go too far away from the world"
+        view_width = self.screen_width / self.zoom
+        view_height = self.screen_height / self.zoom
+        if view_width >= config.WORLD_WIDTH:
+            self.offset.x = (config.WORLD_WIDTH - view_width) / 2
+        else:
+            self.offset.x = min(max(self.offset.x, 0), config.WORLD_WIDTH - view_width)
+        if view_height >= config.WORLD_HEIGHT:
+            self.offset.y = (config.WORLD_HEIGHT - view_height) / 2
+        else:
+            self.offset.y = min(max(self.offset.y, 0), config.WORLD_HEIGHT - view_height)
@@ -1,38 +1,20 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import matplotlib
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
 import numpy as np
 import pygame
-import pylab
-from matplotlib.lines import Line2D
 from pygame.font import SysFont
 from pygame.surface import Surface
 from pygame.time import Clock
 
 from . import config
 from .context_manager import ContextManager
+from .plotting import get_pyplot
 
-matplotlib.use("Agg")
-
-plt.rcParams.update({  # type: ignore
-    # "lines.marker": "o",       # available ('o', 'v', '^', '<', '>', '8', 's', 'p', '*', 'h', 'H', 'D', 'd', 'P', 'X')
-    # "lines.linewidth": "1.8",
-    # "axes.prop_cycle": plt.cycler('color', ['white']),  # line color
-    # "text.color": "white",     # no text in this example
-    # "axes.facecolor": "black",   # background of the figure
-    # "axes.edgecolor": "lightgray",
-    "axes.labelcolor": "white",  # no labels in this example
-    # "axes.titlecolor": "red",
-    # "axes.grid": "True",
-    # "grid.linestyle": "--",      # {'-', '--', '-.', ':', '', (offset, on-off-seq), ...}
-    "xtick.color": "white",
-    "ytick.color": "white",
-    # "grid.color": "lightgray",
-    "figure.facecolor": "black", # color surrounding the plot
-    # "figure.edgecolor": "black",
-})
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
 
 class ChartData:
     "Save values of a specific metric"
@@ -91,50 +73,67 @@ class ChartsManager:
         self.indexes = list(self.datas.keys())
         self.index = 0
 
-        self.fig = pylab.figure(
+        # created when the first chart is drawn, to avoid loading matplotlib before it's needed
+        self.fig: Optional["Figure"] = None
+        self.ax: Optional["Axes"] = None
+        self.lines: list["Line2D"] = []
+        self.canvas: Optional["FigureCanvasAgg"] = None
+        self.raw_data: Optional[memoryview] = None
+        self.font = SysFont("Arial", 12)
+
+    def create_figure(self) -> tuple["Axes", "FigureCanvasAgg"]:
+        "Create the matplotlib figure used by every chart"
+        # pylint: disable=import-outside-toplevel
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.fig = get_pyplot().figure(
             num=1,
             figsize=(6, 3),  # Inches
             dpi=70,          # 100 dots per inch, so the resulting buffer is 400x400 pixels
         )
         self.fig.patch.set_alpha(0.7)  # type: ignore
-        self.ax: plt.Axes = self.fig.gca()
+        self.ax = self.fig.gca()
         self.ax.patch.set_alpha(0)  # type: ignore
 
-        self.lines: list[Line2D] = self.ax.plot(np.empty(10), np.empty(10), lw=2)
+        self.lines = self.ax.plot(np.empty(10), np.empty(10), lw=2)
 
-        self.canvas = agg.FigureCanvasAgg(self.fig)
-        self.raw_data: Optional[memoryview] = None
-        self.font = SysFont("Arial", 12)
+        self.canvas = FigureCanvasAgg(self.fig)
+        return self.ax, self.canvas
 
     @property
     def data_index(self):
         "Name of the currently displayed graph"
         return self.indexes[self.index]
 
-    def get_chart(self):
+    def get_chart(self) -> "FigureCanvasAgg":
         "Create data rendering, ready to be displayed"
+        if self.ax is None or self.canvas is None:
+            ax, canvas = self.create_figure()
+        else:
+            ax, canvas = self.ax, self.canvas
         x, y = self.datas[self.data_index].get_axis(window=config.GRAPH_WINDOW)
         if len(x) != 0:
             self.lines[0].set_data(x, y)
-            self.ax.set_xlim(left=x[0], right=x[-1])
-            self.ax.set_ylim(top=max(y)*1.1, bottom=min(y)*0.9)
+            ax.set_xlim(left=x[0], right=x[-1])
+            ax.set_ylim(top=max(y)*1.1, bottom=min(y)*0.9)
 
-        self.canvas.draw()
-        renderer = self.canvas.get_renderer()
+        canvas.draw()
+        renderer = canvas.get_renderer()
         self.raw_data = renderer.buffer_rgba()
+        return canvas
 
-    def draw_graph(self):
-        "Draw the current graph in the bottom left corner"
-        self.get_chart()
+    def draw_graph(self) -> Optional[pygame.Rect]:
+        "Draw the current graph in the bottom left corner, and return the drawn region"
+        canvas = self.get_chart()
         if self.raw_data is None:
-            return
-        size: tuple[int, int] = self.canvas.get_width_height()
+            return None
+        size: tuple[int, int] = canvas.get_width_height()
         surf = pygame.image.frombuffer(self.raw_data, size, "RGBA")
-        self.surface.blit(surf, (10, config.HEIGHT - size[1] - 40))
+        graph_rect = self.surface.blit(surf, (10, config.HEIGHT - size[1] - 40))
 
         title_label = self.font.render(self.datas[self.data_index].name, True, pygame.Color("WHITE"))
         text_width, _ = self.font.size(self.datas[self.data_index].name)
-        self.surface.blit(title_label, (size[0]/2 - text_width/2, config.HEIGHT - 30))
+        title_rect = self.surface.blit(title_label, (size[0]/2 - text_width/2, config.HEIGHT - 30))
+        return graph_rect.union(title_rect)
 
     def next_graph(self):
         "Increment the graph index"
@@ -146,44 +145,50 @@ class ChartsManager:
 
     def store_datas(self, clock: Clock, context: ContextManager):
         "Store useful datas inside ChartData objects"
-        ts = context.time
-        creatures = list(context.creatures.values())
-        # FPS
-        self.datas["fps"].append_value(ts, clock.get_fps())
-        # Creatures Velocity
-        if len(creatures) > 0:
-            vel = [abs(creature.velocity) for creature in creatures]
-            self.datas["avg_vel"].append_value(ts, sum(vel)/len(vel))
-            # Creatures Acceleration
-            acc = [abs(creature.acceleration) for creature in creatures]
-            self.datas["avg_acc"].append_value(ts, sum(acc)/len(acc))
-            # Creatures Count
-            self.datas["creatures_count"].append_value(ts, len(creatures))
-            # Creatures Sizes
-            sizes = [creature.size for creature in creatures]
-            self.datas["avg_size"].append_value(ts, sum(sizes)/len(sizes))
-            # Avegare Energy
-            energies = [max(0, creature.energy) for creature in creatures]
-            self.datas["avg_energy"].append_value(ts, sum(energies)/len(energies))
-            # Average Life percentage
-            lifes = [creature.life / creature.max_life for creature in creatures]
-            self.datas["avg_life"].append_value(ts, sum(lifes)/len(lifes))
-            # Average regeneration cost
-            regen_costs = [creature.life_regen_cost for creature in creatures]
-            self.datas["avg_regen_cost"].append_value(ts, sum(regen_costs)/len(regen_costs))
-            vision_angles = [creature.vision_angle for creature in creatures]
-            self.datas["avg_vision_angle"].append_value(ts, sum(vision_angles)/len(vision_angles))
-            # Total Food Value
-            food = sum(food.quantity for food_list in context.foods_grid.values() for food in food_list)
-            self.datas["foods_total"].append_value(ts, food)
-            # Average light emitted
-            lights_e = [creature.light_emission for creature in creatures]
-            self.datas["avg_light"].append_value(ts, sum(lights_e)/len(lights_e))
-            # Average creature generation
-            generations = [creature.generation for creature in creatures]
-            self.datas["generations"].append_value(ts, sum(generations)/len(generations))
-            # Number of potential killers
-            killers = [creature for creature in creatures if creature.has_attack_neuron()]
-            self.datas["killers_percent"].append_value(ts, len(killers) / len(creatures))
+        self.store_values(context.time, clock.get_fps(), get_chart_values(context))
+
+    def store_values(self, timestamp: float, fps: float, values: dict[str, float]):
+        "Store values computed by get_chart_values (possibly in another process) inside ChartData objects"
+        self.datas["fps"].append_value(timestamp, fps)
+        if values["creatures_count"] > 0:
+            for key, value in values.items():
+                self.datas[key].append_value(timestamp, value)
         elif self.datas["creatures_count"].data[-2] > 0:
-            self.datas["creatures_count"].append_value(ts, len(creatures))
+            self.datas["creatures_count"].append_value(timestamp, 0)
+
+
+def get_chart_values(context: ContextManager) -> dict[str, float]:
+    "Compute the current value of every chart (except FPS)"
+    creatures = list(context.creatures.values())
+    if len(creatures) == 0:
+        return {"creatures_count": 0}
+    count = len(creatures)
+    return {
+        # Creatures Velocity
+        "avg_vel": sum(abs(creature.velocity) for creature in creatures) / count,
+        # Creatures Acceleration
+        "avg_acc": sum(abs(creature.acceleration) for creature in creatures) / count,
+        # Creatures Count
+        "creatures_count": count,
+        # Creatures Sizes
+        "avg_size": sum(creature.size for creature in creatures) / count,
+        # Avegare Energy
+        "avg_energy": sum(max(0, creature.energy) for creature in creatures) / count,
+        # Average Life percentage
+        "avg_life": sum(creature.life / creature.max_life for creature in creatures) / count,
+        # Average regeneration cost
+        "avg_regen_cost": sum(creature.life_regen_cost for creature in creatures) / count,
+        "avg_vision_angle": sum(creature.vision_angle for creature in creatures) / count,
+        # Total Food Value
+        "foods_total": sum(
+            food.quantity for food_list in context.foods_grid.values() for food in food_list
+        ),
+        # Average light emitted
+        "avg_light": sum(creature.light_emission for creature in creatures) / count,
+        # Average creature generation
+        "generations": sum(creature.generation for creature in creatures) / count,
+        # Number of potential killers
+        "killers_percent": sum(
+            1 for creature in creatures if creature.has_attack_neuron()
+        ) / count,
+    }
@@ -4,17 +4,142 @@ from typing import Optional
 HEIGHT: int = 1200
 WIDTH: int = 2200
 
-# Number of parallel processes to use, None to get 1 per CPU
+# World dimensions (can be larger than the window, use the camera to explore it)
+WORLD_HEIGHT: int = HEIGHT
+WORLD_WIDTH: int = WIDTH
+
+# Minimum and maximum camera zoom levels
+CAMERA_MIN_ZOOM: float = 0.1
+CAMERA_MAX_ZOOM: float = 8.0
+
+# Under this zoom level, creatures and food are drawn as simple dots
+CAMERA_DOTS_ZOOM: float = 0.4
+
+# Camera moving speed when using the keyboard, in window pixels per frame
+CAMERA_PAN_SPEED: int = 15
+
+# Number of parallel processes (or threads) to use, None to get 1 per CPU
 PROCESSES_COUNT: Optional[int] = None
 
+# Backend moving the creatures and ticking their networks: "serial", "threads" (only useful on
+# free-threaded Python builds), "processes", or "auto" to benchmark the ones available at startup
+# and keep the fastest
+EXECUTION_BACKEND: str = "auto"
+
+# Number of creatures sent at once to each worker of the backend, None to use the calibrated one
+EXECUTION_CHUNK_SIZE: Optional[int] = None
+
 # Max frames per second
 FPS: int = 60
 
 # Game speed (1 = real time, 2 = 2x faster, etc.)
 GAME_SPEED: float = 1.0
 
-# RAM debug mode
-MEMORY_DEBUG: bool = False
+# Shed optional rendering work (lights, charts, food, neural panel refresh, then rendered frames)
+# when frames take longer than the target frame time
+FRAME_BUDGET_ENABLED: bool = True
+
+# Target frame time in milliseconds, None to use 1000 / FPS
+FRAME_TIME_TARGET: Optional[float] = None
+
+# "interactive" to fit the whole frame in the target frame time, or "simulation-first"
+# (for production runs) to only give rendering FRAME_BUDGET_RENDER_SHARE of the target frame time
+FRAME_BUDGET_POLICY: str = "interactive"
+
+# Part of the target frame time given to rendering with the "simulation-first" policy
+FRAME_BUDGET_RENDER_SHARE: float = 0.2
+
+# Maximum number of frames between two rendered frames when shedding work
+FRAME_BUDGET_MAX_RENDER_INTERVAL: int = 8
+
+# Minimum time in seconds between two quality changes
+FRAME_BUDGET_ADJUST_DELAY: float = 0.5
+
+# Quality goes back up only if the frame would take less than this part of the budget
+FRAME_BUDGET_RESTORE_MARGIN: float = 0.8
+
+# Weight of the last frame in the average cost of each frame phase
+FRAME_BUDGET_SMOOTHING: float = 0.1
+
+# Seconds between two refreshes of the creature panel when its refresh is shed
+FRAME_BUDGET_PANEL_REFRESH_INTERVAL: float = 1.0
+
+# Only push the screen regions that changed to the display, instead of the whole frame
+DIRTY_RECTS_ENABLED: bool = True
+
+# Maximum number of changed regions before falling back to a full display update
+DIRTY_RECTS_MAX_COUNT: int = 300
+
+# Maximum window ratio covered by changed regions before falling back to a full display update
+DIRTY_RECTS_MAX_AREA_RATIO: float = 0.4
+
+# Run the simulation in its own process, the window only rendering its latest published state
+SIMULATION_PROCESS_ENABLED: bool = False
+
+# Duration in milliseconds of each simulation step in fast-forward mode
+SIMULATION_STEP: int = 16
+
+# Maximum number of simulation steps per rendered frame in fast-forward mode
+FAST_FORWARD_MAX_STEPS: int = 256
+
+# Wall time in seconds between two rendered frames in unlimited fast-forward mode
+FAST_FORWARD_RENDER_INTERVAL: float = 0.5
+
+# Number of independent simulations ("islands") ran in parallel by the islands runner,
+# None to get 1 per CPU
+ISLANDS_COUNT: Optional[int] = None
+
+# Number of simulation steps between two migrations between islands
+ISLANDS_MIGRATION_INTERVAL: int = 2000
+
+# Number of genomes sent from each island to the next one at each migration
+ISLANDS_MIGRANTS_COUNT: int = 3
+
+# Reuse the results of identical headless runs (same config, seed, duration and source code)
+RUN_CACHE_ENABLED: bool = True
+
+# Directory where headless run results are cached
+RUN_CACHE_DIRECTORY: str = ".cache/runs"
+
+# Maximum disk size of the run results cache in bytes, oldest results are removed first
+RUN_CACHE_MAX_SIZE: int = 500 * 1024 * 1024
+
+# File where births, deaths, attacks and meals are logged, None to disable the log
+EVENT_LOG_PATH: Optional[str] = None
+
+# Size in bytes of the event log memory buffer, before it's sent to the writer thread
+EVENT_LOG_BUFFER_SIZE: int = 64 * 1024
+
+# File where the state of every simulation step is recorded for later replay, None to disable it
+REPLAY_PATH: Optional[str] = None
+
+# Number of simulation steps between two full states (keyframes) of a replay, others being deltas
+REPLAY_KEYFRAME_INTERVAL: int = 300
+
+# Directory where the whole population is regularly saved for offline analysis, None to disable it
+POPULATION_EXPORT_DIRECTORY: Optional[str] = None
+
+# Seconds of simulation time between two population snapshots
+POPULATION_EXPORT_INTERVAL: float = 10.0
+
+# Number of population snapshots gathered in memory before being written to the disk together
+POPULATION_EXPORT_CHUNK_SIZE: int = 50
+
+# Network updates per second of simulation time for each creature, spread over the steps,
+# None to update every network at each step (creatures keep their last actions in between)
+NEURAL_UPDATE_RATE: Optional[float] = None
+
+# Keep track of the parents of every creature ever born, to query ancestors and descendants
+LINEAGE_ENABLED: bool = True
+
+# Simulation time in seconds between two memory snapshots, None to disable the memory profiler
+MEMORY_PROFILER_INTERVAL: Optional[float] = None
+
+# Directory where memory snapshots are saved for offline comparison, None to keep them in memory
+MEMORY_PROFILER_DIRECTORY: Optional[str] = None
+
+# Number of stack frames stored for each allocation, used to attribute it to a subsystem
+MEMORY_PROFILER_FRAMES: int = 8
 
 # Show the map grid (for debug purposes)
 SHOW_GRID: bool = False
@@ -43,6 +168,10 @@ INITIAL_CREATURES_COUNT: int = 200
 # Max creatures count at any time
 MAX_CREATURES_COUNT: int = 1000
 
+# Part of the creatures changing of grid cell in a step above which the whole creatures grid is
+# rebuilt (sorting creatures by cell) instead of moving each of them from one cell to another
+CREATURES_GRID_REBUILD_RATIO: float = 0.5
+
 # Energy points each creature has at the beginning of the game
 CREATURE_STARTING_ENERGY: int = 30
 
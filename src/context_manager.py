@@ -1,14 +1,28 @@
 import math
-from multiprocessing.pool import Pool
-from typing import Optional, TypeVar
+from random import sample
+from typing import Iterator, Optional, TypeVar
 
+import numpy as np
 import pygame
 
 from . import config
-from .creature import Creature, creature_reproduction
+from .brain_scheduler import BrainScheduler
+from .camera import Camera
+from .creature import Creature, CreatureGenome, creature_from_genome, creature_reproduction
+from .event_log import DeathCause, EventLog
+from .execution import ExecutionBackend
 from .food import FoodGenerator, FoodPoint
+from .game_events import get_periodic_events
+from .lineage import LineageStore, get_genome_hash
+from .memory_profiler import create_memory_profiler
+from .metabolism import apply_metabolism
+from .neural.network import tick_networks
+from .neural.sensors import compute_sensors
 from .mp_utils import CreatureProcessMove, mp_execute_move
-from .utils import get_toroidal_distance
+from .population_export import PopulationExporter
+from .replay import ReplayRecorder
+from .scheduler import SimulationScheduler
+from .utils import get_positions, get_toroidal_distance
 
 T = TypeVar("T", Creature, FoodPoint)
 
@@ -16,6 +30,8 @@ class ContextManager:
     "Store the game context and main actions"
 
     def __init__(self):
+        # created first, so the creation of the initial creatures is traced too
+        self.memory_profiler = create_memory_profiler()
         self.time = 0.0 # in seconds
         self.creatures: dict[int, Creature] = {
             i: Creature(i, 0, 0.0) for i in range(config.INITIAL_CREATURES_COUNT)
@@ -27,13 +43,30 @@ class ContextManager:
             FoodGenerator(None, 40, 0.3),
         ]
         self.grid_cell_size = 50
-        self.grid_size = (config.WIDTH // self.grid_cell_size, config.HEIGHT // self.grid_cell_size)
+        self.grid_size = (config.WORLD_WIDTH // self.grid_cell_size, config.WORLD_HEIGHT // self.grid_cell_size)
         self.foods_grid: dict[tuple[int, int], list[FoodPoint]] = {
             (x, y): [] for x in range(self.grid_size[0]) for y in range(self.grid_size[1])
         }
         self.creatures_grid: dict[tuple[int, int], list[Creature]] = {
             (x, y): [] for x in range(self.grid_size[0]) for y in range(self.grid_size[1])
         }
+        # creature ID -> index of its cell in the creatures grid (see get_grid_cells)
+        self.creatures_cells: dict[int, int] = {}
+        self.rebuild_creatures_grid()
+        self.event_log = EventLog(config.EVENT_LOG_PATH) if config.EVENT_LOG_PATH else None
+        self.replay_recorder = ReplayRecorder(config.REPLAY_PATH) if config.REPLAY_PATH else None
+        self.population_exporter = (
+            PopulationExporter(config.POPULATION_EXPORT_DIRECTORY)
+            if config.POPULATION_EXPORT_DIRECTORY else None
+        )
+        self.lineage = LineageStore() if config.LINEAGE_ENABLED else None
+        if self.lineage is not None:
+            for creature in self.creatures.values():
+                self.lineage.record(creature.creature_id, 0.0, get_genome_hash(creature.to_genome()))
+        self.scheduler = SimulationScheduler()
+        self.brain_scheduler = BrainScheduler(config.NEURAL_UPDATE_RATE)
+        for event_name, interval in get_periodic_events().items():
+            self.scheduler.schedule_periodic(event_name, getattr(self, event_name), interval)
 
     def get_grid_cell(self, position: pygame.Vector2) -> tuple[int, int]:
         "Return the grid cell of a position"
@@ -41,21 +74,107 @@ class ContextManager:
         grid_y = int(position.y) // self.grid_cell_size % self.grid_size[1]
         return grid_x, grid_y
 
-    def draw_grid(self, screen: pygame.Surface):
-        "Draw a grid on the screen"
+    def get_grid_cells(self, positions_x: np.ndarray, positions_y: np.ndarray) -> np.ndarray:
+        "Return the grid cell of many positions, as indexes x * grid height + y"
+        cells_x = positions_x.astype(np.int64) // self.grid_cell_size % self.grid_size[0]
+        cells_y = positions_y.astype(np.int64) // self.grid_cell_size % self.grid_size[1]
+        return cells_x * self.grid_size[1] + cells_y
+
+    def group_by_cell(self, cells: np.ndarray) -> Iterator[tuple[tuple[int, int], list[int]]]:
+        "Sort items by grid cell index, and yield the indexes of the items of each non-empty cell"
+        order = np.argsort(cells, kind="stable")
+        sorted_cells = cells[order]
+        bounds = np.flatnonzero(np.diff(sorted_cells)) + 1
+        starts = np.concatenate(([0], bounds)).tolist()
+        ends = np.concatenate((bounds, [len(cells)])).tolist()
+        order_list = order.tolist()
+        for start, end, cell in zip(starts, ends, sorted_cells[starts].tolist()):
+            yield divmod(cell, self.grid_size[1]), order_list[start:end]
+
+    def get_cells_in_area(self, area: pygame.Rect) -> Iterator[tuple[int, int]]:
+        "Iterate over every grid cell overlapping a world region"
+        left_index = max(0, area.left // self.grid_cell_size)
+        right_index = min(self.grid_size[0] - 1, area.right // self.grid_cell_size)
+        top_index = max(0, area.top // self.grid_cell_size)
+        bottom_index = min(self.grid_size[1] - 1, area.bottom // self.grid_cell_size)
+        for cell_x in range(left_index, right_index + 1):
+            for cell_y in range(top_index, bottom_index + 1):
+                yield cell_x, cell_y
+
+    def creatures_in_area(self, area: pygame.Rect) -> Iterator[Creature]:
+        "Iterate over creatures located in the grid cells overlapping a world region"
+        for cell in self.get_cells_in_area(area):
+            yield from self.creatures_grid[cell]
+
+    def foods_in_area(self, area: pygame.Rect) -> Iterator[FoodPoint]:
+        "Iterate over food points located in the grid cells overlapping a world region"
+        for cell in self.get_cells_in_area(area):
+            yield from self.foods_grid[cell]
+
+    def draw_grid(self, screen: pygame.Surface, camera: Camera):
+        "Draw the visible part of the grid on the screen"
         color = (100, 150, 180)
-        for x in range(self.grid_cell_size, config.WIDTH, self.grid_cell_size):
-            pygame.draw.line(screen, color, (x, 0), (x, config.HEIGHT))
-        for y in range(self.grid_cell_size, config.HEIGHT, self.grid_cell_size):
-            pygame.draw.line(screen, color, (0, y), (config.WIDTH, y))
+        viewport = camera.viewport
+        top = camera.world_to_screen(pygame.Vector2(0, max(0, viewport.top))).y
+        bottom = camera.world_to_screen(pygame.Vector2(0, min(config.WORLD_HEIGHT, viewport.bottom))).y
+        left = camera.world_to_screen(pygame.Vector2(max(0, viewport.left), 0)).x
+        right = camera.world_to_screen(pygame.Vector2(min(config.WORLD_WIDTH, viewport.right), 0)).x
+        first_x = max(1, viewport.left // self.grid_cell_size) * self.grid_cell_size
+        for x in range(first_x, min(config.WORLD_WIDTH, viewport.right), self.grid_cell_size):
+            screen_x = camera.world_to_screen(pygame.Vector2(x, 0)).x
+            pygame.draw.line(screen, color, (screen_x, top), (screen_x, bottom))
+        first_y = max(1, viewport.top // self.grid_cell_size) * self.grid_cell_size
+        for y in range(first_y, min(config.WORLD_HEIGHT, viewport.bottom), self.grid_cell_size):
+            screen_y = camera.world_to_screen(pygame.Vector2(0, y)).y
+            pygame.draw.line(screen, color, (left, screen_y), (right, screen_y))
 
-    def update_creatures_grid(self):
-        "update the creatures grid map based on each creature position"
+    def add_creature(self, creature: Creature):
+        "Add a creature to the world and to the creatures grid"
+        self.creatures[creature.creature_id] = creature
+        grid_x, grid_y = self.get_grid_cell(creature.position)
+        self.creatures_grid[grid_x, grid_y].append(creature)
+        self.creatures_cells[creature.creature_id] = grid_x * self.grid_size[1] + grid_y
+
+    def remove_creature(self, creature_id: int):
+        "Remove a creature from the world and from the creatures grid"
+        creature = self.creatures.pop(creature_id)
+        cell = self.creatures_cells.pop(creature_id)
+        self.creatures_grid[divmod(cell, self.grid_size[1])].remove(creature)
+
+    def rebuild_creatures_grid(self):
+        "Fill the creatures grid from scratch, grouping creatures by grid cell"
         for creatures_list in self.creatures_grid.values():
             creatures_list.clear()
-        for creature in self.creatures.values():
-            grid_cell = self.get_grid_cell(creature.position)
-            self.creatures_grid[grid_cell].append(creature)
+        creatures = list(self.creatures.values())
+        if not creatures:
+            self.creatures_cells = {}
+            return
+        cells = self.get_grid_cells(*get_positions(creatures))
+        for cell, indexes in self.group_by_cell(cells):
+            self.creatures_grid[cell].extend(creatures[index] for index in indexes)
+        self.creatures_cells = dict(zip(self.creatures, cells.tolist()))
+
+    def update_creatures_grid(self):
+        """Move the creatures which changed of grid cell since the last update into their new cell
+        Births and deaths update the grid directly, so the work depends on how many creatures moved"""
+        creatures = list(self.creatures.values())
+        if not creatures:
+            return
+        cells = self.get_grid_cells(*get_positions(creatures))
+        previous_cells = np.fromiter(
+            (self.creatures_cells[creature_id] for creature_id in self.creatures), np.int64, len(creatures)
+        )
+        moved = np.flatnonzero(cells != previous_cells)
+        if len(moved) > len(creatures) * config.CREATURES_GRID_REBUILD_RATIO:
+            self.rebuild_creatures_grid()
+            return
+        for index, cell, previous_cell in zip(
+            moved.tolist(), cells[moved].tolist(), previous_cells[moved].tolist()
+        ):
+            creature = creatures[index]
+            self.creatures_grid[divmod(previous_cell, self.grid_size[1])].remove(creature)
+            self.creatures_grid[divmod(cell, self.grid_size[1])].append(creature)
+            self.creatures_cells[creature.creature_id] = cell
 
     def find_visible_creatures(self, creature: Creature):
         "Find the closest entity from a list of entities"
@@ -82,8 +201,8 @@ class ContextManager:
                     angle = creature.direction.angle_to(to_other_entity)
                     if abs(angle) <= creature.vision_angle / 2:
                         # Compute distance (toroidal)
-                        dx = abs(entity.position.x - creature.position.x) % config.WIDTH
-                        dy = abs(entity.position.y - creature.position.y) % config.HEIGHT
+                        dx = abs(entity.position.x - creature.position.x) % config.WORLD_WIDTH
+                        dy = abs(entity.position.y - creature.position.y) % config.WORLD_HEIGHT
                         distance = math.sqrt(dx ** 2 + dy ** 2)
                         if distance <= creature.vision_distance:
                             # Update closest entity
@@ -119,7 +238,7 @@ class ContextManager:
                         # Compute distance (toroidal)
                         distance = get_toroidal_distance(
                             creature.position, entity.position,
-                            config.WIDTH, config.HEIGHT
+                            config.WORLD_WIDTH, config.WORLD_HEIGHT
                         )
                         if distance <= min(min_distance, creature.vision_distance):
                             # Update closest entity
@@ -128,25 +247,34 @@ class ContextManager:
 
         return closest_entity, min_distance
 
-    def update_creatures_energies(self):
-        "Update creatures energies and life, and remove killed ones"
-        to_die: set[int] = set()
-        for entity in self.creatures.values():
-            entity.update_energy()
-            if entity.life <= 0:
-                to_die.add(entity.creature_id)
-        for entity_id in to_die:
-            del self.creatures[entity_id]
-        if to_die:
-            print(len(to_die), "creature(s) died")
+    def update_creatures_energies(self, delta_t: int):
+        "Update creatures energies and life for a step of delta_t milliseconds, and remove killed ones"
+        creatures = list(self.creatures.values())
+        killed = apply_metabolism(creatures, delta_t)
+        for index in np.flatnonzero(killed).tolist():
+            entity_id = creatures[index].creature_id
+            if self.event_log:
+                self.event_log.death(
+                    self.time, entity_id, DeathCause.STARVATION,
+                    self.time - self.creatures[entity_id].birth
+                )
+            self.remove_creature(entity_id)
+
+    def add_foods(self, foods: list[FoodPoint]):
+        "Insert food points in the food grid, grouped by grid cell"
+        if not foods:
+            return
+        cells = self.get_grid_cells(
+            np.fromiter((food.position.x for food in foods), np.float64, len(foods)),
+            np.fromiter((food.position.y for food in foods), np.float64, len(foods)),
+        )
+        for cell, indexes in self.group_by_cell(cells):
+            self.foods_grid[cell].extend(foods[index] for index in indexes)
 
     def generate_initial_food(self):
         "Generate initial food points"
         for generator in self.food_generators:
-            for _ in range(config.INITIAL_FOOD_QUANTITY):
-                if food := generator.tick():
-                    grid_cell = self.get_grid_cell(food.position)
-                    self.foods_grid[grid_cell].append(food)
+            self.add_foods(generator.spawn(config.INITIAL_FOOD_QUANTITY))
 
     def generate_food(self):
         "Generate food points around food generators"
@@ -159,13 +287,13 @@ class ContextManager:
             )
         )
         for generator in self.food_generators:
-            for _ in range(max_to_generate):
-                if food := generator.tick():
-                    grid_cell = self.get_grid_cell(food.position)
-                    self.foods_grid[grid_cell].append(food)
-                    existing_food_count += 1
-                if existing_food_count >= config.MAX_FOOD_QUANTITY:
-                    return
+            if existing_food_count >= config.MAX_FOOD_QUANTITY:
+                return
+            foods = generator.spawn(
+                max(0, max_to_generate), config.MAX_FOOD_QUANTITY - existing_food_count
+            )
+            self.add_foods(foods)
+            existing_food_count += len(foods)
 
     def detect_creature_eating(self, creature: Creature):
         "Detect if a creature is eating a point, and make it happens"
@@ -185,6 +313,8 @@ class ContextManager:
                     ):
                         creature.eat(food)
                         self.foods_grid[cell].remove(food)
+                        if self.event_log:
+                            self.event_log.eat(self.time, creature.creature_id, food.quantity)
 
     def get_food_distance_for_creature(self, creature: Creature):
         "Get the distance between a creature and its nearest food point"
@@ -201,7 +331,7 @@ class ContextManager:
             ):
                 neighbor_distance = get_toroidal_distance(
                     creature.position, neighbor.position,
-                    config.WIDTH, config.HEIGHT
+                    config.WORLD_WIDTH, config.WORLD_HEIGHT
                 )
                 if neighbor_distance < neighbor.light_emission:
                     value += neighbor.light_emission - neighbor_distance
@@ -209,7 +339,8 @@ class ContextManager:
 
     def reproduce_creatures(self):
         "If two creatures are in contact and ready to reproduce, make them have a child"
-        children: set[Creature] = set()
+        children: list[Creature] = []
+        parents: dict[int, tuple[int, int]] = {}
         creatures = list(self.creatures.values())
         existing_creatures_count = len(self.creatures)
         for i, creature1 in enumerate(creatures):
@@ -225,7 +356,8 @@ class ContextManager:
                     child.position.x = (creature1.position.x + creature2.position.x) / 2
                     child.position.y = (creature1.position.y + creature2.position.y) / 2
                     # add it to the list of newly born children
-                    children.add(child)
+                    children.append(child)
+                    parents[child.creature_id] = (creature1.creature_id, creature2.creature_id)
                     # increment ID
                     self.highest_creature_id += 1
                     # update their parent
@@ -247,23 +379,29 @@ class ContextManager:
                         child.max_life
                     )
         # add every new child into the Great List of Creatures
-        children_list = list(children)[:10]
-        for child in children_list:
-            self.creatures[child.creature_id] = child
-        if children_list:
-            print(len(children_list), "new creature(s) born")
+        for child in children[:10]:
+            self.add_creature(child)
+            if self.lineage is not None:
+                self.lineage.record(
+                    child.creature_id, self.time, get_genome_hash(child.to_genome()),
+                    *parents[child.creature_id]
+                )
+            if self.event_log:
+                self.event_log.birth(
+                    self.time, child.creature_id, *parents[child.creature_id], child.generation
+                )
 
     def attack_creatures(self):
         "If one creature is ready to attack, make it attack the nearest creature"
         creatures = list(self.creatures.values())
-        to_die: set[int] = set()
+        to_die: dict[int, int] = {}
         for creature in creatures:
             if creature.max_damage > 0 and creature.can_attack(self.time):
                 victim, _ = self.find_closest_entity(creature, self.creatures_grid)
                 if victim is not None and victim.creature_id not in to_die:
                     distance = get_toroidal_distance(
                         creature.position, victim.position,
-                        config.WIDTH, config.HEIGHT
+                        config.WORLD_WIDTH, config.WORLD_HEIGHT
                     )
                     relative_distance = 1 - distance / creature.vision_distance
                     damages = round(creature.max_damage * relative_distance)
@@ -272,18 +410,93 @@ class ContextManager:
                         victim.receive_damages(damages)
                         creature.last_damage_action = self.time
                         victim.last_damage_received = self.time
+                        if self.event_log:
+                            self.event_log.attack(
+                                self.time, creature.creature_id, victim.creature_id, damages
+                            )
                         if victim.life <= 0:
-                            to_die.add(victim.creature_id)
-        for entity_id in to_die:
-            del self.creatures[entity_id]
-        if to_die:
-            print(len(to_die), "creature(s) died")
-
-    def move_creatures(self, pool: Pool, delta_t: int):
-        "Update creature networks and move them in batch using multiprocessing"
-        arguments: list[tuple[CreatureProcessMove, int]] = []
-        for creature in self.creatures.values():
-            creature.update_network(self)
-            arguments.append((CreatureProcessMove(creature), delta_t))
-        for i in pool.imap_unordered(mp_execute_move, arguments, chunksize=40):
+                            to_die[victim.creature_id] = creature.creature_id
+        for entity_id, killer_id in to_die.items():
+            if self.event_log:
+                self.event_log.death(
+                    self.time, entity_id, DeathCause.ATTACK,
+                    self.time - self.creatures[entity_id].birth, killer_id
+                )
+            self.remove_creature(entity_id)
+
+    def take_memory_snapshot(self):
+        "Report the memory used by each subsystem (if the memory profiler is enabled)"
+        if self.memory_profiler:
+            self.memory_profiler.take_snapshot(self.time)
+
+    def export_population(self):
+        "Save the current population for offline analysis (if the population export is enabled)"
+        if self.population_exporter:
+            self.population_exporter.capture(self)
+
+    def get_emigrants(self, count: int) -> list[CreatureGenome]:
+        "Export the genomes of some random creatures, to be copied into another simulation"
+        creatures = sample(list(self.creatures.values()), min(count, len(self.creatures)))
+        return [creature.to_genome() for creature in creatures]
+
+    def add_immigrants(self, genomes: list[CreatureGenome]):
+        "Create new creatures from genomes exported by another simulation"
+        for genome in genomes:
+            if len(self.creatures) >= config.MAX_CREATURES_COUNT:
+                break
+            self.highest_creature_id += 1
+            creature = creature_from_genome(genome, self.highest_creature_id, self.time)
+            self.add_creature(creature)
+            if self.lineage is not None:
+                self.lineage.record(creature.creature_id, self.time, get_genome_hash(genome))
+
+    def move_creatures(self, backend: Optional[ExecutionBackend], delta_t: int):
+        """Update the networks of the creatures selected by the brain scheduler, and move every
+        creature in batch, both using the execution backend (if one is given)"""
+        creatures = list(self.creatures.values())
+        thinking = self.brain_scheduler.select(creatures, delta_t)
+        for creature, inputs in zip(thinking, compute_sensors(thinking, self)):
+            creature.network.set_inputs(inputs)
+        tick_networks([creature.network for creature in thinking], backend)
+        for creature in thinking:
+            creature.network.act(creature)
+        arguments = [(CreatureProcessMove(creature), delta_t) for creature in creatures]
+        if backend is None:
+            results = map(mp_execute_move, arguments)
+        else:
+            results = backend.map(mp_execute_move, arguments)
+        for i in results:
             i.apply_to_creature(self.creatures[i.creature_id])
+
+    def close(self):
+        "Release the resources used by the simulation"
+        if self.event_log:
+            self.event_log.close()
+            self.event_log = None
+        if self.replay_recorder:
+            self.replay_recorder.close()
+            self.replay_recorder = None
+        if self.memory_profiler:
+            self.memory_profiler.close()
+            self.memory_profiler = None
+        if self.population_exporter:
+            self.population_exporter.close()
+            self.population_exporter = None
+
+    def step(self, backend: Optional[ExecutionBackend], delta_t: int):
+        "Run a whole simulation step of delta_t milliseconds"
+        # make children or smth
+        self.reproduce_creatures()
+        # and now kill everyone
+        self.attack_creatures()
+        self.move_creatures(backend, delta_t)
+        self.time += delta_t / 1000
+        self.update_creatures_energies(delta_t)
+        # generate food, etc.
+        self.scheduler.run_until(self.time)
+        self.update_creatures_grid()
+        # make the creatures eat
+        for creature in self.creatures.values():
+            self.detect_creature_eating(creature)
+        if self.replay_recorder:
+            self.replay_recorder.capture(self)
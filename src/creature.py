@@ -1,50 +1,54 @@
 import time
-from math import radians
 from random import choice, gauss, randint, random, randrange, uniform
 from typing import TYPE_CHECKING, Optional, TypedDict
 
-from pygame import Color, draw
+from pygame import Color
 from pygame.math import Vector2
 from pygame.rect import Rect
-from pygame.sprite import Sprite
 from pygame.surface import Surface
 
-from src.gradients import draw_circle_gradient
-
 from . import config
+from .drawing import draw_creature, draw_light, draw_selection_frame
 from .neural import NeuralNetwork
+from .neural.network import WireGenome
 from .neural.actions import (ReadyForReproductionActionNeuron,
                              ReadyToAttackActionNeuron)
 
 if TYPE_CHECKING:
+    from camera import Camera
     from context_manager import ContextManager
     from food import FoodPoint
+    from neural.abc import InputNeuron
 
 
 class DamageDisplayer:
     "Display a fading red square over damaged creatures"
+
+    __slots__ = ("size", "last_hurt", "duration")
+
     def __init__(self, size: int, duration: float = 1.5):
         self.size = size
         self.last_hurt: Optional[float] = None
         self.duration = duration
-        self.surface = Surface((self.size, self.size))
+
+    @property
+    def is_active(self):
+        "Check if the animation is running (or just ended and still has to be erased)"
+        return self.last_hurt is not None
 
     def hurt(self):
         "Trigger the hurting animation"
         self.last_hurt = time.time()
 
-    def draw(self, surface: Surface, rectangle: Rect):
-        "Draw the square if needed"
+    def get_opacity(self) -> float:
+        "Current opacity of the square (0 when not displayed), ending the animation when it's over"
         if self.last_hurt is None:
-            return
+            return 0.0
         now = time.time()
         if now - self.last_hurt > self.duration:
             self.last_hurt = None
-            return
-        opacity = 1 - (now - self.last_hurt) / self.duration
-        self.surface.set_alpha(round(opacity*255))
-        self.surface.fill(Color(255, 0, 0))
-        surface.blit(self.surface, rectangle)
+            return 0.0
+        return 1 - (now - self.last_hurt) / self.duration
 
 
 def creature_reproduction(
@@ -95,6 +99,40 @@ def creature_reproduction(
     )
 
 
+def creature_from_genome(
+        genome: "CreatureGenome", creature_id: int, timestamp: float) -> "Creature":
+    "Create a new creature from a genome exported by another simulation"
+    return Creature(
+        creature_id,
+        genome["generation"],
+        timestamp,
+        {
+            "size": genome["size"],
+            "network": NeuralNetwork.from_genome(genome["network"]),
+            "max_life": genome["max_life"],
+            "life_regen_cost": genome["life_regen_cost"],
+            "digestion_efficiency": genome["digestion_efficiency"],
+            "digestion_speed": genome["digestion_speed"],
+            "vision_distance": genome["vision_distance"],
+            "vision_angle": genome["vision_angle"],
+            "max_damage": genome["max_damage"],
+        }
+    )
+
+
+class CreatureGenome(TypedDict):
+    "Inheritable attributes of a creature, using basic types only to be sent to other processes"
+    generation: int
+    size: int
+    network: list[WireGenome]
+    max_life: int
+    life_regen_cost: int
+    digestion_efficiency: float
+    digestion_speed: float
+    vision_distance: int
+    vision_angle: int
+    max_damage: int
+
 class CreatureGeneratedAttributes(TypedDict):
     "Attributes randomly generated for a creature at its creation"
     size: int
@@ -107,12 +145,21 @@ class CreatureGeneratedAttributes(TypedDict):
     vision_angle: int
     max_damage: int
 
-class Creature(Sprite):
+class Creature:
     "A simple creature"
 
+    __slots__ = (
+        "creature_id", "generation", "size", "network", "max_life", "life_regen_cost",
+        "digestion_efficiency", "digestion_speed", "vision_distance", "vision_angle", "max_damage",
+        "acceleration_from_neuron", "rotation_from_neuron", "light_emission",
+        "ready_for_reproduction", "ready_to_kill", "life", "energy", "max_energy", "digesting",
+        "max_digesting", "color", "rectangle", "damager", "birth", "last_reproduction",
+        "last_damage_action", "last_damage_received", "position", "direction", "velocity",
+        "acceleration", "deceleration",
+    )
+
     def __init__(self, creature_id: int, generation: int, timestamp: float,
                  kwargs: Optional[CreatureGeneratedAttributes] = None):
-        super().__init__()
         self.creature_id = creature_id
         self.generation = generation
 
@@ -162,10 +209,8 @@ class Creature(Sprite):
         self.digesting = config.CREATURE_MIN_STARTING_DIGESTING_POINTS + self.size
         self.max_digesting = round(self.max_energy * config.CREATURE_STOMACH_CAPACITY_COEFFICIENT)
         self.color = self.calcul_color()
-        self.surf = Surface((self.size, self.size))
-        self.surf.fill(self.color)
-        self.rectangle = self.surf.get_rect(
-            center=(randrange(config.WIDTH), randrange(config.HEIGHT)))
+        self.rectangle = Rect(0, 0, self.size, self.size)
+        self.rectangle.center = (randrange(config.WORLD_WIDTH), randrange(config.WORLD_HEIGHT))
         self.damager = DamageDisplayer(self.size)
         # timestamp and cooldown-related attributes
         self.birth = timestamp
@@ -179,6 +224,21 @@ class Creature(Sprite):
         self.acceleration = 0.0
         self.deceleration = 0.0
 
+    def to_genome(self) -> CreatureGenome:
+        "Export the inheritable attributes of the creature"
+        return {
+            "generation": self.generation,
+            "size": self.size,
+            "network": self.network.to_genome(),
+            "max_life": self.max_life,
+            "life_regen_cost": self.life_regen_cost,
+            "digestion_efficiency": self.digestion_efficiency,
+            "digestion_speed": self.digestion_speed,
+            "vision_distance": self.vision_distance,
+            "vision_angle": self.vision_angle,
+            "max_damage": self.max_damage,
+        }
+
     def can_repro(self, timestamp: float):
         "Check if the creature is able to reproduce"
         return (
@@ -210,34 +270,17 @@ class Creature(Sprite):
         )
         return Color(f'#{int(has_attack):02X}{int(life):02X}{int(neurons_count):02X}')
 
-    def update_network(self, context: "ContextManager"):
-        "Update the creature network inputs and outputs, then execute the corresponding actions"
-        self.network.update_input(self, context)
+    def update_network(self, context: "ContextManager",
+                       inputs: Optional[list[tuple["InputNeuron", float]]] = None):
+        """Update the creature network inputs and outputs, then execute the corresponding actions
+        Inputs can be given if they were already computed for every creature at once"""
+        if inputs is None:
+            self.network.update_input(self, context)
+        else:
+            self.network.set_inputs(inputs)
         self.network.tick()
         self.network.act(self)
 
-    def update_energy(self):
-        "Update the creature energy, life and digestion"
-        # digestion
-        points = min(self.digesting, self.digestion_speed)
-        if points > 0:
-            added_energy_points = min(
-                points * self.digestion_efficiency,
-                self.max_energy - self.energy
-            )
-            self.digesting -= added_energy_points / self.digestion_efficiency
-            self.digesting = round(self.digesting, 5)
-            self.energy += added_energy_points
-        # life damages
-        if self.energy <= -10:
-            self.life += round(self.energy / 10)
-            self.damager.hurt()
-            self.energy = 0
-        # life regeneration
-        elif self.energy >= self.life_regen_cost and self.life < self.max_life:
-            self.energy -= self.life_regen_cost
-            self.life += 1
-
     def eat(self, food: "FoodPoint"):
         "Eat a food point"
         self.digesting = min(self.digesting + food.quantity, self.max_digesting)
@@ -247,102 +290,24 @@ class Creature(Sprite):
         self.life -= points
         self.damager.hurt()
 
-    def draw_selection_frame(self, surface: Surface):
+    @property
+    def damage_opacity(self) -> float:
+        "Opacity of the red square displayed over the creature after it was hurt"
+        if self.life < self.max_life:
+            return self.damager.get_opacity()
+        return 0.0
+
+    def draw_selection_frame(self, surface: Surface, camera: "Camera") -> Rect:
         "Draw a red frame around the creature when it has been selected by the user"
-        size = self.surf.get_size()[0]/2 + 5
-        centerx, centery = self.rectangle.center
-        # top left line
-        space = 3
-        draw.line(surface, "red",
-                    (centerx - size,  centery - size), # top left
-                    (centerx - space, centery - size)  # top center left
-                    )
-        # left top line
-        draw.line(surface, "red",
-                    (centerx - size,  centery - size), # top left
-                    (centerx - size,  centery - space) # left center top
-                    )
-        # top right line
-        draw.line(surface, "red",
-                    (centerx + size,  centery - size),  # top right
-                    (centerx + space, centery - size)   # top center right
-                    )
-        # right top line
-        draw.line(surface, "red",
-                    (centerx + size,  centery - size),  # top right
-                    (centerx + size,  centery - space)  # right center top
-                    )
-        # bottom left line
-        draw.line(surface, "red",
-                    (centerx - size,  centery + size), # bottom left
-                    (centerx - space, centery + size)  # bottom center left
-                    )
-        # left bottom line
-        draw.line(surface, "red",
-                    (centerx - size,  centery + size),  # bottom left
-                    (centerx - size,  centery + space)  # bottom center left
-                    )
-        # bottom right line
-        draw.line(surface, "red",
-                    (centerx + size,  centery + size),  # bottom right
-                    (centerx + space, centery + size)   # bottom center right
-                    )
-        # right bottom line
-        draw.line(surface, "red",
-                    (centerx + size,  centery + size),  # bottom right
-                    (centerx + size,  centery + space)  # right center bottom
-                    )
-
-    def draw_vision_cone(self, surface: Surface):
-        "Draw a cone representing the entity vision, based on the vision distance and angle"
-        # draw the 2 lines
-        draw.line(surface, "aqua",
-                  self.position,
-                  self.position + self.direction.rotate(self.vision_angle/2) * self.vision_distance,
-                  width=1)
-        draw.line(surface, "aqua",
-                  self.position,
-                  self.position + self.direction.rotate(-self.vision_angle/2)*self.vision_distance,
-                  width=1)
-        # draw the circle arc
-        arc_rectangle = Rect(
-            self.position.x - self.vision_distance,
-            self.position.y - self.vision_distance,
-            self.vision_distance * 2,
-            self.vision_distance * 2
-        )
-        draw.arc(surface, "aqua",
-                 rect=arc_rectangle,
-                 start_angle=radians(self.direction.angle_to(Vector2(1, 0)) - self.vision_angle/2),
-                 stop_angle=radians(self.direction.angle_to(Vector2(1, 0)) + self.vision_angle/2),
-                 width=1
-                 )
-
-    def draw_light_circle(self, surface: Surface):
-        "Draw a circle representing the emitted light"
-        if self.light_emission > 0:
-            draw_circle_gradient(
-                surface,
-                Vector2(self.rectangle.center),
-                round(self.light_emission),
-                )
-
-    def draw_direction(self, surface: Surface):
-        "Draw a line representing the entity direction"
-        if abs(self.velocity) > 1e-5:
-            draw.line(
-                surface, "red",
-                self.position,
-                self.position + self.direction * self.velocity * 1000,
-                width=1
-            )
+        return draw_selection_frame(surface, camera.world_rect_to_screen(self.rectangle))
 
-    def draw(self, surface: Surface, is_selected: bool=False):
-        "Draw the sprite"
-        surface.blit(self.surf, self.rectangle)
-        if is_selected:
-            self.draw_selection_frame(surface)
-            self.draw_vision_cone(surface)
-            self.draw_direction(surface)
-        if self.life < self.max_life:
-            self.damager.draw(surface, self.rectangle)
+    def draw_light_circle(self, surface: Surface, camera: "Camera") -> Optional[Rect]:
+        "Draw a circle representing the emitted light, and return the drawn region"
+        return draw_light(surface, camera, Vector2(self.rectangle.center), self.light_emission)
+
+    def draw(self, surface: Surface, camera: "Camera", is_selected: bool=False) -> Rect:
+        "Draw the sprite, and return the drawn region"
+        return draw_creature(
+            surface, camera, self.position, self.rectangle, self.color, self.direction,
+            self.velocity, self.vision_distance, self.vision_angle, self.damage_opacity, is_selected
+        )
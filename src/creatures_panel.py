@@ -1,10 +1,14 @@
-from pygame import Color, Vector2
+import time
+from typing import Optional
+
+from pygame import SRCALPHA, Color, Rect, Vector2
 from pygame.font import SysFont
 from pygame.surface import Surface
 
 from . import config
 from .context_manager import ContextManager
 from .creature import Creature
+from .neural.graph import NeuralNetworkGraph
 
 
 class PanelsManager:
@@ -17,67 +21,109 @@ class PanelsManager:
         self.tooltip_font = SysFont("Arial", 13)
 
         win_x, win_y = surface.get_size()
-        self.surf = Surface((300, win_y))
-        self.surf.fill(Color("#DDDDFF"))
-        self.surf.set_alpha(80)
+        # per-pixel alpha, so the background stays translucent when drawn on another transparent surface
+        self.surf = Surface((300, win_y), SRCALPHA)
+        self.surf.fill(Color(0xDD, 0xDD, 0xFF, 80))
         self.rect = self.surf.get_rect(center=(win_x - self.surf.get_size()[0]/2, win_y/2))
+        # transparent surface the cached panels are drawn on, so the world under them keeps moving
+        self.offscreen: Optional[Surface] = None
+        # (creature ID, drawing time, drawn region, image of the panel alone)
+        self.last_panel: Optional[tuple[int, float, Rect, Surface]] = None
+
+    def draw_creature_panel(self, creature: Creature, context: ContextManager,
+                            max_age: float = 0.0) -> Rect:
+        """Draw info about a given creature, and return the drawn region
+        If the panel of this creature was drawn less than max_age seconds ago, its image is blitted
+        again over the world drawn for this frame"""
+        now = time.perf_counter()
+        if (
+            self.last_panel is not None and self.last_panel[0] == creature.creature_id
+            and now - self.last_panel[1] < max_age
+        ):
+            _, _, rect, image = self.last_panel
+            return self.surface.blit(image, rect)
+        self.last_panel = None
+        target = self.surface
+        if max_age > 0:
+            if self.offscreen is None or self.offscreen.get_size() != self.surface.get_size():
+                self.offscreen = Surface(self.surface.get_size(), SRCALPHA)
+            self.offscreen.fill((0, 0, 0, 0))
+            target = self.offscreen
+        rect = self.draw_panel(
+            creature.creature_id, creature.size, creature.color,
+            get_creature_texts(creature, context), creature.network.graph,
+            creature.network.get_values_by_name(), target
+        )
+        if target is not self.surface:
+            rect = rect.clip(target.get_rect())
+            image = target.subsurface(rect).copy()
+            self.last_panel = (creature.creature_id, now, rect, image)
+            return self.surface.blit(image, rect)
+        return rect
 
-    def draw_creature_panel(self, creature: Creature, context: ContextManager):
-        "Draw info about a given creature"
-        self.surface.blit(self.surf, self.rect)
+    def draw_panel(self, creature_id: int, size: int, color: Color, texts: list[str],
+                   graph: NeuralNetworkGraph, values: dict[str, float],
+                   surface: Optional[Surface] = None) -> Rect:
+        """Draw info about a creature from its already computed texts, and return the drawn region
+        The panel is drawn on the window, unless another surface of the same size is given"""
+        if surface is None:
+            surface = self.surface
+        surface.blit(self.surf, self.rect)
         # icon
-        icon_surface = Surface((round(creature.size*1.7+2), )*2)
-        icon_surface.fill(creature.color)
+        icon_surface = Surface((round(size*1.7+2), )*2)
+        icon_surface.fill(color)
         icon_rect = icon_surface.get_rect(
             center=((self.rect.topleft[0] + 80, self.rect.topleft[1] + 33))
         )
-        self.surface.blit(icon_surface, icon_rect)
+        surface.blit(icon_surface, icon_rect)
         # ID
-        text = self.title_font.render(f"Creature #{creature.creature_id}", True, "white")
-        self.surface.blit(text, Vector2(self.rect.topleft) + Vector2(100, 25))
-        # reproduction state
-        if creature.can_repro(context.time):
-            repr_label = "Yes"
-        elif creature.last_reproduction + config.CREATURE_REPRO_COOLDOWN > context.time:
-            repr_label = "No (cooldown)"
-        elif creature.has_reproduction_neuron():
-            repr_label = "No (disabled neuron)"
-        else:
-            repr_label = "No (no neuron)"
-        # damage state
-        if creature.can_attack(context.time):
-            damage_label = "Yes"
-        elif creature.last_damage_action + config.CREATURE_ATTACK_COOLDOWN > context.time:
-            damage_label = "No (cooldown)"
-        elif creature.has_attack_neuron():
-            damage_label = "No (disabled neuron)"
-        else:
-            damage_label = "No (no neuron)"
-        grid_position = [
-            pos
-            for pos, creatures in context.creatures_grid.items()
-            if creature in creatures
-        ][0]
+        text = self.title_font.render(f"Creature #{creature_id}", True, "white")
+        surface.blit(text, Vector2(self.rect.topleft) + Vector2(100, 25))
         # Info
-        texts = [
-            f"Generation {creature.generation}",
-            f"Size: {creature.size}",
-            f"Age: {context.time - creature.birth:.0f}s",
-            f"Position: ({creature.position.x:.0f}, {creature.position.y:.0f}) - Grid cell: {grid_position}",
-            f"Speed: {creature.velocity*1000:.1f}p/s",
-            f"Acceleration: {creature.acceleration*1000:.2f}p/s²",
-            f"Direction: {creature.direction.as_polar()[1]:.0f}° ({creature.direction.x:.3f}, {creature.direction.y:.3f})",
-            f"Life: {creature.life} / {creature.max_life} (regen cost: {creature.life_regen_cost})",
-            f"Energy: {creature.energy:.1f} / {creature.max_energy}",
-            f"Digestion: {creature.digesting:.1f} / {creature.max_digesting} (efficiency: {creature.digestion_efficiency}, speed: {creature.digestion_speed})",
-            f"Vision: {creature.vision_distance:.0f}p - {creature.vision_angle}°",
-            f"Light emission: {creature.light_emission}",
-            f"Ready for reproduction: {repr_label}",
-            f"Max damage: {creature.max_damage}",
-            f"Ready to inflict damage: {damage_label}",
-        ]
         for i, text in enumerate(texts):
             render = self.text_font.render(text, True, "white")
-            self.surface.blit(render, Vector2(self.rect.topleft) + Vector2(20, 60 + 20*i))
+            surface.blit(render, Vector2(self.rect.topleft) + Vector2(20, 60 + 20*i))
         # Neural network
-        creature.network.graph.draw(self.surface, self.tooltip_font)
+        if graph_rect := graph.draw(surface, self.tooltip_font, values):
+            return self.rect.union(graph_rect)
+        return self.rect.copy()
+
+
+def get_creature_texts(creature: Creature, context: ContextManager) -> list[str]:
+    "Describe the state of a creature, one line at a time"
+    # reproduction state
+    if creature.can_repro(context.time):
+        repr_label = "Yes"
+    elif creature.last_reproduction + config.CREATURE_REPRO_COOLDOWN > context.time:
+        repr_label = "No (cooldown)"
+    elif creature.has_reproduction_neuron():
+        repr_label = "No (disabled neuron)"
+    else:
+        repr_label = "No (no neuron)"
+    # damage state
+    if creature.can_attack(context.time):
+        damage_label = "Yes"
+    elif creature.last_damage_action + config.CREATURE_ATTACK_COOLDOWN > context.time:
+        damage_label = "No (cooldown)"
+    elif creature.has_attack_neuron():
+        damage_label = "No (disabled neuron)"
+    else:
+        damage_label = "No (no neuron)"
+    grid_position = context.get_grid_cell(creature.position)
+    return [
+        f"Generation {creature.generation}",
+        f"Size: {creature.size}",
+        f"Age: {context.time - creature.birth:.0f}s",
+        f"Position: ({creature.position.x:.0f}, {creature.position.y:.0f}) - Grid cell: {grid_position}",
+        f"Speed: {creature.velocity*1000:.1f}p/s",
+        f"Acceleration: {creature.acceleration*1000:.2f}p/s²",
+        f"Direction: {creature.direction.as_polar()[1]:.0f}° ({creature.direction.x:.3f}, {creature.direction.y:.3f})",
+        f"Life: {round(creature.life)} / {creature.max_life} (regen cost: {creature.life_regen_cost})",
+        f"Energy: {creature.energy:.1f} / {creature.max_energy}",
+        f"Digestion: {creature.digesting:.1f} / {creature.max_digesting} (efficiency: {creature.digestion_efficiency}, speed: {creature.digestion_speed})",
+        f"Vision: {creature.vision_distance:.0f}p - {creature.vision_angle}°",
+        f"Light emission: {creature.light_emission}",
+        f"Ready for reproduction: {repr_label}",
+        f"Max damage: {creature.max_damage}",
+        f"Ready to inflict damage: {damage_label}",
+    ]
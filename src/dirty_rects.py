@@ -0,0 +1,77 @@
+from typing import Hashable, Optional
+
+from pygame.rect import Rect
+
+from . import config
+
+
+def merge_rects(rects: list[Rect]) -> list[Rect]:
+    "Merge every overlapping rectangles together, until none of them collide"
+    merged: list[Rect] = []
+    for rect in sorted(rects, key=lambda r: (r.x, r.y)):
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect = rect.union(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectsTracker:
+    """Keep track of the screen regions which changed since the previous frame
+    Every drawn element is registered with a unique key, so we can detect when it moved or vanished"""
+
+    def __init__(self, screen_size: tuple[int, int]):
+        self.screen_rect = Rect((0, 0), screen_size)
+        self.previous: dict[Hashable, Rect] = {}
+        self.current: dict[Hashable, Rect] = {}
+        self.forced: list[Rect] = []
+        self.full_update = True
+
+    def invalidate(self):
+        "Make the next update a full display update"
+        self.full_update = True
+
+    def mark(self, key: Hashable, rect: Optional[Rect], changed: bool = False):
+        """Register the region where an element has been drawn during this frame
+        Set changed to True if the element content may differ even if its region did not move"""
+        if rect is None or rect.width == 0 or rect.height == 0:
+            return
+        if key in self.current:
+            rect = rect.union(self.current[key])
+        self.current[key] = rect
+        if changed:
+            self.forced.append(rect)
+
+    def get_update_rects(self) -> Optional[list[Rect]]:
+        """Return the list of regions to update on the display, and start a new frame
+        None means that the whole display should be updated"""
+        dirty = self.forced
+        for key, rect in self.current.items():
+            previous = self.previous.pop(key, None)
+            if previous != rect:
+                dirty.append(rect)
+                if previous is not None:
+                    dirty.append(previous)
+        # elements which were drawn last frame but not anymore (eaten food, dead creatures...)
+        dirty.extend(self.previous.values())
+        self.previous = self.current
+        self.current = {}
+        self.forced = []
+
+        if self.full_update or not config.DIRTY_RECTS_ENABLED:
+            self.full_update = False
+            return None
+        # avoid wasting time merging rectangles when we already know it's too much
+        if len(dirty) > config.DIRTY_RECTS_MAX_COUNT * 4:
+            return None
+        rects = [
+            rect.clip(self.screen_rect)
+            for rect in merge_rects(dirty)
+            if rect.colliderect(self.screen_rect)
+        ]
+        covered_area = sum(rect.width * rect.height for rect in rects)
+        max_area = self.screen_rect.width * self.screen_rect.height * config.DIRTY_RECTS_MAX_AREA_RATIO
+        if len(rects) > config.DIRTY_RECTS_MAX_COUNT or covered_area > max_area:
+            return None
+        return rects
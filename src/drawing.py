@@ -0,0 +1,141 @@
+from functools import lru_cache
+from math import radians
+from typing import TYPE_CHECKING, Optional
+
+from pygame import Color, draw
+from pygame.math import Vector2
+from pygame.rect import Rect
+from pygame.surface import Surface
+
+from .gradients import draw_circle_gradient
+
+if TYPE_CHECKING:
+    from camera import Camera
+
+FOOD_COLOR = Color("green")
+DAMAGE_COLOR = Color(255, 0, 0)
+
+
+@lru_cache(maxsize=2048)
+def get_square_surface(size: int, color: int) -> Surface:
+    "Surface filled with a color (given as an int, see pygame.Color), shared by every entity using it"
+    surface = Surface((size, size))
+    surface.fill(Color(color))
+    return surface
+
+@lru_cache(maxsize=256)
+def get_damage_surface(size: tuple[int, int]) -> Surface:
+    "Red surface drawn over damaged creatures, its opacity being set before each use"
+    surface = Surface(size)
+    surface.fill(DAMAGE_COLOR)
+    return surface
+
+
+def draw_square(surface: Surface, camera: "Camera", position: Vector2, rectangle: Rect,
+                color: Color, dots_allowed: bool = True) -> Rect:
+    """Draw the body of a creature or a food point (its world rectangle filled with its color),
+    or a single dot at low zoom levels, and return the drawn region"""
+    if camera.dots_only and dots_allowed:
+        # simplified rendering for low zoom levels
+        screen_position = camera.world_to_screen(position)
+        return surface.fill(color, Rect(int(screen_position.x), int(screen_position.y), 1, 1))
+    screen_rectangle = camera.world_rect_to_screen(rectangle)
+    if camera.zoom == 1.0:
+        return surface.blit(get_square_surface(rectangle.width, int(color)), screen_rectangle)
+    return surface.fill(color, screen_rectangle)
+
+def draw_damage(surface: Surface, screen_rectangle: Rect, opacity: float) -> Optional[Rect]:
+    "Draw the fading red square of a damaged creature, and return the drawn region"
+    if opacity <= 0:
+        return None
+    damage_surface = get_damage_surface(screen_rectangle.size)
+    damage_surface.set_alpha(round(opacity*255))
+    return surface.blit(damage_surface, screen_rectangle)
+
+def draw_selection_frame(surface: Surface, screen_rectangle: Rect) -> Rect:
+    "Draw the red corners around a selected creature, and return the drawn region"
+    size = screen_rectangle.width/2 + 5
+    centerx, centery = screen_rectangle.center
+    frame_rectangle = Rect(centerx - size, centery - size, size * 2 + 1, size * 2 + 1)
+    space = 3
+    for horizontal in (-1, 1):
+        for vertical in (-1, 1):
+            corner = (centerx + horizontal * size, centery + vertical * size)
+            # horizontal then vertical line of the corner
+            draw.line(surface, "red", corner, (centerx + horizontal * space, corner[1]))
+            draw.line(surface, "red", corner, (corner[0], centery + vertical * space))
+    return frame_rectangle
+
+def draw_vision_cone(surface: Surface, camera: "Camera", position: Vector2, direction: Vector2,
+                     vision_distance: float, vision_angle: float) -> Rect:
+    "Draw a cone representing the vision of a creature, and return the drawn region"
+    screen_position = camera.world_to_screen(position)
+    distance = vision_distance * camera.zoom
+    # draw the 2 lines
+    left_line = draw.line(surface, "aqua",
+              screen_position,
+              screen_position + direction.rotate(vision_angle/2) * distance,
+              width=1)
+    right_line = draw.line(surface, "aqua",
+              screen_position,
+              screen_position + direction.rotate(-vision_angle/2) * distance,
+              width=1)
+    # draw the circle arc
+    arc_rectangle = Rect(
+        screen_position.x - distance,
+        screen_position.y - distance,
+        distance * 2,
+        distance * 2
+    )
+    arc = draw.arc(surface, "aqua",
+             rect=arc_rectangle,
+             start_angle=radians(direction.angle_to(Vector2(1, 0)) - vision_angle/2),
+             stop_angle=radians(direction.angle_to(Vector2(1, 0)) + vision_angle/2),
+             width=1
+             )
+    return left_line.unionall([right_line, arc])
+
+def draw_direction(surface: Surface, camera: "Camera", position: Vector2, direction: Vector2,
+                   velocity: float) -> Optional[Rect]:
+    "Draw a line representing the direction and speed of a creature, and return the drawn region"
+    if abs(velocity) > 1e-5:
+        screen_position = camera.world_to_screen(position)
+        return draw.line(
+            surface, "red",
+            screen_position,
+            screen_position + direction * velocity * 1000 * camera.zoom,
+            width=1
+        )
+    return None
+
+def draw_light(surface: Surface, camera: "Camera", position: Vector2,
+               light_emission: float) -> Optional[Rect]:
+    "Draw a circle representing the light emitted by a creature, and return the drawn region"
+    radius = round(light_emission * camera.zoom)
+    if radius > 0:
+        return draw_circle_gradient(surface, camera.world_to_screen(position), radius)
+    return None
+
+# pylint: disable=too-many-arguments
+def draw_creature(surface: Surface, camera: "Camera", position: Vector2, rectangle: Rect,
+                  color: Color, direction: Vector2, velocity: float, vision_distance: float,
+                  vision_angle: float, damage_opacity: float, is_selected: bool = False) -> Rect:
+    """Draw a creature (with its vision and direction if it's selected), and return the drawn region
+    Used by both the live simulation and the snapshots renderer, so they always look the same"""
+    drawn_rectangle = draw_square(
+        surface, camera, position, rectangle, color, dots_allowed=not is_selected
+    )
+    if camera.dots_only and not is_selected:
+        return drawn_rectangle
+    if is_selected:
+        screen_rectangle = camera.world_rect_to_screen(rectangle)
+        drawn_rectangle.union_ip(draw_selection_frame(surface, screen_rectangle))
+        drawn_rectangle.union_ip(
+            draw_vision_cone(surface, camera, position, direction, vision_distance, vision_angle)
+        )
+        if direction_rectangle := draw_direction(surface, camera, position, direction, velocity):
+            drawn_rectangle.union_ip(direction_rectangle)
+    damage_rectangle = draw_damage(surface, camera.world_rect_to_screen(rectangle), damage_opacity)
+    if damage_rectangle:
+        drawn_rectangle.union_ip(damage_rectangle)
+    return drawn_rectangle
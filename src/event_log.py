@@ -0,0 +1,106 @@
+import struct
+from enum import IntEnum
+from typing import Iterator, NamedTuple
+
+from . import config
+from .background import BackgroundWorker
+
+# kind, timestamp, creature id, other creature id, extra id, value
+EVENT_RECORD = struct.Struct("<Bdiiif")
+
+
+class EventKind(IntEnum):
+    "Type of a logged event"
+    BIRTH = 1
+    DEATH = 2
+    ATTACK = 3
+    EAT = 4
+
+class DeathCause(IntEnum):
+    "Reason why a creature died"
+    STARVATION = 0
+    ATTACK = 1
+
+
+class Event(NamedTuple):
+    """A logged event. Meaning of the fields depends on the kind:
+    - birth: creature_id is the child, other_id and extra_id its parents, value its generation
+    - death: other_id is the killer (or -1), extra_id the DeathCause, value the age of the creature
+    - attack: creature_id is the attacker, other_id the victim, value the damages
+    - eat: value is the eaten food quantity"""
+    kind: EventKind
+    time: float
+    creature_id: int
+    other_id: int
+    extra_id: int
+    value: float
+
+
+class EventLog:
+    """Append simulation events as fixed-size binary records to a file
+    Records are buffered in memory, and written to the file by a background thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "ab")  # pylint: disable=consider-using-with
+        self.buffer = bytearray()
+        self.worker = BackgroundWorker("event-log-writer")
+
+    def _append(self, kind: EventKind, timestamp: float, creature_id: int,
+                other_id: int = -1, extra_id: int = -1, value: float = 0.0):
+        self.buffer += EVENT_RECORD.pack(kind, timestamp, creature_id, other_id, extra_id, value)
+        if len(self.buffer) >= config.EVENT_LOG_BUFFER_SIZE:
+            self.flush()
+
+    def birth(self, timestamp: float, child_id: int, parent1_id: int, parent2_id: int,
+              generation: int):
+        "Log the birth of a new creature"
+        self._append(EventKind.BIRTH, timestamp, child_id, parent1_id, parent2_id, generation)
+
+    def death(self, timestamp: float, creature_id: int, cause: DeathCause, age: float,
+              killer_id: int = -1):
+        "Log the death of a creature"
+        self._append(EventKind.DEATH, timestamp, creature_id, killer_id, cause, age)
+
+    def attack(self, timestamp: float, attacker_id: int, victim_id: int, damages: int):
+        "Log damages inflicted by a creature to another one"
+        self._append(EventKind.ATTACK, timestamp, attacker_id, victim_id, value=damages)
+
+    def eat(self, timestamp: float, creature_id: int, quantity: int):
+        "Log a creature eating a food point"
+        self._append(EventKind.EAT, timestamp, creature_id, value=quantity)
+
+    def flush(self):
+        "Send the buffered records to the writer thread"
+        if not self.buffer:
+            return
+        data, self.buffer = bytes(self.buffer), bytearray()
+        self.worker.submit(lambda: self.file.write(data))
+
+    def close(self):
+        "Write every remaining record, and close the file"
+        self.flush()
+        self.worker.submit(self.file.close)
+        self.worker.close()
+
+
+def read_events(path: str) -> Iterator[Event]:
+    "Read every event logged in a file"
+    with open(path, "rb") as file:
+        data = file.read()
+    # ignore a possibly truncated last record
+    data = data[:len(data) - len(data) % EVENT_RECORD.size]
+    for kind, timestamp, creature_id, other_id, extra_id, value in EVENT_RECORD.iter_unpack(data):
+        yield Event(EventKind(kind), timestamp, creature_id, other_id, extra_id, value)
+
+def load_events_array(path: str):
+    "Load every event logged in a file as a NumPy structured array, for faster analysis"
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    dtype = np.dtype([
+        ("kind", "u1"), ("time", "<f8"), ("creature_id", "<i4"),
+        ("other_id", "<i4"), ("extra_id", "<i4"), ("value", "<f4"),
+    ])
+    with open(path, "rb") as file:
+        data = file.read()
+    count = len(data) // EVENT_RECORD.size
+    return np.frombuffer(data, dtype=dtype, count=count)
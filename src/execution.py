@@ -0,0 +1,169 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+from . import config
+from .creature import Creature
+from .mp_utils import CreatureProcessMove, mp_execute_move
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# chunk sizes tried by the calibration benchmark
+CALIBRATION_CHUNK_SIZES = (10, 40, 160)
+
+# number of timed runs of each (backend, chunk size) pair, the fastest one being kept
+CALIBRATION_REPEATS = 3
+
+# chunk size used when neither the config nor a calibration chose one
+DEFAULT_CHUNK_SIZE = 40
+
+
+def is_free_threaded() -> bool:
+    "Check if the interpreter runs without the GIL (free-threaded CPython 3.13+ builds)"
+    is_gil_enabled: Optional[Callable[[], bool]] = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+def run_chunk(function: Callable[[T], R], chunk: list[T]) -> list[R]:
+    "Apply a function to every item of a chunk"
+    return [function(item) for item in chunk]
+
+
+class ExecutionBackend:
+    "Run every task in the main thread, base of the other backends"
+
+    name = "serial"
+    # tasks can use objects of the main process without copying them (see neural.tick_networks)
+    shares_memory = True
+
+    def __init__(self, workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNK_SIZE):
+        self.workers = workers
+        self.chunksize = chunksize
+
+    def map(self, function: Callable[[T], R], items: list[T]) -> Iterable[R]:
+        "Apply a function to every item, results being returned in any order"
+        return map(function, items)
+
+    def close(self):
+        "Release the workers of the backend"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc: Any):
+        self.close()
+
+
+class ThreadBackend(ExecutionBackend):
+    """Run tasks in a pool of threads, sharing the creatures memory without any pickling
+    Only useful on free-threaded builds, the GIL serializing pure Python tasks otherwise"""
+
+    name = "threads"
+
+    def __init__(self, workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(workers, chunksize)
+        self.executor = ThreadPoolExecutor(workers)
+
+    def map(self, function: Callable[[T], R], items: list[T]) -> Iterable[R]:
+        chunks = [items[i:i + self.chunksize] for i in range(0, len(items), self.chunksize)]
+        for results in self.executor.map(run_chunk, [function] * len(chunks), chunks):
+            yield from results
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class ProcessBackend(ExecutionBackend):
+    "Run tasks in a pool of processes, tasks and results being pickled"
+
+    name = "processes"
+    shares_memory = False
+
+    def __init__(self, workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(workers, chunksize)
+        self.pool = Pool(workers)
+
+    def map(self, function: Callable[[T], R], items: list[T]) -> Iterable[R]:
+        return self.pool.imap_unordered(function, items, chunksize=self.chunksize)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+BACKENDS: dict[str, type[ExecutionBackend]] = {
+    backend.name: backend for backend in (ExecutionBackend, ThreadBackend, ProcessBackend)
+}
+
+
+def get_candidate_backends() -> list[str]:
+    "List the backends worth trying on this machine"
+    candidates = [ExecutionBackend.name]
+    if (config.PROCESSES_COUNT or cpu_count()) > 1:
+        if is_free_threaded():
+            candidates.append(ThreadBackend.name)
+        candidates.append(ProcessBackend.name)
+    return candidates
+
+def time_backend(backend: ExecutionBackend, creatures: list[Creature], delta_t: int) -> float:
+    "Return the best duration in seconds of moving every creature with a backend"
+    best = float("inf")
+    for _ in range(CALIBRATION_REPEATS):
+        arguments = [(CreatureProcessMove(creature), delta_t) for creature in creatures]
+        start = time.perf_counter()
+        for _ in backend.map(mp_execute_move, arguments):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def calibrate(creatures: list[Creature], delta_t: int = config.SIMULATION_STEP,
+              candidates: Optional[list[str]] = None, verbose: bool = False) -> ExecutionBackend:
+    """Benchmark every candidate backend and chunk size on a population (without changing it),
+    and return the fastest backend, already started"""
+    best: Optional[tuple[float, ExecutionBackend]] = None
+    for name in candidates or get_candidate_backends():
+        backend = BACKENDS[name](config.PROCESSES_COUNT)
+        backend_best: Optional[tuple[float, int]] = None
+        # the chunk size does not matter when running everything in the main thread
+        chunk_sizes = (DEFAULT_CHUNK_SIZE,) if name == ExecutionBackend.name else CALIBRATION_CHUNK_SIZES
+        for chunksize in chunk_sizes:
+            backend.chunksize = chunksize
+            duration = time_backend(backend, creatures, delta_t)
+            if verbose:
+                print(f"{name:>10} chunks of {chunksize:>3}: {duration * 1000:.2f} ms")
+            if backend_best is None or duration < backend_best[0]:
+                backend_best = (duration, chunksize)
+        assert backend_best is not None
+        backend.chunksize = backend_best[1]
+        if best is None or backend_best[0] < best[0]:
+            if best is not None:
+                best[1].close()
+            best = (backend_best[0], backend)
+        else:
+            backend.close()
+    assert best is not None
+    return best[1]
+
+def create_backend(creatures: list[Creature]) -> ExecutionBackend:
+    "Start the backend chosen in the config, or the fastest one for a population if set to auto"
+    if config.EXECUTION_BACKEND == "auto":
+        backend = calibrate(creatures)
+    else:
+        backend = BACKENDS[config.EXECUTION_BACKEND](config.PROCESSES_COUNT)
+    if config.EXECUTION_CHUNK_SIZE is not None:
+        backend.chunksize = config.EXECUTION_CHUNK_SIZE
+    return backend
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the execution backends")
+    parser.add_argument("--creatures", type=int, default=config.INITIAL_CREATURES_COUNT,
+                        help="population size to benchmark")
+    args = parser.parse_args()
+    print(f"free-threaded: {is_free_threaded()}, CPUs: {cpu_count()}")
+    population = [Creature(i, 0, 0.0) for i in range(args.creatures)]
+    with calibrate(population, verbose=True) as chosen:
+        print(f"fastest: {chosen.name} with chunks of {chosen.chunksize}")
@@ -0,0 +1,53 @@
+import time
+from typing import Callable
+
+from . import config
+
+
+class FastForward:
+    """Decide how many fixed-size simulation steps are run before each rendered frame
+    When disabled, a single step as long as the last frame is run instead"""
+
+    def __init__(self):
+        self.steps = 1
+        self.unlimited = False
+
+    @property
+    def is_enabled(self):
+        "Check if the fast-forward mode is currently used"
+        return self.unlimited or self.steps > 1
+
+    @property
+    def label(self):
+        "Short text describing the current speed"
+        if self.unlimited:
+            return "Fast-forward: unlimited"
+        if self.steps > 1:
+            return f"Fast-forward: {self.steps} steps/frame"
+        return ""
+
+    def faster(self):
+        "Double the number of steps per frame"
+        self.steps = min(self.steps * 2, config.FAST_FORWARD_MAX_STEPS)
+
+    def slower(self):
+        "Halve the number of steps per frame"
+        self.steps = max(1, self.steps // 2)
+
+    def toggle_unlimited(self):
+        "Enable or disable the unlimited mode, where we only render every few seconds"
+        self.unlimited = not self.unlimited
+
+    def run(self, step: Callable[[int], None], frame_delta_t: int):
+        """Run the simulation steps required for the next frame
+        step is called with the duration of the step in milliseconds"""
+        if not self.is_enabled:
+            step(frame_delta_t)
+            return
+        if self.unlimited:
+            deadline = time.perf_counter() + config.FAST_FORWARD_RENDER_INTERVAL
+            while time.perf_counter() < deadline:
+                step(config.SIMULATION_STEP)
+            return
+        for _ in range(self.steps):
+            step(config.SIMULATION_STEP)
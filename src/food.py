@@ -1,12 +1,16 @@
-from math import ceil, cos, pi, sin
-from random import randint, random, randrange
-from typing import Optional
+from math import ceil, pi
+from random import getrandbits, randrange
+from typing import TYPE_CHECKING, Optional
 
-from pygame import Color, Vector2, draw
-from pygame.sprite import Sprite
+import numpy as np
+from pygame import Color, Rect, Vector2, draw
 from pygame.surface import Surface
 
 from . import config
+from .drawing import FOOD_COLOR, draw_square
+
+if TYPE_CHECKING:
+    from camera import Camera
 
 
 class FoodGenerator:
@@ -15,47 +19,67 @@ class FoodGenerator:
 
     def __init__(self, position: Optional[Vector2], radius: int, profusion: float):
         if position is None:
-            self.position = Vector2(randrange(config.WIDTH), randrange(config.HEIGHT))
+            self.position = Vector2(randrange(config.WORLD_WIDTH), randrange(config.WORLD_HEIGHT))
         else:
             self.position = position
         self.radius = radius
         self.profusion = profusion
 
-    def generate_position(self):
-        "Generate a position inside the active circle"
-        r = self.radius * random()  # pylint: disable=invalid-name
-        theta = random() * 2 * pi
-        x_coo = round(self.position.x + r * cos(theta))
-        y_coo = round(self.position.y + r * sin(theta))
-        if 0 < x_coo < config.WIDTH and 0 < y_coo < config.HEIGHT:
-            return Vector2(x_coo, y_coo)
-        return self.generate_position()
-
-    def tick(self):
-        "Possibly generate a new food point somewhere"
-        if random() > self.profusion:
-            return None
-        position = self.generate_position()
-        return FoodPoint(position, randint(2, 35))
-
-    def draw(self, surface: Surface):
-        "Draw the sprite"
-        draw.circle(surface, Color("#009933"), self.position, self.radius, 1)
-
-class FoodPoint(Sprite):
+    def generate_positions(self, count: int, rng: np.random.Generator) -> np.ndarray:
+        """Generate the positions of count points inside the active circle, as integer coordinates
+        Points outside the world are rejected and drawn again, all at once"""
+        positions = np.empty((0, 2), dtype=np.int64)
+        while len(positions) < count:
+            missing = count - len(positions)
+            r = self.radius * rng.random(missing)  # pylint: disable=invalid-name
+            theta = rng.random(missing) * 2 * pi
+            samples = np.column_stack((
+                np.round(self.position.x + r * np.cos(theta)),
+                np.round(self.position.y + r * np.sin(theta)),
+            )).astype(np.int64)
+            inside = (
+                (samples[:, 0] > 0) & (samples[:, 0] < config.WORLD_WIDTH)
+                & (samples[:, 1] > 0) & (samples[:, 1] < config.WORLD_HEIGHT)
+            )
+            positions = np.concatenate((positions, samples[inside]))
+        return positions
+
+    def spawn(self, attempts: int, limit: Optional[int] = None) -> list["FoodPoint"]:
+        """Generate the food points of several ticks at once, each of them spawning a point with a
+        probability of profusion, and return at most limit points"""
+        # seeded from the random module, so seeded simulations stay reproducible
+        rng = np.random.default_rng(getrandbits(64))
+        count = int(rng.binomial(attempts, self.profusion))
+        if limit is not None:
+            count = min(count, limit)
+        positions = self.generate_positions(count, rng)
+        quantities = rng.integers(2, 35, count, endpoint=True)
+        return [
+            FoodPoint(Vector2(x, y), quantity)
+            for (x, y), quantity in zip(positions.tolist(), quantities.tolist())
+        ]
+
+    def draw(self, surface: Surface, camera: "Camera"):
+        "Draw the sprite, and return the drawn region"
+        return draw.circle(
+            surface, Color("#009933"),
+            camera.world_to_screen(self.position), max(1, round(self.radius * camera.zoom)), 1
+        )
+
+class FoodPoint:
     "A food point collectible by creatures"
 
+    __slots__ = ("position", "quantity", "size", "rectangle")
+
     def __init__(self, position: Vector2, quantity: int):
-        super().__init__()
         self.position = position
         self.quantity = quantity
 
         self.size = ceil(self.quantity / 10)
 
-        self.surf = Surface((self.size, self.size))
-        self.surf.fill("green")
-        self.rectangle = self.surf.get_rect(center=(self.position))
+        self.rectangle = Rect(0, 0, self.size, self.size)
+        self.rectangle.center = self.position
 
-    def draw(self, surface: Surface):
-        "Draw the sprite"
-        surface.blit(self.surf, self.rectangle)
+    def draw(self, surface: Surface, camera: "Camera"):
+        "Draw the sprite, and return the drawn region"
+        return draw_square(surface, camera, self.position, self.rectangle, FOOD_COLOR)
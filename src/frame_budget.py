@@ -0,0 +1,142 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from . import config
+
+# optional rendering work, in the order it is disabled when frames are too slow
+SHEDDING_ORDER = ("lights", "charts", "food", "panel")
+
+# measured phase which is never shed
+SIMULATION_PHASE = "simulation"
+
+# the rest of the frame: events, creatures, texts and display update
+BASE_PHASE = "base"
+
+
+class FrameBudget:
+    """Measure the cost of each phase of the frames, and shed optional work when frames take
+    longer than the target frame time: first the features of SHEDDING_ORDER, then by rendering
+    only one frame out of a few, the simulation still running at every frame
+    With the "simulation-first" policy, rendering only gets a small share of the frame time"""
+
+    def __init__(self, target: Optional[float] = None, policy: Optional[str] = None):
+        # in milliseconds
+        self.target = target or config.FRAME_TIME_TARGET or 1000 / config.FPS
+        self.policy = policy or config.FRAME_BUDGET_POLICY
+        # 0 means full quality, then each level sheds one more feature or renders less often
+        self.level = 0
+        self.max_level = len(SHEDDING_ORDER) + config.FRAME_BUDGET_MAX_RENDER_INTERVAL - 1
+        # phase -> average duration in milliseconds, kept while the phase is shed
+        # so we know what enabling it back would cost
+        self.costs: dict[str, float] = {}
+        # phase -> duration in milliseconds during the current frame
+        self.frame_costs: dict[str, float] = {}
+        # optional features the user asked for (charts shown, creature selected...) during the
+        # current frame and the last rendered one, the others being free
+        self.frame_features: set[str] = set()
+        self.features: set[str] = set(SHEDDING_ORDER)
+        self.frame_start = time.perf_counter()
+        self.frame_index = 0
+        self.last_change = self.frame_start
+        self.is_rendering = True
+        self.is_adaptive = True
+
+    @property
+    def budget(self) -> float:
+        "Time in milliseconds the measured work of a frame should fit in"
+        if self.policy == "simulation-first":
+            return self.target * config.FRAME_BUDGET_RENDER_SHARE
+        return self.target
+
+    @property
+    def render_interval(self) -> int:
+        "Number of frames between two rendered frames"
+        return self.get_render_interval(self.level)
+
+    def get_render_interval(self, level: int) -> int:
+        "Number of frames between two rendered frames at a given level"
+        return max(1, level - len(SHEDDING_ORDER) + 1)
+
+    def is_enabled(self, feature: str) -> bool:
+        """Check if an optional feature of SHEDDING_ORDER should be drawn
+        Only call it when the feature would be drawn with all the optional work enabled"""
+        self.frame_features.add(feature)
+        return SHEDDING_ORDER.index(feature) >= self.level
+
+    def estimate(self, level: int) -> float:
+        "Estimate the cost of a frame, compared to the budget, at a given level"
+        features = sum(
+            self.costs.get(feature, 0.0) for feature in SHEDDING_ORDER[level:]
+            if feature in self.features
+        )
+        rendering = (self.costs.get(BASE_PHASE, 0.0) + features) / self.get_render_interval(level)
+        if self.policy == "simulation-first":
+            return rendering
+        return self.costs.get(SIMULATION_PHASE, 0.0) + rendering
+
+    def start_frame(self, adaptive: bool = True) -> bool:
+        """Start measuring a new frame, and tell if it should be rendered
+        Frames are not shed when adaptive is False (when rendering is already rare in fast-forward)"""
+        self.frame_start = time.perf_counter()
+        self.frame_costs = {}
+        self.frame_features = set()
+        self.is_adaptive = adaptive and config.FRAME_BUDGET_ENABLED
+        if not self.is_adaptive:
+            self.is_rendering = True
+        else:
+            self.is_rendering = self.frame_index % self.render_interval == 0
+        self.frame_index += 1
+        return self.is_rendering
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        "Measure a phase of the current frame"
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.frame_costs[phase] = self.frame_costs.get(phase, 0.0) + duration
+
+    def record(self, phase: str, duration: float):
+        "Add a duration in milliseconds to the average cost of a phase"
+        if phase not in self.costs:
+            self.costs[phase] = duration
+        else:
+            smoothing = config.FRAME_BUDGET_SMOOTHING
+            self.costs[phase] += (duration - self.costs[phase]) * smoothing
+
+    def end_frame(self):
+        "Stop measuring the current frame (before waiting for the next one), and adjust the level"
+        total = (time.perf_counter() - self.frame_start) * 1000
+        for phase, duration in self.frame_costs.items():
+            self.record(phase, duration)
+        if self.is_rendering:
+            self.record(BASE_PHASE, max(0.0, total - sum(self.frame_costs.values())))
+            self.features = self.frame_features
+        if not self.is_adaptive:
+            return
+        now = time.perf_counter()
+        if now - self.last_change < config.FRAME_BUDGET_ADJUST_DELAY:
+            return
+        if self.level < self.max_level and self.estimate(self.level) > self.budget:
+            self.level += 1
+            self.last_change = now
+        elif (
+            self.level > 0
+            and self.estimate(self.level - 1) < self.budget * config.FRAME_BUDGET_RESTORE_MARGIN
+        ):
+            self.level -= 1
+            self.last_change = now
+
+    @property
+    def label(self) -> str:
+        "Short text describing the current quality decisions"
+        if self.level == 0:
+            return ""
+        shed = ", ".join(SHEDDING_ORDER[:self.level])
+        text = f"Frame {self.estimate(self.level):.1f}/{self.budget:.1f} ms, off: {shed}"
+        if self.render_interval > 1:
+            text += f", render 1/{self.render_interval}"
+        return text
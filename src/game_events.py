@@ -1,12 +1,18 @@
-import pygame
-
 from . import config
 
-UPDATE_CREATURES_ENERGIES = pygame.USEREVENT + 1
-GENERATE_FOOD = pygame.USEREVENT + 2
+# each event name is the name of the ContextManager method to call
+GENERATE_FOOD = "generate_food"
+TAKE_MEMORY_SNAPSHOT = "take_memory_snapshot"
+EXPORT_POPULATION = "export_population"
+
 
-# type and interval in ms of each enabled event
-events = {
-    UPDATE_CREATURES_ENERGIES: 1000,
-    GENERATE_FOOD: config.FOOD_GENERATION_INTERVAL * 1000,
-}
+def get_periodic_events() -> dict[str, float]:
+    "Return the name and interval in seconds (of simulation time) of each enabled event"
+    events = {
+        GENERATE_FOOD: config.FOOD_GENERATION_INTERVAL,
+    }
+    if config.MEMORY_PROFILER_INTERVAL is not None:
+        events[TAKE_MEMORY_SNAPSHOT] = config.MEMORY_PROFILER_INTERVAL
+    if config.POPULATION_EXPORT_DIRECTORY is not None:
+        events[EXPORT_POPULATION] = config.POPULATION_EXPORT_INTERVAL
+    return events
@@ -0,0 +1,75 @@
+import random
+from typing import Optional
+
+from . import config
+from .context_manager import ContextManager
+from .execution import ExecutionBackend
+
+# every key returned by get_population_stats, in a stable order
+POPULATION_STATS_KEYS = [
+    "time", "creatures_count", "foods_total", "avg_generation", "max_generation", "avg_size",
+    "avg_energy", "avg_life", "avg_vision_angle", "killers_percent",
+]
+
+
+def get_population_stats(context: ContextManager) -> dict[str, float]:
+    "Summarize the current state of a simulation"
+    creatures = list(context.creatures.values())
+    foods_total = sum(
+        food.quantity for food_list in context.foods_grid.values() for food in food_list
+    )
+    stats: dict[str, float] = {
+        "time": context.time,
+        "creatures_count": len(creatures),
+        "foods_total": foods_total,
+    }
+    if creatures:
+        count = len(creatures)
+        stats.update({
+            "avg_generation": sum(creature.generation for creature in creatures) / count,
+            "max_generation": max(creature.generation for creature in creatures),
+            "avg_size": sum(creature.size for creature in creatures) / count,
+            "avg_energy": sum(max(0, creature.energy) for creature in creatures) / count,
+            "avg_life": sum(creature.life / creature.max_life for creature in creatures) / count,
+            "avg_vision_angle": sum(creature.vision_angle for creature in creatures) / count,
+            "killers_percent": sum(
+                1 for creature in creatures if creature.has_attack_neuron()
+            ) / count,
+        })
+    return stats
+
+
+class HeadlessWorld:
+    "A simulation running without any display, using fixed-size steps"
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is not None:
+            random.seed(seed)
+        self.seed = seed
+        self.ticks = 0
+        self.history: list[dict[str, float]] = []
+        self.context = ContextManager()
+        self.context.generate_initial_food()
+
+    @property
+    def is_extinct(self):
+        "Check if every creature died"
+        return len(self.context.creatures) == 0
+
+    def run(self, ticks: int, backend: Optional[ExecutionBackend] = None,
+            record_interval: Optional[int] = None):
+        """Run a given number of simulation steps, or until every creature died
+        If record_interval is set, the world statistics are saved in history every record_interval steps"""
+        for _ in range(ticks):
+            if self.is_extinct:
+                break
+            self.context.step(backend, config.SIMULATION_STEP)
+            self.ticks += 1
+            if record_interval and self.ticks % record_interval == 0:
+                self.history.append(self.get_stats())
+
+    def get_stats(self):
+        "Summarize the current state of the simulation"
+        stats = get_population_stats(self.context)
+        stats["ticks"] = self.ticks
+        return stats
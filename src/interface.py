@@ -1,4 +1,4 @@
-from pygame import Color
+from pygame import Color, Vector2
 from pygame.surface import Surface
 from pygame.time import Clock
 from pygame.font import Font
@@ -13,7 +13,7 @@ def display_fps(window: Surface, font: Font, clock: Clock):
     else:
         color = "WHITE"
     fps_t = font.render(f"FPS: {fps}", True, Color(color))
-    window.blit(fps_t,(3, 0))
+    return window.blit(fps_t,(3, 0))
 
 def display_elapsed_time(window: Surface, font: Font, elapsed: float):
     "Display the elapsed time on top left corner"
@@ -23,4 +23,30 @@ def display_elapsed_time(window: Surface, font: Font, elapsed: float):
     else:
         text = f"Time: {elapsed:.1f}s"
     time_t = font.render(text, True, Color("WHITE"))
-    window.blit(time_t, (3, 15))
+    return window.blit(time_t, (3, 15))
+
+def display_fast_forward(window: Surface, font: Font, label: str):
+    "Display the fast-forward status on top left corner"
+    if not label:
+        return None
+    speed_t = font.render(label, True, Color("ORANGE"))
+    return window.blit(speed_t, (3, 30))
+
+def display_selection_count(window: Surface, font: Font, count: int):
+    "Display the number of creatures selected with a rectangle on top left corner"
+    if count < 2:
+        return None
+    count_t = font.render(f"{count} creatures selected", True, Color("AQUA"))
+    return window.blit(count_t, (3, 45))
+
+def display_frame_budget(window: Surface, font: Font, label: str):
+    "Display the rendering work currently shed to keep up with the frame budget on top left corner"
+    if not label:
+        return None
+    budget_t = font.render(label, True, Color("ORANGE"))
+    return window.blit(budget_t, (3, 60))
+
+def display_tooltip(window: Surface, font: Font, text: str, position: Vector2):
+    "Display a short text on a dark background at a given position"
+    tooltip_t = font.render(text, True, Color("WHITE"), Color("#262626"))
+    return window.blit(tooltip_t, position)
@@ -0,0 +1,134 @@
+import argparse
+import os
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from . import config
+from .headless import HeadlessWorld
+
+
+def island_worker(connection: Connection, seed: Optional[int]):
+    "Host a headless world in a separate process, and execute the commands sent by the runner"
+    world = HeadlessWorld(seed)
+    while True:
+        command, argument = connection.recv()
+        if command == "run":
+            world.run(argument)
+            connection.send(world.get_stats())
+        elif command == "emigrate":
+            connection.send(world.context.get_emigrants(argument))
+        elif command == "immigrate":
+            world.context.add_immigrants(argument)
+            connection.send(len(world.context.creatures))
+        elif command == "stop":
+            break
+    world.context.close()
+    connection.close()
+
+
+def aggregate_stats(islands_stats: list[dict[str, float]]) -> dict[str, float]:
+    "Merge the statistics of every island into global ones"
+    populated = [stats for stats in islands_stats if stats["creatures_count"] > 0]
+    total_count = sum(stats["creatures_count"] for stats in islands_stats)
+    result: dict[str, float] = {
+        "islands": len(islands_stats),
+        "populated_islands": len(populated),
+        "creatures_count": total_count,
+        "foods_total": sum(stats["foods_total"] for stats in islands_stats),
+        "time": max((stats["time"] for stats in islands_stats), default=0.0),
+    }
+    if populated:
+        result["max_generation"] = max(stats["max_generation"] for stats in populated)
+        # averages are weighted by the population of each island
+        for key in ("avg_generation", "avg_size", "avg_energy", "avg_life", "killers_percent"):
+            result[key] = sum(
+                stats[key] * stats["creatures_count"] for stats in populated
+            ) / total_count
+    return result
+
+
+class IslandsRunner:
+    """Run several independent headless worlds in parallel processes,
+    and periodically copy a few genomes from each island to the next one (ring topology)"""
+
+    def __init__(self, islands_count: Optional[int] = None, seed: Optional[int] = None):
+        self.islands_count = islands_count or config.ISLANDS_COUNT or os.cpu_count() or 1
+        self.seed = seed
+        self.connections: list[Connection] = []
+        self.processes: list[Process] = []
+        self.history: list[list[dict[str, float]]] = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def start(self):
+        "Launch every island process"
+        for i in range(self.islands_count):
+            parent_connection, child_connection = Pipe()
+            seed = None if self.seed is None else self.seed + i
+            process = Process(target=island_worker, args=(child_connection, seed), daemon=True)
+            process.start()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def stop(self):
+        "Ask every island to stop, and wait for them"
+        for connection in self.connections:
+            connection.send(("stop", None))
+        for process in self.processes:
+            process.join()
+        self.connections.clear()
+        self.processes.clear()
+
+    def _broadcast(self, command: str, arguments: list):
+        "Send a command to every island at once, then wait for every answer"
+        for connection, argument in zip(self.connections, arguments):
+            connection.send((command, argument))
+        return [connection.recv() for connection in self.connections]
+
+    def run_epoch(self, ticks: int) -> list[dict[str, float]]:
+        "Run a given number of steps on every island in parallel, and return their statistics"
+        islands_stats = self._broadcast("run", [ticks] * self.islands_count)
+        self.history.append(islands_stats)
+        return islands_stats
+
+    def migrate(self, count: int):
+        "Copy a few genomes from each island to the next one"
+        if self.islands_count < 2 or count <= 0:
+            return
+        emigrants = self._broadcast("emigrate", [count] * self.islands_count)
+        # island i receives the emigrants of island i-1
+        self._broadcast("immigrate", emigrants[-1:] + emigrants[:-1])
+
+    def run(self, epochs: int, ticks_per_epoch: Optional[int] = None,
+            migrants_count: Optional[int] = None, verbose: bool = False):
+        "Run several epochs, with a migration after each of them"
+        ticks_per_epoch = ticks_per_epoch or config.ISLANDS_MIGRATION_INTERVAL
+        if migrants_count is None:
+            migrants_count = config.ISLANDS_MIGRANTS_COUNT
+        for epoch in range(epochs):
+            stats = aggregate_stats(self.run_epoch(ticks_per_epoch))
+            if verbose:
+                print(
+                    f"Epoch {epoch + 1}/{epochs}:",
+                    ", ".join(f"{key}={value:.2f}" for key, value in stats.items())
+                )
+            self.migrate(migrants_count)
+        return self.history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several headless simulations in parallel")
+    parser.add_argument("--islands", type=int, default=None, help="number of islands")
+    parser.add_argument("--epochs", type=int, default=10, help="number of migrations")
+    parser.add_argument("--ticks", type=int, default=None, help="simulation steps between migrations")
+    parser.add_argument("--migrants", type=int, default=None, help="genomes sent at each migration")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first island")
+    args = parser.parse_args()
+    with IslandsRunner(args.islands, args.seed) as runner:
+        runner.run(args.epochs, args.ticks, args.migrants, verbose=True)
@@ -0,0 +1,166 @@
+import hashlib
+import heapq
+from array import array
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .creature import CreatureGenome
+
+# parent id of creatures without known parents (initial creatures and immigrants)
+NO_PARENT = -1
+# parent id of ids which were never recorded
+NOT_RECORDED = -2
+
+
+def get_genome_hash(genome: CreatureGenome) -> int:
+    "Compute a 64 bits hash of a genome, stable across processes and runs"
+    return int.from_bytes(hashlib.blake2b(repr(genome).encode(), digest_size=8).digest(), "little")
+
+
+class LineageStore:
+    """Keep the parents, birth time and genome hash of every creature ever born, in compact arrays indexed by id
+    No Creature object is referenced, so memory only depends on the number of ids (32 bytes each)
+    Queries rely on creature ids being given in birth order, so parents always have smaller ids than their children"""
+
+    def __init__(self):
+        self.first_parents = array("q")
+        self.second_parents = array("q")
+        self.births = array("d")
+        self.genome_hashes = array("Q")
+        # (children ids, start index of each parent in children ids), rebuilt when needed
+        self._children_index: Optional[tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self):
+        return len(self.births)
+
+    def __contains__(self, creature_id: int):
+        return 0 <= creature_id < len(self) and self.first_parents[creature_id] != NOT_RECORDED
+
+    def record(self, creature_id: int, timestamp: float, genome_hash: int,
+               parent1_id: int = NO_PARENT, parent2_id: int = NO_PARENT):
+        "Save the birth of a creature"
+        while len(self) <= creature_id:
+            self.first_parents.append(NOT_RECORDED)
+            self.second_parents.append(NOT_RECORDED)
+            self.births.append(0.0)
+            self.genome_hashes.append(0)
+        self.first_parents[creature_id] = parent1_id
+        self.second_parents[creature_id] = parent2_id
+        self.births[creature_id] = timestamp
+        self.genome_hashes[creature_id] = genome_hash
+        self._children_index = None
+
+    def parents(self, creature_id: int) -> tuple[int, ...]:
+        "Return the known parents of a creature"
+        if creature_id not in self:
+            return ()
+        return tuple(
+            parent
+            for parent in (self.first_parents[creature_id], self.second_parents[creature_id])
+            if parent >= 0
+        )
+
+    def ancestors(self, creature_id: int, max_depth: Optional[int] = None) -> set[int]:
+        "Return every known ancestor of a creature, up to max_depth generations"
+        result: set[int] = set()
+        current = [creature_id]
+        depth = 0
+        while current and (max_depth is None or depth < max_depth):
+            next_generation: list[int] = []
+            for creature in current:
+                for parent in self.parents(creature):
+                    if parent not in result:
+                        result.add(parent)
+                        next_generation.append(parent)
+            current = next_generation
+            depth += 1
+        return result
+
+    def _get_children_index(self):
+        "Build (or reuse) a CSR-like index of the children of each creature"
+        if self._children_index is None:
+            ids = np.arange(len(self), dtype=np.int64)
+            parents = np.concatenate([
+                np.frombuffer(self.first_parents, dtype=np.int64),
+                np.frombuffer(self.second_parents, dtype=np.int64),
+            ])
+            children = np.concatenate([ids, ids])
+            mask = parents >= 0
+            parents, children = parents[mask], children[mask]
+            order = np.argsort(parents, kind="stable")
+            starts = np.searchsorted(parents[order], np.arange(len(self) + 1))
+            self._children_index = (children[order], starts)
+        return self._children_index
+
+    def children(self, creature_id: int) -> list[int]:
+        "Return the children of a creature"
+        if creature_id not in self:
+            return []
+        children, starts = self._get_children_index()
+        # a child can appear twice if both parents were the same creature
+        return sorted(set(children[starts[creature_id]:starts[creature_id + 1]].tolist()))
+
+    def descendants(self, creature_id: int) -> set[int]:
+        "Return every descendant of a creature"
+        children, starts = self._get_children_index()
+        result: set[int] = set()
+        stack = [creature_id]
+        while stack:
+            creature = stack.pop()
+            if creature not in self:
+                continue
+            for child in children[starts[creature]:starts[creature + 1]].tolist():
+                if child not in result:
+                    result.add(child)
+                    stack.append(child)
+        return result
+
+    def most_recent_common_ancestor(self, creature1_id: int, creature2_id: int) -> Optional[int]:
+        """Return the latest born creature being an ancestor of both creatures (or one of them), if any
+        Creatures are visited by decreasing id, so the first one reached from both sides is the answer"""
+        if creature1_id == creature2_id:
+            return creature1_id
+        # bit flags telling from which creature(s) an ancestor was reached
+        reached: dict[int, int] = {creature1_id: 1, creature2_id: 2}
+        queue = [-creature1_id, -creature2_id]
+        heapq.heapify(queue)
+        while queue:
+            current = -heapq.heappop(queue)
+            flags = reached[current]
+            if flags == 3:
+                return current
+            for parent in self.parents(current):
+                if parent in reached:
+                    reached[parent] |= flags
+                else:
+                    reached[parent] = flags
+                    heapq.heappush(queue, -parent)
+        return None
+
+    def lineage(self, creature_id: int) -> Iterator[int]:
+        "Iterate over the first-parent line of a creature, from its parent to the oldest known ancestor"
+        while (parents := self.parents(creature_id)):
+            creature_id = parents[0]
+            yield creature_id
+
+    def save(self, path: str):
+        "Save the whole store into a NumPy .npz file"
+        np.savez_compressed(
+            path,
+            first_parents=np.frombuffer(self.first_parents, dtype=np.int64),
+            second_parents=np.frombuffer(self.second_parents, dtype=np.int64),
+            births=np.frombuffer(self.births, dtype=np.float64),
+            genome_hashes=np.frombuffer(self.genome_hashes, dtype=np.uint64),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        "Load a store saved with save()"
+        store = cls()
+        with np.load(path) as data:
+            store.first_parents.frombytes(data["first_parents"].astype(np.int64).tobytes())
+            store.second_parents.frombytes(data["second_parents"].astype(np.int64).tobytes())
+            store.births.frombytes(data["births"].astype(np.float64).tobytes())
+            store.genome_hashes.frombytes(data["genome_hashes"].astype(np.uint64).tobytes())
+        return store
@@ -0,0 +1,162 @@
+import argparse
+import os
+import tracemalloc
+from collections import defaultdict
+from typing import Optional
+
+from . import config
+
+# subsystems and the path fragments of the files allocating their memory,
+# the most recent frame of a traceback matching one of them wins
+SUBSYSTEMS: list[tuple[str, tuple[str, ...]]] = [
+    ("networks", (
+        "src/neural/network.py", "src/neural/structure.py", "src/neural/abc.py",
+        "src/neural/inputs.py", "src/neural/actions.py",
+    )),
+    ("graph caches", ("src/neural/graph.py", "/networkx/")),
+    ("charts", ("src/charts.py", "src/plotting.py", "/matplotlib/", "/pylab")),
+    ("creatures", (
+        "src/creature.py", "src/mp_utils.py", "src/metabolism.py", "src/creatures_panel.py"
+    )),
+    ("food", ("src/food.py",)),
+    ("world", ("src/context_manager.py", "src/scheduler.py", "src/lineage.py")),
+    ("recording", (
+        "src/event_log.py", "src/replay.py", "src/renderer.py", "src/background.py",
+        "src/population_export.py",
+    )),
+    ("rendering", (
+        "src/camera.py", "src/dirty_rects.py", "src/gradients.py", "src/interface.py", "/pygame/"
+    )),
+]
+OTHER_SUBSYSTEM = "other"
+
+# allocations made by the profiler itself or by the import machinery
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def get_subsystem(traceback: tracemalloc.Traceback) -> str:
+    "Find the subsystem responsible for an allocation"
+    for frame in reversed(traceback):
+        filename = frame.filename.replace(os.sep, "/")
+        for name, fragments in SUBSYSTEMS:
+            if any(fragment in filename for fragment in fragments):
+                return name
+    return OTHER_SUBSYSTEM
+
+def get_subsystems_sizes(snapshot: tracemalloc.Snapshot) -> dict[str, int]:
+    "Sum the memory allocated by each subsystem, in bytes"
+    sizes: dict[str, int] = defaultdict(int)
+    for statistic in snapshot.statistics("traceback"):
+        sizes[get_subsystem(statistic.traceback)] += statistic.size
+    return dict(sizes)
+
+
+def format_size(size: float) -> str:
+    "Format a size in bytes into a human-readable string"
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+def format_report(timestamp: Optional[float], sizes: dict[str, int],
+                  previous_sizes: Optional[dict[str, int]],
+                  top_growth: list[tracemalloc.StatisticDiff]) -> str:
+    "Describe the memory used by each subsystem, and its growth since the previous snapshot"
+    def growth(name: Optional[str]) -> str:
+        if previous_sizes is None:
+            return ""
+        if name is None:
+            diff = sum(sizes.values()) - sum(previous_sizes.values())
+        else:
+            diff = sizes.get(name, 0) - previous_sizes.get(name, 0)
+        return f" ({'+' if diff >= 0 else '-'}{format_size(abs(diff))})"
+
+    time_label = f"t={timestamp:.1f}s " if timestamp is not None else ""
+    lines = [f"[memory] {time_label}total={format_size(sum(sizes.values()))}{growth(None)}"]
+    for name in sorted(sizes, key=lambda subsystem: sizes[subsystem], reverse=True):
+        lines.append(f"  {name:<14}{format_size(sizes[name]):>12}{growth(name)}")
+    if top_growth:
+        lines.append("  top growth:")
+        for diff in top_growth:
+            frame = diff.traceback[-1]
+            lines.append(
+                f"    {frame.filename}:{frame.lineno} "
+                f"+{format_size(diff.size_diff)} ({diff.count_diff:+} blocks)"
+            )
+    return "\n".join(lines)
+
+
+class MemoryProfiler:
+    """Take tracemalloc snapshots, and report the memory used by each subsystem and its growth
+    since the previous snapshot (snapshots are scheduled by the context, in simulation time)"""
+
+    def __init__(self, directory: Optional[str] = None, frames: int = 8,
+                 top_count: int = 10, verbose: bool = True):
+        self.directory = directory
+        self.top_count = top_count
+        self.verbose = verbose
+        # (simulation time, bytes used by each subsystem) of every snapshot
+        self.history: list[tuple[float, dict[str, int]]] = []
+        self.previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def take_snapshot(self, timestamp: float):
+        "Take a snapshot, report the memory usage and possibly save it on disk"
+        snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+        sizes = get_subsystems_sizes(snapshot)
+        previous_sizes = self.history[-1][1] if self.history else None
+        top_growth: list[tracemalloc.StatisticDiff] = []
+        if self.previous_snapshot is not None:
+            top_growth = [
+                diff for diff in snapshot.compare_to(self.previous_snapshot, "lineno")[:self.top_count]
+                if diff.size_diff > 0
+            ]
+        self.history.append((timestamp, sizes))
+        self.previous_snapshot = snapshot
+        if self.directory:
+            snapshot.dump(os.path.join(self.directory, f"memory_{timestamp:010.1f}.snapshot"))
+        if self.verbose:
+            print(format_report(timestamp, sizes, previous_sizes, top_growth))
+        return sizes
+
+    def close(self):
+        "Stop tracing allocations"
+        self.previous_snapshot = None
+        tracemalloc.stop()
+
+
+def create_memory_profiler() -> Optional[MemoryProfiler]:
+    "Create a memory profiler from the config, if it's enabled"
+    if config.MEMORY_PROFILER_INTERVAL is None:
+        return None
+    return MemoryProfiler(config.MEMORY_PROFILER_DIRECTORY, config.MEMORY_PROFILER_FRAMES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two memory snapshots saved on disk")
+    parser.add_argument("old", help="path of the oldest snapshot")
+    parser.add_argument("new", help="path of the newest snapshot")
+    parser.add_argument("--top", type=int, default=20, help="number of lines with the largest growth")
+    args = parser.parse_args()
+
+    old_snapshot = tracemalloc.Snapshot.load(args.old)
+    new_snapshot = tracemalloc.Snapshot.load(args.new)
+    print(format_report(
+        None,
+        get_subsystems_sizes(new_snapshot),
+        get_subsystems_sizes(old_snapshot),
+        [
+            diff for diff in new_snapshot.compare_to(old_snapshot, "lineno")[:args.top]
+            if diff.size_diff > 0
+        ],
+    ))
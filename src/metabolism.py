@@ -0,0 +1,57 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .utils import get_attribute_array
+
+if TYPE_CHECKING:
+    from creature import Creature
+
+# energy level under which a creature loses life points (and goes back to 0 energy)
+STARVATION_THRESHOLD = -10
+
+
+def apply_metabolism(creatures: list["Creature"], delta_t: int) -> np.ndarray:
+    """Update the energy, digestion and life of every creature for a step of delta_t milliseconds,
+    and return a mask of the creatures killed by starvation
+    Digestion and life regeneration are rates per second scaled by the step duration, so the work
+    is spread over every step instead of a burst every second"""
+    if not creatures:
+        return np.zeros(0, dtype=bool)
+    seconds = delta_t / 1000
+    energies = get_attribute_array(creatures, "energy")
+    max_energies = get_attribute_array(creatures, "max_energy")
+    digesting = get_attribute_array(creatures, "digesting")
+    lives = get_attribute_array(creatures, "life")
+    max_lives = get_attribute_array(creatures, "max_life")
+    regen_costs = get_attribute_array(creatures, "life_regen_cost")
+    efficiencies = get_attribute_array(creatures, "digestion_efficiency")
+    speeds = get_attribute_array(creatures, "digestion_speed")
+
+    # digestion
+    points = np.minimum(digesting, speeds * seconds)
+    added_energy = np.where(
+        points > 0, np.minimum(points * efficiencies, max_energies - energies), 0.0
+    )
+    digesting = np.round(digesting - added_energy / efficiencies, 5)
+    energies += added_energy
+    # life damages
+    starving = energies <= STARVATION_THRESHOLD
+    lives[starving] += np.round(energies[starving] / 10)
+    energies[starving] = 0
+    # life regeneration
+    regenerated = np.where(
+        ~starving & (energies >= regen_costs), np.clip(max_lives - lives, 0.0, seconds), 0.0
+    )
+    energies -= regenerated * regen_costs
+    lives += regenerated
+
+    for creature, energy, digested, life, is_starving in zip(
+        creatures, energies.tolist(), digesting.tolist(), lives.tolist(), starving.tolist()
+    ):
+        creature.energy = energy
+        creature.digesting = digested
+        creature.life = life
+        if is_starving:
+            creature.damager.hurt()
+    return lives <= 0
@@ -12,6 +12,12 @@ if TYPE_CHECKING:
 
 class CreatureProcessMove:
     "Represents the data a process has to know in order to make a creature moving"
+
+    __slots__ = (
+        "creature_id", "size", "acceleration_from_neuron", "rotation_from_neuron", "direction",
+        "acceleration", "velocity", "deceleration", "pos", "energy", "light_emission",
+    )
+
     def __init__(self, creature: "Creature"):
         self.creature_id = creature.creature_id
         self.size = creature.size
@@ -81,14 +87,14 @@ class CreatureProcessMove:
 
     def _update_position(self, new_pos: Vector2):
         "Make sure the creature stays in the screen, then apply the given position"
-        if new_pos.x > config.WIDTH:
+        if new_pos.x > config.WORLD_WIDTH:
             new_pos.x = 0
         elif new_pos.x < 0:
-            new_pos.x = config.WIDTH
-        if new_pos.y > config.HEIGHT:
+            new_pos.x = config.WORLD_WIDTH
+        if new_pos.y > config.WORLD_HEIGHT:
             new_pos.y = 0
         elif new_pos.y < 0:
-            new_pos.y = config.HEIGHT
+            new_pos.y = config.WORLD_HEIGHT
 
         self.pos = new_pos
 
@@ -18,10 +18,13 @@ if TYPE_CHECKING:
 class TransitionNeuron:
     "Basic neuron"
 
-    name = "H"
+    __slots__ = ("value", "name")
+
+    default_name = "H"
 
     def __init__(self):
         self.value = 0.0
+        self.name = self.default_name
 
     def update_value(self,
                      previous_neurons: list[Union["TransitionNeuron", "InputNeuron"]],
@@ -36,10 +39,13 @@ class TransitionNeuron:
 class InputNeuron:
     "Neuron used as input"
 
-    name = "I"
+    __slots__ = ("value", "name")
+
+    default_name = "I"
 
     def __init__(self):
         self.value = 0.0
+        self.name = self.default_name
 
     def update(self, subject: "Creature", context: "ContextManager"):
         "Update the input value from the given subject"
@@ -49,7 +55,9 @@ class InputNeuron:
 class ActionNeuron(TransitionNeuron):
     "Neuron used as an output"
 
-    name = "A"
+    __slots__ = ()
+
+    default_name = "A"
 
     def act(self, creature: "Creature"):
         "Execute an action on a creature based on the current neuron value"
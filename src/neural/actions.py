@@ -3,21 +3,24 @@ from .. import config
 
 class MoveActionNeuron(ActionNeuron):
     "Create an acceleration movement for the creature"
-    name = "Acceleration"
+    __slots__ = ()
+    default_name = "Acceleration"
 
     def act(self, creature):
         creature.acceleration_from_neuron = self.value
 
 class RotateActionNeuron(ActionNeuron):
     "Rotate the creature direction"
-    name = "Rotation"
+    __slots__ = ()
+    default_name = "Rotation"
 
     def act(self, creature):
         creature.rotation_from_neuron = self.value / 20
 
 class EmitLightActionNeuron(ActionNeuron):
     "Emit some light visible by other creatures"
-    name = "Light e."
+    __slots__ = ()
+    default_name = "Light e."
 
     def act(self, creature):
         creature.light_emission = round(
@@ -28,14 +31,16 @@ class EmitLightActionNeuron(ActionNeuron):
 
 class ReadyForReproductionActionNeuron(ActionNeuron):
     "Boolean telling if the creature is ready to reproduce"
-    name = "Reproduction"
+    __slots__ = ()
+    default_name = "Reproduction"
 
     def act(self, creature):
         creature.ready_for_reproduction = self.value >= config.CREATURE_MIN_REPRODUCTION_STATE
 
 class ReadyToAttackActionNeuron(ActionNeuron):
     "Boolean telling if the creature is ready to inflict damage"
-    name = "Attack"
+    __slots__ = ()
+    default_name = "Attack"
 
     def act(self, creature):
         creature.ready_to_kill = self.value >= config.CREATURE_MIN_ATTACK_STATE
@@ -1,22 +1,26 @@
-from typing import Iterator, Optional, Union
+from typing import TYPE_CHECKING, Iterator, Optional, Union
 
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
-import networkx as nx
 import pygame
-import pylab
 from pygame.font import Font
 from pygame.surface import Surface
 
-
+from ..plotting import get_pyplot
 from .abc import ActionNeuron, InputNeuron, TransitionNeuron
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from networkx import DiGraph
+
 AnyNeuron = Union[InputNeuron, TransitionNeuron]
 
 class NeuralNetworkGraph:
-    "Some graph thing"
+    """Some graph thing
+    Only created to display a network, so networkx is imported on first use"""
 
     def __init__(self):
-        self.graph = nx.DiGraph()
+        # pylint: disable=import-outside-toplevel
+        from networkx import DiGraph
+        self.graph: "DiGraph" = DiGraph()
         self.canvas_size: tuple[int, int]
         self.raw_data: Optional[memoryview] = None
         self.pos: Optional[dict] = None
@@ -59,18 +63,22 @@ class NeuralNetworkGraph:
 
     def generate_canvas(self):
         "Generate the canvas for later use"
+        # pylint: disable=import-outside-toplevel
+        import networkx as nx
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        plt = get_pyplot()
         if self.pos is None:
             # self.pos = nx.kamada_kawai_layout(self.graph)
             # self.pos = nx.planar_layout(self.graph)
             self.pos = nx.spring_layout(self.graph, k=0.9)
-        fig = pylab.figure(
+        fig = plt.figure(
             # num=2,
             figsize=(3, 2),  # Inches
             dpi=100,
             tight_layout = {'pad': 0}
         )
-        ax: plt.Axes = fig.gca()  # pylint: disable=invalid-name
-        canvas = agg.FigureCanvasAgg(fig)
+        ax: "Axes" = fig.gca()  # pylint: disable=invalid-name
+        canvas = FigureCanvasAgg(fig)
         edges: list[dict[str, float]] = list(self.graph.edges().values())  # type: ignore
         nx.draw(
             self.graph,
@@ -99,24 +107,29 @@ class NeuralNetworkGraph:
         self.viewLim = ax.viewLim.intervalx, ax.viewLim.intervaly
         plt.close(fig)
 
-    def draw(self, surface: Surface, tooltip_font: Font):
-        "Draw the graph"
+    def draw(self, surface: Surface, tooltip_font: Font,
+             values: Optional[dict[str, float]] = None) -> Optional[pygame.Rect]:
+        """Draw the graph, and return the drawn region
+        Tooltips show the given neurons values, or the values of the graph neurons if there are none"""
         if len(self.graph.nodes) == 0:
-            return
+            return None
         if self.raw_data is None or self.pos is None:
             self.generate_canvas()
         if self.raw_data is None:
-            return
+            return None
         size = self.canvas_size
         surf = pygame.image.frombuffer(self.raw_data, size, "RGBA")
         s_width, s_height = surface.get_size()
-        surface.blit(surf, (s_width - size[0], s_height - size[1] - 20))
-        self.detect_tooltip(surface, tooltip_font)
+        drawn_rect = surface.blit(surf, (s_width - size[0], s_height - size[1] - 20))
+        for tooltip_rect in self.detect_tooltip(surface, tooltip_font, values):
+            drawn_rect.union_ip(tooltip_rect)
+        return drawn_rect
 
-    def detect_tooltip(self, surface: Surface, font: Font):
-        "Draw tooltips over the graph is mouse is over a neuron"
+    def detect_tooltip(self, surface: Surface, font: Font,
+                       values: Optional[dict[str, float]] = None) -> list[pygame.Rect]:
+        "Draw tooltips over the graph is mouse is over a neuron, and return the drawn regions"
         if self.viewLim is None or self.pos is None:
-            return
+            return []
         # mouse position
         mouse_pos_x, mouse_pos_y = pygame.mouse.get_pos()
         # width of the plot
@@ -132,6 +145,7 @@ class NeuralNetworkGraph:
         # x and y coo of the mouse relatively to the canvas
         mouse_rel_x = mouse_pos_x - canvas_x
         mouse_rel_y = mouse_pos_y - canvas_y
+        drawn_rects: list[pygame.Rect] = []
         for name, position in self.pos.items():
             # uniformized position (between 0 and 1)
             p = (position - [self.viewLim[0][0], self.viewLim[1][0]]) / [plot_width, plot_height]
@@ -140,11 +154,12 @@ class NeuralNetworkGraph:
             # reverse Y axis
             p[1] = p[1] * -1 + canvas_height
             if abs(mouse_rel_x - p[0]) < 10 and abs(mouse_rel_y - p[1]) < 10:
-                self.draw_tooltip(surface, font, name)
-    
-    def draw_tooltip(self, surface: Surface, font: Font, name: str):
-        "Actually draw a tooltip where needed"
-        raw_value = self.neurons_map[name].value
+                value = self.neurons_map[name].value if values is None else values[name]
+                drawn_rects.append(self.draw_tooltip(surface, font, name, value))
+        return drawn_rects
+
+    def draw_tooltip(self, surface: Surface, font: Font, name: str, raw_value: float) -> pygame.Rect:
+        "Actually draw a tooltip where needed, and return the drawn region"
         title_label = name
         value_label = f"{raw_value:.2f}"
         length = max(len(title_label), len(value_label)) + 4
@@ -155,8 +170,9 @@ class NeuralNetworkGraph:
         # render neuron name
         label = font.render(title_label, True, pygame.Color("WHITE"), pygame.Color("#262626"))
         label_width, _ = font.size(title_label)
-        surface.blit(label, (mouse_pos_x - label_width/2, mouse_pos_y - 30))
+        label_rect = surface.blit(label, (mouse_pos_x - label_width/2, mouse_pos_y - 30))
         # render neuron value
         value = font.render(value_label, True, pygame.Color("WHITE"), pygame.Color("#262626"))
         value_width, _ = font.size(value_label)
-        surface.blit(value, (mouse_pos_x - value_width/2, mouse_pos_y - 15))
+        value_rect = surface.blit(value, (mouse_pos_x - value_width/2, mouse_pos_y - 15))
+        return label_rect.union(value_rect)
@@ -7,56 +7,64 @@ from .abc import InputNeuron, sigmoid
 
 class XPositionInputNeuron(InputNeuron):
     "Corresponds to the X position of the creature"
-    name = "X Position"
+    __slots__ = ()
+    default_name = "X Position"
 
     def update(self, subject, context):
         self.value = sigmoid(subject.position.x * 0.003)
 
 class YPositionInputNeuron(InputNeuron):
     "Corresponds to the Y position of the creature"
-    name = "Y Position"
+    __slots__ = ()
+    default_name = "Y Position"
 
     def update(self, subject, context):
         self.value = sigmoid(subject.position.y * 0.003)
 
 class EnergyInputNeuron(InputNeuron):
     "Corresponds to the energy of the creature"
-    name = "Energy"
+    __slots__ = ()
+    default_name = "Energy"
 
     def update(self, subject, context):
         self.value = sigmoid(subject.energy / subject.max_energy)
 
 class DigestingInputNeuron(InputNeuron):
     "Corresponds to the digesting quantity of the creature"
-    name = "Digesting"
+    __slots__ = ()
+    default_name = "Digesting"
 
     def update(self, subject, context):
         self.value = sigmoid(subject.digesting / subject.max_digesting)
 
 class SpeedInputNeuron(InputNeuron):
     "Corresponds to the speed of the creature"
-    name = "Speed"
+    __slots__ = ()
+    default_name = "Speed"
 
     def update(self, subject, context):
         self.value = sigmoid(subject.velocity * 50)
 
 class LifeInputNeuron(InputNeuron):
     "Corresponds to the % of current life of the creature"
-    name = "Life"
+    __slots__ = ()
+    default_name = "Life"
 
     def update(self, subject, context):
         self.value = subject.life / subject.max_life
 
 class LightInputNeuron(InputNeuron):
     "Corresponds to the level of light at the position of the creature"
-    name = "Light"
+    __slots__ = ()
+    default_name = "Light"
 
     def update(self, subject, context):
         self.value = sigmoid(context.get_light_level_for_creature(subject) * 0.02)
 
 class FoodDistanceInputNeuron(InputNeuron):
     "Corresponds to the distance of the nearest food"
-    name = "Food dist."
+    __slots__ = ()
+    default_name = "Food dist."
 
     def update(self, subject, context):
         v = context.get_food_distance_for_creature(subject)
@@ -67,24 +75,34 @@ class FoodDistanceInputNeuron(InputNeuron):
 
 class ConstantNeuron(InputNeuron):
     "Corresponds to a fixed value"
-    fixed_value: Optional[float] = None
-    name = "Constant"
+    __slots__ = ("fixed_value",)
+    default_name = "Constant"
 
-    def update(self, subject, context):
+    def __init__(self):
+        super().__init__()
+        self.fixed_value: Optional[float] = None
+
+    def fix_value(self):
+        "Choose the constant value, if it wasn't already"
         if self.fixed_value is None:
             self.fixed_value = round(random() * 2 - 1, 3)
             self.value = self.fixed_value
 
+    def update(self, subject, context):
+        self.fix_value()
+
 class SinusoidNeuron(InputNeuron):
     "Corresponds to a value based on the time, following a sinusoid"
-    name = "Sinusoid"
+    __slots__ = ()
+    default_name = "Sinusoid"
 
     def update(self, subject, context):
         self.value = math.sin((subject.birth - context.time) * 0.05)
 
 class AgeNeuron(InputNeuron):
     "Corresponds to the creature's age in seconds"
-    name = "Age"
+    __slots__ = ()
+    default_name = "Age"
 
     def update(self, subject, context):
         self.value = sigmoid((context.time - subject.birth) * 0.01)
@@ -1,16 +1,20 @@
 from copy import deepcopy
+from hashlib import blake2b
 from random import choice, randint, random
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+from weakref import WeakValueDictionary
 
-from networkx.exception import NetworkXError
+import numpy as np
 
 from . import actions, inputs
 from .abc import ActionNeuron, InputNeuron, TransitionNeuron
 from .graph import NeuralNetworkGraph
+from .structure import NetworkStructure
 
 if TYPE_CHECKING:
     from context_manager import ContextManager
     from creature import Creature
+    from execution import ExecutionBackend
 
 INPUT_NEURONS = [
     inputs.XPositionInputNeuron(),
@@ -39,6 +43,68 @@ ACTION_NEURONS = [
 
 AnyNeuron = Union[InputNeuron, TransitionNeuron]
 
+# (neuron class name, neuron name, constant value if any)
+NeuronGenome = tuple[str, str, Optional[float]]
+# (origin neuron, weight, destination neuron)
+WireGenome = tuple[NeuronGenome, float, NeuronGenome]
+
+# structures used by at least one network, by hash of their description
+STRUCTURES: "WeakValueDictionary[str, NetworkStructure]" = WeakValueDictionary()
+
+NEURON_TYPES: dict[str, type[AnyNeuron]] = {
+    neuron_type.__name__: neuron_type
+    for neuron_type in [TransitionNeuron] + [type(n) for n in INPUT_NEURONS + ACTION_NEURONS]
+}
+
+
+def neuron_to_genome(neuron: AnyNeuron) -> NeuronGenome:
+    "Describe a neuron using basic types only"
+    constant = neuron.fixed_value if isinstance(neuron, inputs.ConstantNeuron) else None
+    return (type(neuron).__name__, neuron.name, constant)
+
+def neuron_from_genome(genome: NeuronGenome) -> AnyNeuron:
+    "Create a new neuron from its description"
+    type_name, name, constant = genome
+    neuron = NEURON_TYPES[type_name]()
+    neuron.name = name
+    if constant is not None and isinstance(neuron, inputs.ConstantNeuron):
+        neuron.fixed_value = constant
+        neuron.value = constant
+    return neuron
+
+
+def wires_from_genome(genome: Iterable[WireGenome]) -> list[tuple[AnyNeuron, float, TransitionNeuron]]:
+    "Create new neurons and wires from a network description"
+    neurons: dict[str, AnyNeuron] = {}
+    wires: list[tuple[AnyNeuron, float, TransitionNeuron]] = []
+    for origin, weight, destination in genome:
+        for neuron_genome in (origin, destination):
+            if neuron_genome[1] not in neurons:
+                neurons[neuron_genome[1]] = neuron_from_genome(neuron_genome)
+        wires.append((neurons[origin[1]], weight, neurons[destination[1]]))  # type: ignore
+    return wires
+
+def wires_to_genome(wires: Iterable[tuple[AnyNeuron, float, TransitionNeuron]]) -> list[WireGenome]:
+    """Describe wires using basic types only
+    Constant neurons which never got a value get it now, so it becomes part of the description"""
+    genome: list[WireGenome] = []
+    for origin, weight, destination in wires:
+        if isinstance(origin, inputs.ConstantNeuron):
+            origin.fix_value()
+        genome.append((neuron_to_genome(origin), weight, neuron_to_genome(destination)))
+    return genome
+
+def get_structure(description: Iterable[WireGenome]) -> NetworkStructure:
+    "Find the interned structure matching a network description, or create it"
+    genome = tuple(
+        (tuple(origin), weight, tuple(destination)) for origin, weight, destination in description
+    )
+    key = blake2b(repr(genome).encode(), digest_size=16).hexdigest()
+    structure = STRUCTURES.get(key)
+    if structure is None:
+        structure = NetworkStructure(key, genome, wires_from_genome(genome))
+        STRUCTURES[key] = structure
+    return structure
 
 def merge_wires(set_1, set_2):
     "Merge 2 sets of wires, and remove any duplicated connection"
@@ -65,10 +131,12 @@ class NeuralNetworkGenerationAgent:
             max(len(parent1.wires), len(parent2.wires))
         )
 
-        new_network.graph = NeuralNetworkGraph()
         new_network.wires.clear()
-        # get a list of unique connections from both parents
-        wires_pool = merge_wires(parent1.wires, parent2.wires)
+        # get a list of unique connections from both parents, using new neurons as
+        # the ones of the parents structures are shared and must not be modified
+        wires_pool = merge_wires(
+            wires_from_genome(parent1.to_genome()), wires_from_genome(parent2.to_genome())
+        )
         if new_network.connections_number > len(wires_pool):
             new_network.connections_number = len(wires_pool)
 
@@ -97,7 +165,6 @@ class NeuralNetworkGenerationAgent:
     def __init__(self, connections: int, max_hidden_neurons: int):
         self.connections_number = connections
 
-        self.graph = NeuralNetworkGraph()
         self.wires: list[tuple[AnyNeuron, float, TransitionNeuron]] = []
         self.hidden_neurons = [
             TransitionNeuron() for _ in range(max_hidden_neurons)
@@ -137,24 +204,26 @@ class NeuralNetworkGenerationAgent:
 
     def cleanup_wires(self):
         "Remove useless wires"
-        to_remove: set[AnyNeuron] = set()
+        to_remove: dict[AnyNeuron, None] = {}
+        # neurons names wired from and to each neuron name
+        successors: dict[str, list[str]] = {}
+        predecessors: dict[str, list[str]] = {}
+        for origin, _, destination in self.wires:
+            successors.setdefault(origin.name, []).append(destination.name)
+            predecessors.setdefault(destination.name, []).append(origin.name)
         # remove any transition neuron with no predecessor or successor
         for neuron in self.transition_neurons:
             should_remove = True
-            if len(list(self.graph.successors(neuron))) > 0:
-                for pred in self.graph.predecessors(neuron):
+            if len(successors.get(neuron.name, [])) > 0:
+                for pred in predecessors.get(neuron.name, []):
                     if pred != neuron.name:
                         should_remove = False
             if should_remove:
-                to_remove.add(neuron)
+                to_remove[neuron] = None
         # remove any output parent with no predecessor
         for neuron in self.output_neurons:
-            try:
-                preds = list(self.graph.predecessors(neuron))
-            except NetworkXError as err:
-                raise err
-            if len(preds) == 0:
-                to_remove.add(neuron)
+            if len(predecessors.get(neuron.name, [])) == 0:
+                to_remove[neuron] = None
         # Rename constant neurons
         for i, neuron in enumerate(self.input_neurons):
             if isinstance(neuron, inputs.ConstantNeuron):
@@ -171,7 +240,7 @@ class NeuralNetworkGenerationAgent:
         ]
         if len(moving_neurons) == 0 and len(self.output_neurons) > 0:
             random_neuron = choice(self.output_neurons)
-            to_remove.add(random_neuron)
+            to_remove[random_neuron] = None
             self.remove_neuron(random_neuron)
 
         if len(to_remove) > 0:
@@ -189,14 +258,10 @@ class NeuralNetworkGenerationAgent:
         # avoid duplications
         if self.check_connecion_exists(origin, direction):
             return
-        self.graph.add_neuron(origin)
-        self.graph.add_neuron(direction)
-        self.graph.add_wire(origin, direction, weight)
         self.wires.append((origin, weight, direction))
 
     def remove_neuron(self, neuron: AnyNeuron):
         "Remove a neuron from the network"
-        self.graph.remove_neuron(neuron)
         self.wires = [
             wire for wire in self.wires if neuron not in wire
         ]
@@ -214,126 +279,159 @@ class NeuralNetworkGenerationAgent:
     @property
     def transition_neurons(self):
         "List of transition (hidden) neurons"
-        result: set[TransitionNeuron] = set()
+        # a dict rather than a set, so the order (and thus seeded runs) never depends on object ids
+        result: dict[TransitionNeuron, None] = {}
         for neuron1, _, neuron2 in self.wires:
             for neuron in (neuron1, neuron2):
                 if isinstance(neuron, TransitionNeuron) and not isinstance(neuron, ActionNeuron):
-                    result.add(neuron)
+                    result[neuron] = None
         return list(result)
 
 
 class NeuralNetwork:
-    "Network of neurons (yes seriously)"
+    """Network of neurons (yes seriously)
+    Its wiring is an interned NetworkStructure, shared with every network wired the same way,
+    and the network only keeps the values of its neurons, and which of them were just updated"""
+
+    __slots__ = ("structure", "values", "active")
 
     @classmethod
     def from_parents(cls, parent1: "NeuralNetwork", parent2: "NeuralNetwork"):
         "Merge two neural networks to create a new one"
-        new_element = cls(0, 0)
-        new_element.graph = NeuralNetworkGraph()
-        new_element.wires.clear()
+        return cls.from_structure(get_structure(
+            wires_to_genome(NeuralNetworkGenerationAgent.merge(parent1, parent2))
+        ))
 
-        wires = NeuralNetworkGenerationAgent.merge(parent1, parent2)
-        for wire in wires:
-            new_element.add_wire(*wire)
+    @classmethod
+    def from_genome(cls, genome: list[WireGenome]):
+        "Rebuild a neural network from its description"
+        return cls.from_structure(get_structure(genome))
 
-        new_element.last_updated = set(new_element.input_neurons)
-        return new_element
+    @classmethod
+    def from_structure(cls, structure: NetworkStructure):
+        "Create a new network (with fresh neurons values) using a given structure"
+        network = cls.__new__(cls)
+        network.set_structure(structure)
+        return network
 
     def __init__(self, connections: int, max_hidden_neurons: int):
-        self.graph = NeuralNetworkGraph()
-        self.wires: list[tuple[AnyNeuron, float, TransitionNeuron]] = []
-
         agent = NeuralNetworkGenerationAgent(connections, max_hidden_neurons)
-        wires = agent.generate()
-        for wire in wires:
-            self.add_wire(*wire)
+        self.set_structure(get_structure(wires_to_genome(agent.generate())))
 
-        self.last_updated: set[AnyNeuron] = set(self.input_neurons)
+    def set_structure(self, structure: NetworkStructure):
+        "Use a structure, and reset the neurons values"
+        self.structure = structure
+        self.values = structure.initial_values.copy()
+        # neurons updated since the last tick, starting with the inputs
+        self.active = structure.input_mask.copy()
 
-    def add_wire(self, origin: AnyNeuron, weight: float, direction: TransitionNeuron):
-        "Add a connection between two neurons"
-        self.graph.add_neuron(origin)
-        self.graph.add_neuron(direction)
-        self.graph.add_wire(origin, direction, weight)
-        self.wires.append((origin, weight, direction))
+    def to_genome(self) -> list[WireGenome]:
+        "Describe the network wires using basic types only, to send them to another process"
+        return list(self.structure.genome)
+
+    @property
+    def wires(self) -> tuple[tuple[AnyNeuron, float, TransitionNeuron], ...]:
+        "Wires of the network, using the neurons of its structure"
+        return self.structure.wires
+
+    @property
+    def graph(self) -> NeuralNetworkGraph:
+        "Graph used to display the network (shared with the networks having the same structure)"
+        return self.structure.graph
 
     @property
     def neurons_count(self):
         "Counts every neuron"
-        return len(self.all_neurons)
+        return len(self.structure.neurons)
 
     @property
     def all_neurons(self):
         "List every neuron"
-        result: set[AnyNeuron] = set()
-        for neuron1, _, neuron2 in self.wires:
-            result.add(neuron1)
-            result.add(neuron2)
-        return list(result)
+        return self.structure.neurons
 
     @property
     def input_neurons(self):
-        "List of input neurons"
-        return [neuron for neuron, _, _ in self.wires if isinstance(neuron, InputNeuron)]
+        "List of the input neurons to compute before a tick (the ones able to change an action)"
+        return self.structure.input_neurons
 
     @property
     def output_neurons(self):
         "List of output (action) neurons"
-        return [neuron for _, _, neuron in self.wires if isinstance(neuron, ActionNeuron)]
+        return self.structure.output_neurons
 
     @property
     def transition_neurons(self):
         "List of transition (hidden) neurons"
-        result: set[TransitionNeuron] = set()
-        for neuron1, _, neuron2 in self.wires:
-            for neuron in (neuron1, neuron2):
-                if isinstance(neuron, TransitionNeuron) and not isinstance(neuron, ActionNeuron):
-                    result.add(neuron)
-        return list(result)
-
-    def connections_from(self, neuron: AnyNeuron):
-        "Return the list of connections starting from the given neuron"
-        return [wire for wire in self.wires if wire[0] == neuron]
+        return [
+            neuron for neuron in self.structure.neurons
+            if isinstance(neuron, TransitionNeuron) and not isinstance(neuron, ActionNeuron)
+        ]
 
     def has_neuron(self, neuron_type: type[AnyNeuron]):
         "Check if the network has a specific type of neuron"
-        for n1, _, n2 in self.wires:
-            for n in (n1, n2):
-                if isinstance(n, neuron_type):
-                    return True
-        return False
+        return any(issubclass(type_, neuron_type) for type_ in self.structure.neuron_types)
+
+    def get_values_by_name(self) -> dict[str, float]:
+        "Get the current value of every neuron, by neuron name"
+        return dict(zip(self.structure.names, self.values.tolist()))
 
     def get_action_value(self, name: str) -> Optional[float]:
         "Get the value of an action neuron by its name"
-        matching = [neuron for neuron in self.output_neurons if neuron.name == name]
-        if len(matching) == 0:
+        index = self.structure.names.get(name)
+        if index is None or not isinstance(self.structure.neurons[index], ActionNeuron):
             return None
-        return matching[0].value
+        return float(self.values[index])
 
     def update_input(self, subject: "Creature", context: "ContextManager"):
         "Update the input neurons with the creature data"
-        for neuron in self.input_neurons:
+        for neuron in self.structure.input_neurons:
             neuron.update(subject, context)
-        self.last_updated |= set(self.input_neurons)
+            self.values[self.structure.indexes[neuron]] = neuron.value
+        self.active |= self.structure.input_mask
+
+    def set_inputs(self, values: list[tuple[InputNeuron, float]]):
+        "Update the input neurons with values computed beforehand (see sensors.compute_sensors)"
+        indexes = self.structure.indexes
+        for neuron, value in values:
+            self.values[indexes[neuron]] = value
+        self.active |= self.structure.input_mask
 
     def act(self, subject: "Creature"):
         "Trigger every action"
-        for neuron in self.output_neurons:
-            neuron.act(subject)
+        self.structure.act(subject, self.values)
 
     def tick(self):
         "Update every neuron"
-        to_update: dict[TransitionNeuron,
-                        tuple[list[AnyNeuron], list[float]]] = {}
-        for neuron in self.last_updated:
-            for _, weight, destination in self.connections_from(neuron):
-                if destination in to_update:
-                    to_update[destination][0].append(neuron)
-                    to_update[destination][1].append(weight)
-                else:
-                    to_update[destination] = ([neuron], [weight])
-        # update values
-        for neuron, data in to_update.items():
-            neuron.update_value(*data)
-        # set for next update
-        self.last_updated = set(to_update.keys())
+        values, active = self.structure.tick(self.values[None, :], self.active[None, :])
+        self.values, self.active = values[0], active[0]
+
+
+def tick_batch(batch: tuple[int, NetworkStructure, np.ndarray, np.ndarray]) -> tuple[int, np.ndarray, np.ndarray]:
+    "Tick a batch of networks sharing a structure, returning the batch index with the new values"
+    index, structure, values, active = batch
+    return (index, *structure.tick(values, active))
+
+def tick_networks(networks: list[NeuralNetwork], backend: Optional["ExecutionBackend"] = None):
+    """Tick several networks at once, the ones sharing a structure being updated as a single batch
+    Batches go through the backend only if it shares memory: structures are immutable so batches
+    can run concurrently, but a process pool would have to pickle every structure at each tick
+    (about 900 KB for 200 creatures, 10 times slower than the tick itself)"""
+    groups: dict[NetworkStructure, list[NeuralNetwork]] = {}
+    for network in networks:
+        groups.setdefault(network.structure, []).append(network)
+    batches = [
+        (
+            index, structure,
+            np.array([network.values for network in group]),
+            np.array([network.active for network in group])
+        )
+        for index, (structure, group) in enumerate(groups.items())
+    ]
+    if backend is None or not backend.shares_memory:
+        results = map(tick_batch, batches)
+    else:
+        results = backend.map(tick_batch, batches)
+    group_list = list(groups.values())
+    for index, values, active in results:
+        for network, network_values, network_active in zip(group_list[index], values, active):
+            network.values, network.active = network_values, network_active
@@ -0,0 +1,183 @@
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from .. import config
+from ..utils import get_attribute_array, get_positions
+from . import inputs
+from .abc import InputNeuron
+
+if TYPE_CHECKING:
+    from context_manager import ContextManager
+    from creature import Creature
+
+# a function computing the value of one input type for a batch of creatures
+BatchSensor = Callable[[list["Creature"], "ContextManager"], np.ndarray]
+
+# number of creatures handled at once when computing pairwise distances
+LIGHT_CHUNK_SIZE = 1024
+
+
+def sigmoid_array(values: np.ndarray) -> np.ndarray:
+    "Same as abc.sigmoid, for a whole array (2 / (1 + exp(-x)) - 1 is tanh(x / 2))"
+    return np.tanh(values / 2)
+
+
+def sense_x_position(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of XPositionInputNeuron"
+    return sigmoid_array(get_positions(creatures)[0] * 0.003)
+
+def sense_y_position(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of YPositionInputNeuron"
+    return sigmoid_array(get_positions(creatures)[1] * 0.003)
+
+def sense_energy(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of EnergyInputNeuron"
+    return sigmoid_array(
+        get_attribute_array(creatures, "energy") / get_attribute_array(creatures, "max_energy")
+    )
+
+def sense_digesting(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of DigestingInputNeuron"
+    return sigmoid_array(
+        get_attribute_array(creatures, "digesting")
+        / get_attribute_array(creatures, "max_digesting")
+    )
+
+def sense_speed(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of SpeedInputNeuron"
+    return sigmoid_array(get_attribute_array(creatures, "velocity") * 50)
+
+def sense_life(creatures: list["Creature"], _context: "ContextManager"):
+    "Batch version of LifeInputNeuron"
+    return get_attribute_array(creatures, "life") / get_attribute_array(creatures, "max_life")
+
+def sense_sinusoid(creatures: list["Creature"], context: "ContextManager"):
+    "Batch version of SinusoidNeuron"
+    return np.sin((get_attribute_array(creatures, "birth") - context.time) * 0.05)
+
+def sense_age(creatures: list["Creature"], context: "ContextManager"):
+    "Batch version of AgeNeuron"
+    return sigmoid_array((context.time - get_attribute_array(creatures, "birth")) * 0.01)
+
+def sense_light(creatures: list["Creature"], context: "ContextManager"):
+    """Batch version of LightInputNeuron, see ContextManager.get_light_level_for_creature
+    Distances to every light emitter are computed by chunks of creatures"""
+    emitters = [creature for creature in context.creatures.values() if creature.light_emission > 0.0]
+    levels = np.zeros(len(creatures))
+    if not emitters:
+        return sigmoid_array(levels)
+    emitters_x, emitters_y = get_positions(emitters)
+    emitters_light = get_attribute_array(emitters, "light_emission")
+    emitters_ids = np.fromiter((e.creature_id for e in emitters), np.int64, len(emitters))
+    subjects_x, subjects_y = get_positions(creatures)
+    subjects_ids = np.fromiter((c.creature_id for c in creatures), np.int64, len(creatures))
+    for start in range(0, len(creatures), LIGHT_CHUNK_SIZE):
+        chunk = slice(start, start + LIGHT_CHUNK_SIZE)
+        delta_x = np.abs(emitters_x[None, :] - subjects_x[chunk, None]) % config.WORLD_WIDTH
+        delta_y = np.abs(emitters_y[None, :] - subjects_y[chunk, None]) % config.WORLD_HEIGHT
+        distances = np.sqrt(delta_x ** 2 + delta_y ** 2)
+        lighted = (distances < emitters_light) & (emitters_ids[None, :] != subjects_ids[chunk, None])
+        levels[chunk] = np.where(lighted, emitters_light - distances, 0.0).sum(axis=1)
+    return sigmoid_array(levels * 0.02)
+
+def sense_food_distance(creatures: list["Creature"], context: "ContextManager"):
+    """Batch version of FoodDistanceInputNeuron, see ContextManager.find_closest_entity
+    Every (creature, grid cell) pair in vision range is expanded into (creature, food) pairs
+    using a CSR index of the food grid, then filtered by vision angle and distance"""
+    cell_size = context.grid_cell_size
+    grid_width, grid_height = context.grid_size
+    # CSR index of the food points: foods of cell i are order[starts[i]:starts[i + 1]]
+    foods = [
+        (food.position.x, food.position.y, cell_x * grid_height + cell_y)
+        for (cell_x, cell_y), food_list in context.foods_grid.items()
+        for food in food_list
+    ]
+    foods_array = np.array(foods, dtype=np.float64).reshape(-1, 3)
+    foods_x, foods_y = foods_array[:, 0], foods_array[:, 1]
+    foods_cells = foods_array[:, 2].astype(np.int64)
+    order = np.argsort(foods_cells, kind="stable")
+    starts = np.searchsorted(foods_cells[order], np.arange(grid_width * grid_height + 1))
+
+    positions_x, positions_y = get_positions(creatures)
+    directions_x = np.fromiter((c.direction.x for c in creatures), np.float64, len(creatures))
+    directions_y = np.fromiter((c.direction.y for c in creatures), np.float64, len(creatures))
+    vision_distances = get_attribute_array(creatures, "vision_distance")
+    vision_angles = get_attribute_array(creatures, "vision_angle")
+
+    # every (creature, cell) pair
+    left = np.floor((positions_x - vision_distances) / cell_size).astype(np.int64)
+    top = np.floor((positions_y - vision_distances) / cell_size).astype(np.int64)
+    columns = np.floor((positions_x + vision_distances) / cell_size).astype(np.int64) - left + 1
+    rows = np.floor((positions_y + vision_distances) / cell_size).astype(np.int64) - top + 1
+    cells_counts = columns * rows
+    pair_creatures = np.repeat(np.arange(len(creatures)), cells_counts)
+    offsets = np.arange(len(pair_creatures)) - np.repeat(np.cumsum(cells_counts) - cells_counts, cells_counts)
+    cells_x = (left[pair_creatures] + offsets // rows[pair_creatures]) % grid_width
+    cells_y = (top[pair_creatures] + offsets % rows[pair_creatures]) % grid_height
+    cells = cells_x * grid_height + cells_y
+
+    # every (creature, food) pair
+    foods_counts = starts[cells + 1] - starts[cells]
+    candidates = np.repeat(pair_creatures, foods_counts)
+    offsets = np.arange(len(candidates)) - np.repeat(np.cumsum(foods_counts) - foods_counts, foods_counts)
+    candidate_foods = order[np.repeat(starts[cells], foods_counts) + offsets]
+
+    # vision angle (same as Vector2.angle_to, so not normalized) and toroidal distance
+    to_food_x = foods_x[candidate_foods] - positions_x[candidates]
+    to_food_y = foods_y[candidate_foods] - positions_y[candidates]
+    angles = np.degrees(
+        np.arctan2(to_food_y, to_food_x)
+        - np.arctan2(directions_y[candidates], directions_x[candidates])
+    )
+    delta_x = np.abs(to_food_x) % config.WORLD_WIDTH
+    delta_y = np.abs(to_food_y) % config.WORLD_HEIGHT
+    distances = np.sqrt(delta_x ** 2 + delta_y ** 2)
+    visible = (
+        (np.abs(angles) <= vision_angles[candidates] / 2)
+        & (distances <= vision_distances[candidates])
+    )
+    closest = np.full(len(creatures), np.inf)
+    np.minimum.at(closest, candidates[visible], distances[visible])
+    return np.where(closest < vision_distances, 1 - closest / vision_distances, -1.0)
+
+
+# input types computed for every creature at once, other ones use InputNeuron.update
+BATCH_SENSORS: dict[type[InputNeuron], BatchSensor] = {
+    inputs.XPositionInputNeuron: sense_x_position,
+    inputs.YPositionInputNeuron: sense_y_position,
+    inputs.EnergyInputNeuron: sense_energy,
+    inputs.DigestingInputNeuron: sense_digesting,
+    inputs.SpeedInputNeuron: sense_speed,
+    inputs.LifeInputNeuron: sense_life,
+    inputs.LightInputNeuron: sense_light,
+    inputs.FoodDistanceInputNeuron: sense_food_distance,
+    inputs.SinusoidNeuron: sense_sinusoid,
+    inputs.AgeNeuron: sense_age,
+}
+
+
+def compute_sensors(creatures: list["Creature"],
+                    context: "ContextManager") -> list[list[tuple[InputNeuron, float]]]:
+    """Compute the value of every input neuron of the given creatures, one input type at a time
+    Only the input types used by at least one creature are computed, and the values are returned
+    per creature since neurons can be shared between networks"""
+    results: list[list[tuple[InputNeuron, float]]] = [[] for _ in creatures]
+    # input type -> (creature indexes, neurons)
+    used_inputs: dict[type[InputNeuron], tuple[list[int], list[InputNeuron]]] = {}
+    for index, creature in enumerate(creatures):
+        for neuron in dict.fromkeys(creature.network.input_neurons):
+            indexes, neurons = used_inputs.setdefault(type(neuron), ([], []))
+            indexes.append(index)
+            neurons.append(neuron)
+    for neuron_type, (indexes, neurons) in used_inputs.items():
+        sensor = BATCH_SENSORS.get(neuron_type)
+        if sensor is None:
+            for index, neuron in zip(indexes, neurons):
+                neuron.update(creatures[index], context)
+                results[index].append((neuron, neuron.value))
+            continue
+        values = sensor([creatures[index] for index in indexes], context)
+        for index, neuron, value in zip(indexes, neurons, values.tolist()):
+            results[index].append((neuron, value))
+    return results
@@ -0,0 +1,144 @@
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from .abc import ActionNeuron, InputNeuron, TransitionNeuron
+from .graph import NeuralNetworkGraph
+from .inputs import ConstantNeuron
+
+if TYPE_CHECKING:
+    from creature import Creature
+
+AnyNeuron = Union[InputNeuron, TransitionNeuron]
+Wire = tuple[AnyNeuron, float, TransitionNeuron]
+
+
+def get_live_neurons(wires: list[Wire]) -> set[AnyNeuron]:
+    """Find the neurons which can change the actions of a network: the ones reachable from an input
+    neuron (others are never updated) and from which an action neuron is reachable"""
+    successors: dict[AnyNeuron, list[AnyNeuron]] = {}
+    predecessors: dict[AnyNeuron, list[AnyNeuron]] = {}
+    for origin, _, destination in wires:
+        successors.setdefault(origin, []).append(destination)
+        predecessors.setdefault(destination, []).append(origin)
+
+    def reach(starts: set[AnyNeuron], edges: dict[AnyNeuron, list[AnyNeuron]]) -> set[AnyNeuron]:
+        reached, stack = set(starts), list(starts)
+        while stack:
+            for neuron in edges.get(stack.pop(), []):
+                if neuron not in reached:
+                    reached.add(neuron)
+                    stack.append(neuron)
+        return reached
+
+    neurons = set(successors) | set(predecessors)
+    fed = reach({neuron for neuron in neurons if isinstance(neuron, InputNeuron)}, successors)
+    useful = reach({neuron for neuron in neurons if isinstance(neuron, ActionNeuron)}, predecessors)
+    return fed & useful
+
+
+class NetworkStructure:
+    """Neurons, wires and weights of a network, shared by every network wired the same way
+    Structures are immutable: networks keep their neurons values in their own arrays, and the
+    neurons objects of the structure are only prototypes used to compute inputs and run actions
+
+    Wires are compiled once for the ticks: wires which cannot change any action are removed,
+    and the wires coming from constant neurons are replaced by a bias of their destination,
+    added whenever the inputs were given (inputs are always given all together)
+    Only the input neurons still used after that have to be computed
+    Neurons only fed by constants are not folded any further: they are updated one tick after the
+    inputs, so their wires already are the cheapest way to carry that delay"""
+
+    __slots__ = (
+        "key", "genome", "neurons", "wires", "indexes", "names", "input_neurons", "output_neurons",
+        "input_mask", "initial_values", "sources", "destinations", "weights", "biases",
+        "biased", "inputs_gate", "neuron_types", "_destinations_matrix", "_graph", "__weakref__",
+    )
+
+    def __init__(self, key: str, genome: tuple, wires: list[tuple[AnyNeuron, float, TransitionNeuron]]):
+        self.key = key
+        self.genome = genome
+        self.wires = tuple(wires)
+        self.neurons: list[AnyNeuron] = list(dict.fromkeys(
+            neuron for origin, _, destination in wires for neuron in (origin, destination)
+        ))
+        self.indexes: dict[AnyNeuron, int] = {neuron: i for i, neuron in enumerate(self.neurons)}
+        self.names: dict[str, int] = {neuron.name: i for i, neuron in enumerate(self.neurons)}
+        self.output_neurons = [neuron for neuron in self.neurons if isinstance(neuron, ActionNeuron)]
+        self.neuron_types = frozenset(type(neuron) for neuron in self.neurons)
+        self.input_mask = np.array(
+            [isinstance(neuron, InputNeuron) for neuron in self.neurons], dtype=bool
+        )
+        self.initial_values = np.array([neuron.value for neuron in self.neurons], dtype=np.float64)
+
+        live_neurons = get_live_neurons(wires)
+        live_wires = [
+            wire for wire in wires if wire[0] in live_neurons and wire[2] in live_neurons
+        ]
+        self.biases = np.zeros(len(self.neurons))
+        for origin, weight, destination in live_wires:
+            if isinstance(origin, ConstantNeuron):
+                self.biases[self.indexes[destination]] += origin.value * weight
+        self.biased = np.zeros(len(self.neurons), dtype=bool)
+        self.biased[[
+            self.indexes[destination] for origin, _, destination in live_wires
+            if isinstance(origin, ConstantNeuron)
+        ]] = True
+        # every input has the same active state, so any of them tells if the biases are added
+        self.inputs_gate = int(np.argmax(self.input_mask)) if self.input_mask.any() else None
+        live_wires = [wire for wire in live_wires if not isinstance(wire[0], ConstantNeuron)]
+        # inputs to compute before each tick
+        self.input_neurons = list(dict.fromkeys(
+            origin for origin, _, _ in live_wires if isinstance(origin, InputNeuron)
+        ))
+        self.sources = np.array([self.indexes[origin] for origin, _, _ in live_wires], dtype=np.int64)
+        self.destinations = np.array(
+            [self.indexes[destination] for _, _, destination in live_wires], dtype=np.int64
+        )
+        self.weights = np.array([weight for _, weight, _ in live_wires], dtype=np.float64)
+        self._destinations_matrix: Optional[np.ndarray] = None
+        self._graph: Optional[NeuralNetworkGraph] = None
+
+    @property
+    def destinations_matrix(self) -> np.ndarray:
+        "Matrix summing the values carried by each wire into its destination neuron"
+        if self._destinations_matrix is None:
+            matrix = np.zeros((len(self.weights), len(self.neurons)))
+            matrix[np.arange(len(self.weights)), self.destinations] = 1.0
+            self._destinations_matrix = matrix
+        return self._destinations_matrix
+
+    @property
+    def graph(self) -> NeuralNetworkGraph:
+        "Graph used to display the network, created on first use"
+        if self._graph is None:
+            self._graph = NeuralNetworkGraph()
+            for origin, weight, destination in self.wires:
+                self._graph.add_neuron(origin)
+                self._graph.add_neuron(destination)
+                self._graph.add_wire(origin, destination, weight)
+        return self._graph
+
+    def tick(self, values: np.ndarray, active: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Propagate the values of the neurons updated at the previous tick (or given as inputs)
+        through their wires, for a batch of networks (one per row) using this structure
+        Each neuron reached by an updated neuron takes the sigmoid of the sum of what it receives,
+        other neurons keep their value, and only the reached neurons are propagated at the next tick"""
+        if len(self.weights) == 0 and not self.biased.any():
+            return values, np.zeros_like(active)
+        carried = active[:, self.sources]
+        received = (values[:, self.sources] * self.weights * carried) @ self.destinations_matrix
+        updated = (carried @ self.destinations_matrix) > 0
+        if self.inputs_gate is not None:
+            # wires from constant neurons, carried whenever the inputs are active
+            gated = active[:, self.inputs_gate, None] & self.biased
+            received += gated * self.biases
+            updated |= gated
+        # same as abc.sigmoid, 2 / (1 + exp(-x)) - 1 being tanh(x / 2)
+        return np.where(updated, np.tanh(received / 2), values), updated
+
+    def act(self, subject: "Creature", values: np.ndarray):
+        "Trigger every action of a network using this structure"
+        for neuron in self.output_neurons:
+            neuron.value = float(values[self.indexes[neuron]])
+            neuron.act(subject)
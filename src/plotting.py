@@ -0,0 +1,31 @@
+from functools import lru_cache
+from types import ModuleType
+
+
+@lru_cache(maxsize=None)
+def get_pyplot() -> ModuleType:
+    """Import pyplot with the non-interactive Agg backend and the game style, on first use only
+    (matplotlib takes a noticeable part of the startup time, and most runs never draw a chart)"""
+    # pylint: disable=import-outside-toplevel
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams.update({  # type: ignore
+        # "lines.marker": "o",       # available ('o', 'v', '^', '<', '>', '8', 's', 'p', '*', 'h', 'H', 'D', 'd', 'P', 'X')
+        # "lines.linewidth": "1.8",
+        # "axes.prop_cycle": plt.cycler('color', ['white']),  # line color
+        # "text.color": "white",     # no text in this example
+        # "axes.facecolor": "black",   # background of the figure
+        # "axes.edgecolor": "lightgray",
+        "axes.labelcolor": "white",  # no labels in this example
+        # "axes.titlecolor": "red",
+        # "axes.grid": "True",
+        # "grid.linestyle": "--",      # {'-', '--', '-.', ':', '', (offset, on-off-seq), ...}
+        "xtick.color": "white",
+        "ytick.color": "white",
+        # "grid.color": "lightgray",
+        "figure.facecolor": "black", # color surrounding the plot
+        # "figure.edgecolor": "black",
+    })
+    return plt
@@ -0,0 +1,237 @@
+import argparse
+import os
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+import numpy as np
+
+from . import config
+from .background import BackgroundWorker
+
+if TYPE_CHECKING:
+    from context_manager import ContextManager
+
+# creature attribute -> column type, for every exported trait and state value
+CREATURE_COLUMNS: dict[str, str] = {
+    "creature_id": "<i8",
+    "generation": "<i4",
+    "birth": "<f8",
+    "size": "<i4",
+    "max_life": "<i4",
+    "life_regen_cost": "<i4",
+    "digestion_efficiency": "<f4",
+    "digestion_speed": "<f4",
+    "vision_distance": "<i4",
+    "vision_angle": "<i4",
+    "max_damage": "<i4",
+    "max_energy": "<i4",
+    "max_digesting": "<i4",
+    "life": "<f4",
+    "energy": "<f4",
+    "digesting": "<f4",
+    "velocity": "<f4",
+    "acceleration": "<f4",
+    "light_emission": "<f4",
+}
+# values computed from the creature instead of read from an attribute
+COMPUTED_COLUMNS: dict[str, tuple[str, Callable]] = {
+    "x": ("<f4", lambda creature: creature.position.x),
+    "y": ("<f4", lambda creature: creature.position.y),
+    "connections": ("<i4", lambda creature: len(creature.network.wires)),
+    "is_killer": ("u1", lambda creature: creature.has_attack_neuron()),
+}
+# one row per snapshot, the creatures of snapshot i being rows
+# creatures_start[i]:creatures_start[i] + creatures_count[i] of the creatures columns of its chunk
+SNAPSHOT_COLUMNS: dict[str, str] = {
+    "time": "<f8",
+    "creatures_start": "<i8",
+    "creatures_count": "<i8",
+    "foods_count": "<i8",
+    "foods_total": "<f8",
+}
+CHUNK_NAME = "chunk_{:06d}"
+
+
+def capture_population(context: "ContextManager") -> tuple[dict[str, float], dict[str, np.ndarray]]:
+    "Gather the snapshot values and the creatures columns of the current state of a simulation"
+    creatures = list(context.creatures.values())
+    columns = {
+        name: np.fromiter((getattr(c, name) for c in creatures), dtype, len(creatures))
+        for name, dtype in CREATURE_COLUMNS.items()
+    }
+    for name, (dtype, compute) in COMPUTED_COLUMNS.items():
+        columns[name] = np.fromiter(map(compute, creatures), dtype, len(creatures))
+    snapshot = {
+        "time": context.time,
+        "creatures_count": len(creatures),
+        "foods_count": sum(len(foods) for foods in context.foods_grid.values()),
+        "foods_total": sum(
+            food.quantity for foods in context.foods_grid.values() for food in foods
+        ),
+    }
+    return snapshot, columns
+
+def write_chunk(path: str, snapshots: list[dict[str, float]], creatures: list[dict[str, np.ndarray]]):
+    """Write a chunk of snapshots as one .npy file per column
+    The chunk is written in a temporary directory first, so readers never see a partial chunk"""
+    temporary_path = f"{path}.tmp"
+    os.makedirs(os.path.join(temporary_path, "creatures"), exist_ok=True)
+    os.makedirs(os.path.join(temporary_path, "snapshots"), exist_ok=True)
+    counts = np.array([snapshot["creatures_count"] for snapshot in snapshots], dtype=np.int64)
+    snapshot_values = {
+        "creatures_start": np.cumsum(counts) - counts,
+        "creatures_count": counts,
+    }
+    for name, dtype in SNAPSHOT_COLUMNS.items():
+        values = snapshot_values.get(name)
+        if values is None:
+            values = np.array([snapshot[name] for snapshot in snapshots], dtype=dtype)
+        np.save(os.path.join(temporary_path, "snapshots", f"{name}.npy"), values.astype(dtype))
+    for name in creatures[0]:
+        np.save(
+            os.path.join(temporary_path, "creatures", f"{name}.npy"),
+            np.concatenate([columns[name] for columns in creatures])
+        )
+    os.replace(temporary_path, path)
+
+
+class PopulationExporter:
+    """Save the whole population at regular intervals for offline analysis
+    Snapshots are gathered in memory, then written by chunks of columnar files in a background thread"""
+
+    def __init__(self, directory: str, chunk_size: Optional[int] = None):
+        self.directory = directory
+        self.chunk_size = chunk_size or config.POPULATION_EXPORT_CHUNK_SIZE
+        os.makedirs(directory, exist_ok=True)
+        # continue after the chunks of a previous run in the same directory
+        self.chunk_index = len(get_chunks_paths(directory))
+        self.snapshots: list[dict[str, float]] = []
+        self.creatures: list[dict[str, np.ndarray]] = []
+        self.worker = BackgroundWorker("population-exporter")
+
+    def capture(self, context: "ContextManager"):
+        "Add the current state of a simulation to the current chunk"
+        snapshot, columns = capture_population(context)
+        self.snapshots.append(snapshot)
+        self.creatures.append(columns)
+        if len(self.snapshots) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        "Send the current chunk to the writer thread"
+        if not self.snapshots:
+            return
+        path = os.path.join(self.directory, CHUNK_NAME.format(self.chunk_index))
+        snapshots, creatures = self.snapshots, self.creatures
+        self.worker.submit(lambda: write_chunk(path, snapshots, creatures))
+        self.chunk_index += 1
+        self.snapshots, self.creatures = [], []
+
+    def close(self):
+        "Write the last chunk and wait for every chunk to be written"
+        self.flush()
+        self.worker.close()
+
+
+def get_chunks_paths(directory: str) -> list[str]:
+    "List the complete chunks of an export, in order"
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith("chunk_") and not name.endswith(".tmp")
+    )
+
+
+class PopulationArchive:
+    """Read the snapshots exported by PopulationExporter
+    Creatures columns are memory-mapped, so only the parts actually used are read from the disk"""
+
+    def __init__(self, directory: str):
+        self.chunks_paths = get_chunks_paths(directory)
+        self.snapshots: dict[str, np.ndarray] = {}
+        # chunk index of each snapshot
+        self.snapshots_chunks = np.zeros(0, dtype=np.int64)
+        chunks_snapshots = [
+            {name: np.load(os.path.join(path, "snapshots", f"{name}.npy")) for name in SNAPSHOT_COLUMNS}
+            for path in self.chunks_paths
+        ]
+        if chunks_snapshots:
+            self.snapshots = {
+                name: np.concatenate([chunk[name] for chunk in chunks_snapshots])
+                for name in SNAPSHOT_COLUMNS
+            }
+            self.snapshots_chunks = np.repeat(
+                np.arange(len(chunks_snapshots)),
+                [len(chunk["time"]) for chunk in chunks_snapshots]
+            )
+
+    def __len__(self):
+        return len(self.snapshots_chunks)
+
+    @property
+    def times(self) -> np.ndarray:
+        "Simulation time of every snapshot"
+        return self.snapshots.get("time", np.zeros(0))
+
+    @property
+    def columns(self) -> list[str]:
+        "Name of every creatures column"
+        if not self.chunks_paths:
+            return []
+        return sorted(
+            name[:-len(".npy")]
+            for name in os.listdir(os.path.join(self.chunks_paths[0], "creatures"))
+        )
+
+    def load_column(self, chunk_index: int, name: str) -> np.ndarray:
+        "Memory-map a creatures column of a chunk"
+        return np.load(
+            os.path.join(self.chunks_paths[chunk_index], "creatures", f"{name}.npy"), mmap_mode="r"
+        )
+
+    def creatures_at(self, index: int, names: Optional[list[str]] = None) -> dict[str, np.ndarray]:
+        "Get the creatures columns (all of them by default) of a snapshot"
+        chunk_index = int(self.snapshots_chunks[index])
+        start = int(self.snapshots["creatures_start"][index])
+        end = start + int(self.snapshots["creatures_count"][index])
+        return {
+            name: self.load_column(chunk_index, name)[start:end]
+            for name in names or self.columns
+        }
+
+    def iter_chunks(self, name: str) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        "Iterate over the chunks of a creatures column, with the creatures start and count of their snapshots"
+        for chunk_index in range(len(self.chunks_paths)):
+            in_chunk = self.snapshots_chunks == chunk_index
+            yield (
+                self.load_column(chunk_index, name),
+                self.snapshots["creatures_start"][in_chunk],
+                self.snapshots["creatures_count"][in_chunk],
+            )
+
+    def trait_mean(self, name: str) -> np.ndarray:
+        "Average value of a creatures column in every snapshot (NaN for empty populations), chunk by chunk"
+        means: list[np.ndarray] = []
+        for values, starts, counts in self.iter_chunks(name):
+            sums = np.zeros(len(starts))
+            not_empty = counts > 0
+            if not_empty.any():
+                sums[not_empty] = np.add.reduceat(
+                    values.astype(np.float64), starts[not_empty]
+                )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means.append(sums / counts)
+        return np.concatenate(means) if means else np.zeros(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the population snapshots of a run")
+    parser.add_argument("directory", help="directory of the exported snapshots")
+    parser.add_argument("--columns", nargs="*", default=None, help="creatures columns to summarize")
+    args = parser.parse_args()
+    archive = PopulationArchive(args.directory)
+    if len(archive) == 0:
+        parser.exit(1, "No snapshot found\n")
+    print(f"{len(archive)} snapshots from {archive.times[0]:.1f}s to {archive.times[-1]:.1f}s")
+    print(f"{'column':>22} {'first':>12} {'last':>12}")
+    for column in args.columns or archive.columns:
+        trait_means = archive.trait_mean(column)
+        print(f"{column:>22} {trait_means[0]:>12.3f} {trait_means[-1]:>12.3f}")
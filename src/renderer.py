@@ -0,0 +1,134 @@
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from pygame import Color, Rect, Vector2
+from pygame.surface import Surface
+
+from . import config
+from .camera import Camera
+from .dirty_rects import DirtyRectsTracker
+from .drawing import FOOD_COLOR, draw_creature, draw_light, draw_square
+
+if TYPE_CHECKING:
+    from context_manager import ContextManager
+
+
+class WorldSnapshot:
+    """Renderable state of a simulation at a given time, stored as NumPy arrays
+    Colors are packed as 0xRRGGBB integers, and angles are in degrees
+    Fields missing from older recordings (damage, velocity, vision) default to zeros"""
+
+    def __init__(self, timestamp: float, creatures: dict[str, np.ndarray], foods: dict[str, np.ndarray]):
+        self.time = timestamp
+        self.creature_ids = creatures["id"]
+        count = len(self.creature_ids)
+        self.creature_x = creatures["x"]
+        self.creature_y = creatures["y"]
+        self.creature_angles = creatures["angle"]
+        self.creature_lives = creatures["life"]
+        self.creature_lights = creatures["light"]
+        self.creature_damages = creatures.get("damage", np.zeros(count, np.float32))
+        self.creature_velocities = creatures.get("velocity", np.zeros(count, np.float32))
+        self.creature_sizes = creatures["size"]
+        self.creature_colors = creatures["color"]
+        self.creature_vision_distances = creatures.get("vision_distance", np.zeros(count, np.int32))
+        self.creature_vision_angles = creatures.get("vision_angle", np.zeros(count, np.int32))
+        self.food_x = foods["x"]
+        self.food_y = foods["y"]
+        self.food_sizes = foods["size"]
+
+    @property
+    def creatures_count(self):
+        "Number of creatures alive"
+        return len(self.creature_ids)
+
+
+def pack_color(color: Color) -> int:
+    "Convert a color into a 0xRRGGBB integer"
+    return (color.r << 16) | (color.g << 8) | color.b
+
+def unpack_color(value: int) -> Color:
+    "Convert a 0xRRGGBB integer into a color"
+    return Color((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+def snapshot_from_context(context: "ContextManager") -> WorldSnapshot:
+    "Extract the renderable state of a simulation, creatures being sorted by id"
+    creatures = sorted(context.creatures.values(), key=lambda creature: creature.creature_id)
+    count = len(creatures)
+    foods = [food for food_list in context.foods_grid.values() for food in food_list]
+    return WorldSnapshot(
+        context.time,
+        {
+            "id": np.fromiter((c.creature_id for c in creatures), np.int32, count),
+            "x": np.fromiter((c.position.x for c in creatures), np.float32, count),
+            "y": np.fromiter((c.position.y for c in creatures), np.float32, count),
+            "angle": np.fromiter((c.direction.as_polar()[1] for c in creatures), np.float32, count),
+            "life": np.fromiter(
+                (max(0.0, c.life / c.max_life) for c in creatures), np.float32, count
+            ),
+            "light": np.fromiter((c.light_emission for c in creatures), np.float32, count),
+            "damage": np.fromiter((c.damage_opacity for c in creatures), np.float32, count),
+            "velocity": np.fromiter((c.velocity for c in creatures), np.float32, count),
+            "size": np.fromiter((c.size for c in creatures), np.int32, count),
+            "color": np.fromiter((pack_color(c.color) for c in creatures), np.int32, count),
+            "vision_distance": np.fromiter((c.vision_distance for c in creatures), np.int32, count),
+            "vision_angle": np.fromiter((c.vision_angle for c in creatures), np.int32, count),
+        },
+        {
+            "x": np.fromiter((food.position.x for food in foods), np.float32, len(foods)),
+            "y": np.fromiter((food.position.y for food in foods), np.float32, len(foods)),
+            "size": np.fromiter((food.size for food in foods), np.int32, len(foods)),
+        }
+    )
+
+
+def _in_area(x: np.ndarray, y: np.ndarray, area: Rect) -> np.ndarray:
+    "Mask of the points located inside a world region"
+    return (x >= area.left) & (x < area.right) & (y >= area.top) & (y < area.bottom)
+
+def draw_snapshot(surface: Surface, camera: Camera, snapshot: WorldSnapshot,
+                  dirty_rects: DirtyRectsTracker, selected_id: Optional[int] = None):
+    """Draw the visible part of a snapshot (lights, creatures and food)
+    Unlike the live rendering, culling is done with NumPy masks since there is no grid to use"""
+    viewport = camera.viewport
+    # lights
+    lights_area = viewport.inflate(
+        config.CREATURE_MAX_LIGHT_DISTANCE_EMISSION * 2,
+        config.CREATURE_MAX_LIGHT_DISTANCE_EMISSION * 2
+    )
+    mask = (snapshot.creature_lights > 0) & _in_area(
+        snapshot.creature_x, snapshot.creature_y, lights_area
+    )
+    for i in np.flatnonzero(mask):
+        position = Vector2(float(snapshot.creature_x[i]), float(snapshot.creature_y[i]))
+        drawn = draw_light(surface, camera, position, float(snapshot.creature_lights[i]))
+        if drawn:
+            dirty_rects.mark(("light", int(snapshot.creature_ids[i])), drawn)
+    # creatures
+    for i in np.flatnonzero(_in_area(snapshot.creature_x, snapshot.creature_y, viewport)):
+        creature_id = int(snapshot.creature_ids[i])
+        position = Vector2(float(snapshot.creature_x[i]), float(snapshot.creature_y[i]))
+        size = int(snapshot.creature_sizes[i])
+        rectangle = Rect(0, 0, size, size)
+        rectangle.center = (int(position.x), int(position.y))
+        damage = float(snapshot.creature_damages[i])
+        drawn = draw_creature(
+            surface, camera, position, rectangle, unpack_color(int(snapshot.creature_colors[i])),
+            Vector2(1, 0).rotate(float(snapshot.creature_angles[i])),
+            float(snapshot.creature_velocities[i]), int(snapshot.creature_vision_distances[i]),
+            int(snapshot.creature_vision_angles[i]), damage, creature_id == selected_id
+        )
+        dirty_rects.mark(
+            ("creature", creature_id), drawn, changed=creature_id == selected_id or damage > 0
+        )
+    # food
+    for i in np.flatnonzero(_in_area(snapshot.food_x, snapshot.food_y, viewport)):
+        position = Vector2(float(snapshot.food_x[i]), float(snapshot.food_y[i]))
+        size = int(snapshot.food_sizes[i])
+        rectangle = Rect(0, 0, size, size)
+        rectangle.center = (int(position.x), int(position.y))
+        dirty_rects.mark(
+            ("food", int(position.x), int(position.y)),
+            draw_square(surface, camera, position, rectangle, FOOD_COLOR)
+        )
@@ -0,0 +1,324 @@
+import argparse
+import bisect
+import json
+import pickle
+import struct
+import zlib
+from typing import IO, TYPE_CHECKING, Any, Iterator, Optional
+
+import numpy as np
+import pygame
+
+from . import config
+from .background import BackgroundWorker
+from .camera import Camera
+from .dirty_rects import DirtyRectsTracker
+from .interface import display_elapsed_time, display_fps
+from .renderer import WorldSnapshot, draw_snapshot, snapshot_from_context
+
+if TYPE_CHECKING:
+    from context_manager import ContextManager
+
+# fixed-point precision of the recorded values
+POSITION_SCALE = 8
+ANGLE_SCALE = 100
+LIFE_SCALE = 1000
+DAMAGE_SCALE = 100
+VELOCITY_SCALE = 1000
+# creature fields changing at every step, stored as deltas
+VARYING_FIELDS = ("x", "y", "angle", "life", "light", "damage", "velocity")
+# creature fields which never change, only stored at birth and in keyframes
+CONSTANT_FIELDS = ("size", "color", "vision_distance", "vision_angle")
+
+# size in bytes of each compressed frame
+FRAME_HEADER = struct.Struct("<I")
+
+
+def quantize_creatures(snapshot: WorldSnapshot) -> dict[str, np.ndarray]:
+    "Convert the creatures of a snapshot into integers, so deltas can be computed without drifting"
+    return {
+        "id": snapshot.creature_ids.astype(np.int32),
+        "x": np.round(snapshot.creature_x * POSITION_SCALE).astype(np.int32),
+        "y": np.round(snapshot.creature_y * POSITION_SCALE).astype(np.int32),
+        "angle": np.round(np.mod(snapshot.creature_angles, 360) * ANGLE_SCALE).astype(np.int32),
+        "life": np.round(snapshot.creature_lives * LIFE_SCALE).astype(np.int32),
+        "light": np.round(snapshot.creature_lights).astype(np.int32),
+        "damage": np.round(snapshot.creature_damages * DAMAGE_SCALE).astype(np.int32),
+        "velocity": np.round(snapshot.creature_velocities * VELOCITY_SCALE).astype(np.int32),
+        "size": snapshot.creature_sizes.astype(np.int32),
+        "color": snapshot.creature_colors.astype(np.int32),
+        "vision_distance": snapshot.creature_vision_distances.astype(np.int32),
+        "vision_angle": snapshot.creature_vision_angles.astype(np.int32),
+    }
+
+def dequantize_creatures(creatures: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Convert quantized creatures back into snapshot arrays
+    Fields missing from older recordings are left out, the snapshot using default values"""
+    values = {
+        "id": creatures["id"],
+        "x": creatures["x"].astype(np.float32) / POSITION_SCALE,
+        "y": creatures["y"].astype(np.float32) / POSITION_SCALE,
+        "angle": creatures["angle"].astype(np.float32) / ANGLE_SCALE,
+        "life": creatures["life"].astype(np.float32) / LIFE_SCALE,
+        "light": creatures["light"].astype(np.float32),
+        "size": creatures["size"],
+        "color": creatures["color"],
+    }
+    if "damage" in creatures:
+        values["damage"] = creatures["damage"].astype(np.float32) / DAMAGE_SCALE
+        values["velocity"] = creatures["velocity"].astype(np.float32) / VELOCITY_SCALE
+        values["vision_distance"] = creatures["vision_distance"]
+        values["vision_angle"] = creatures["vision_angle"]
+    return values
+
+def get_food_keys(snapshot: WorldSnapshot) -> np.ndarray:
+    "Pack the position and size of each food point into a single sorted integer"
+    x = np.round(snapshot.food_x).astype(np.int64)
+    y = np.round(snapshot.food_y).astype(np.int64)
+    return np.unique((x << 40) | (y << 20) | snapshot.food_sizes.astype(np.int64))
+
+def foods_from_keys(keys: np.ndarray) -> dict[str, np.ndarray]:
+    "Unpack food points packed by get_food_keys"
+    return {
+        "x": (keys >> 40).astype(np.float32),
+        "y": ((keys >> 20) & 0xFFFFF).astype(np.float32),
+        "size": (keys & 0xFFFFF).astype(np.int32),
+    }
+
+
+def encode_creatures_delta(previous: dict[str, np.ndarray],
+                           current: dict[str, np.ndarray]) -> dict[str, Any]:
+    "Describe the changes between two quantized states (both sorted by id)"
+    born_mask = ~np.isin(current["id"], previous["id"], assume_unique=True)
+    survivors_mask = np.isin(previous["id"], current["id"], assume_unique=True)
+    deltas: dict[str, np.ndarray] = {}
+    for field in VARYING_FIELDS:
+        delta = current[field][~born_mask] - previous[field][survivors_mask]
+        # most deltas are tiny, so use smaller integers when possible
+        if delta.size == 0 or np.abs(delta).max() < 2**15:
+            delta = delta.astype(np.int16)
+        deltas[field] = delta
+    return {
+        "dead": previous["id"][~survivors_mask],
+        "born": {field: values[born_mask] for field, values in current.items()},
+        "deltas": deltas,
+    }
+
+def decode_creatures_delta(previous: dict[str, np.ndarray],
+                           delta: dict[str, Any]) -> dict[str, np.ndarray]:
+    "Apply the changes computed by encode_creatures_delta"
+    survivors_mask = ~np.isin(previous["id"], delta["dead"], assume_unique=True)
+    current: dict[str, np.ndarray] = {}
+    for field, values in previous.items():
+        survivors = values[survivors_mask]
+        if field in delta["deltas"]:
+            survivors = survivors + delta["deltas"][field].astype(np.int32)
+        current[field] = np.concatenate([survivors, delta["born"][field]])
+    order = np.argsort(current["id"], kind="stable")
+    return {field: values[order] for field, values in current.items()}
+
+
+class ReplayRecorder:
+    """Record the state of a simulation at each step, to replay it later without simulating it
+    Every few steps a full state (keyframe) is saved, other steps only store the changes"""
+
+    def __init__(self, path: str, keyframe_interval: Optional[int] = None):
+        self.path = path
+        self.keyframe_interval = keyframe_interval or config.REPLAY_KEYFRAME_INTERVAL
+        self.file = open(path, "wb")  # pylint: disable=consider-using-with
+        self.worker = BackgroundWorker("replay-writer")
+        # tick, time and file offset of each keyframe
+        self.keyframes: list[tuple[int, float, int]] = []
+        self.tick = 0
+        self.previous_creatures: Optional[dict[str, np.ndarray]] = None
+        self.previous_foods: Optional[np.ndarray] = None
+
+    def capture(self, context: "ContextManager"):
+        "Record the current state of a simulation"
+        snapshot = snapshot_from_context(context)
+        creatures = quantize_creatures(snapshot)
+        foods = get_food_keys(snapshot)
+        frame: dict[str, Any] = {"tick": self.tick, "time": snapshot.time}
+        if (
+            self.previous_creatures is None
+            or self.previous_foods is None
+            or self.tick % self.keyframe_interval == 0
+        ):
+            frame.update(keyframe=True, creatures=creatures, foods=foods)
+        else:
+            frame.update(
+                keyframe=False,
+                creatures=encode_creatures_delta(self.previous_creatures, creatures),
+                foods_removed=np.setdiff1d(self.previous_foods, foods, assume_unique=True),
+                foods_added=np.setdiff1d(foods, self.previous_foods, assume_unique=True),
+            )
+        self.previous_creatures = creatures
+        self.previous_foods = foods
+        self.tick += 1
+        # compression and writing are done in the background
+        self.worker.submit(lambda: self._write(frame))
+
+    def _write(self, frame: dict[str, Any]):
+        data = zlib.compress(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL))
+        if frame["keyframe"]:
+            self.keyframes.append((frame["tick"], frame["time"], self.file.tell()))
+        self.file.write(FRAME_HEADER.pack(len(data)))
+        self.file.write(data)
+
+    def close(self):
+        "Write every remaining frame, then save the keyframes index next to the recording"
+        self.worker.submit(self.file.close)
+        self.worker.close()
+        with open(f"{self.path}.index", "w", encoding="utf-8") as file:
+            json.dump(self.keyframes, file)
+
+
+class ReplayReader:
+    "Decode a recording made by ReplayRecorder"
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(f"{path}.index", encoding="utf-8") as file:
+                self.keyframes: list[tuple[int, float, int]] = [tuple(k) for k in json.load(file)]  # type: ignore
+        except FileNotFoundError:
+            # the recording was not properly closed, so rebuild the index
+            self.keyframes = self._scan_keyframes()
+        self.keyframes_ticks = [tick for tick, _, _ in self.keyframes]
+
+    @staticmethod
+    def _read_frames(file: IO[bytes]) -> Iterator[tuple[int, dict[str, Any]]]:
+        "Decode frames one after the other, with their offset in the file"
+        while True:
+            offset = file.tell()
+            header = file.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            (size,) = FRAME_HEADER.unpack(header)
+            data = file.read(size)
+            if len(data) < size:
+                return
+            yield offset, pickle.loads(zlib.decompress(data))
+
+    def _scan_keyframes(self):
+        with open(self.path, "rb") as file:
+            return [
+                (frame["tick"], frame["time"], offset)
+                for offset, frame in self._read_frames(file)
+                if frame["keyframe"]
+            ]
+
+    def keyframe_before(self, tick: int) -> int:
+        "Tick of the last keyframe before (or at) a given tick"
+        index = bisect.bisect_right(self.keyframes_ticks, tick) - 1
+        return self.keyframes_ticks[max(0, index)] if self.keyframes_ticks else 0
+
+    def keyframe_after(self, tick: int) -> Optional[int]:
+        "Tick of the first keyframe strictly after a given tick, if any"
+        index = bisect.bisect_right(self.keyframes_ticks, tick)
+        return self.keyframes_ticks[index] if index < len(self.keyframes_ticks) else None
+
+    def frames(self, start_tick: int = 0) -> Iterator[tuple[int, WorldSnapshot]]:
+        "Iterate over the recorded states, starting from a given tick"
+        if not self.keyframes:
+            return
+        index = max(0, bisect.bisect_right(self.keyframes_ticks, start_tick) - 1)
+        offset = self.keyframes[index][2]
+        creatures: Optional[dict[str, np.ndarray]] = None
+        foods: Optional[np.ndarray] = None
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            for _, frame in self._read_frames(file):
+                if frame["keyframe"]:
+                    creatures, foods = frame["creatures"], frame["foods"]
+                elif creatures is not None and foods is not None:
+                    creatures = decode_creatures_delta(creatures, frame["creatures"])
+                    foods = np.union1d(
+                        np.setdiff1d(foods, frame["foods_removed"], assume_unique=True),
+                        frame["foods_added"]
+                    )
+                if creatures is None or foods is None or frame["tick"] < start_tick:
+                    continue
+                yield frame["tick"], WorldSnapshot(
+                    frame["time"], dequantize_creatures(creatures), foods_from_keys(foods)
+                )
+
+
+# pylint: disable=too-many-branches
+def play(path: str, start_tick: int = 0):
+    "Open a window playing a recording, without running any simulation logic"
+    reader = ReplayReader(path)
+    pygame.init()
+    clock = pygame.time.Clock()
+    pygame.display.set_caption('Evolution Game - Replay')
+    window_surface = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+    font = pygame.font.SysFont("Arial", 14)
+    camera = Camera(window_surface.get_size())
+    dirty_rects = DirtyRectsTracker(window_surface.get_size())
+
+    frames = reader.frames(start_tick)
+    tick = start_tick
+    snapshot: Optional[WorldSnapshot] = None
+    is_pause = False
+    speed = 1
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.WINDOWEXPOSED:
+                dirty_rects.invalidate()
+            if event.type == pygame.KEYDOWN:
+                if event.key in {pygame.K_p, pygame.K_SPACE}:
+                    is_pause = not is_pause
+                if event.key == pygame.K_LEFT:
+                    frames = reader.frames(reader.keyframe_before(max(0, tick - 1)))
+                    snapshot = None
+                if event.key == pygame.K_RIGHT:
+                    if (next_tick := reader.keyframe_after(tick)) is not None:
+                        frames = reader.frames(next_tick)
+                        snapshot = None
+                if event.key in {pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS}:
+                    speed = min(speed * 2, config.FAST_FORWARD_MAX_STEPS)
+                if event.key in {pygame.K_MINUS, pygame.K_KP_MINUS}:
+                    speed = max(1, speed // 2)
+                if event.key == pygame.K_HOME:
+                    camera.reset()
+                    dirty_rects.invalidate()
+            if event.type == pygame.MOUSEWHEEL:
+                camera.zoom_at(1.15 ** event.y, pygame.Vector2(pygame.mouse.get_pos()))
+                dirty_rects.invalidate()
+            if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                camera.pan(-event.rel[0], -event.rel[1])
+                dirty_rects.invalidate()
+
+        if not is_pause or snapshot is None:
+            for _ in range(speed):
+                try:
+                    tick, snapshot = next(frames)
+                except StopIteration:
+                    is_pause = True
+                    break
+
+        window_surface.fill((0, 0, 0))
+        if snapshot is not None:
+            draw_snapshot(window_surface, camera, snapshot, dirty_rects)
+            dirty_rects.mark(
+                "time", display_elapsed_time(window_surface, font, snapshot.time), changed=True
+            )
+        dirty_rects.mark("fps", display_fps(window_surface, font, clock), changed=True)
+
+        update_rects = dirty_rects.get_update_rects()
+        if update_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(update_rects)
+        clock.tick(config.FPS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a recorded simulation")
+    parser.add_argument("path", help="recording file, as set in REPLAY_PATH")
+    parser.add_argument("--start", type=int, default=0, help="simulation step to start from")
+    args = parser.parse_args()
+    play(args.path, args.start)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, TypedDict
+
+from . import config
+from .creature import CreatureGenome
+from .headless import HeadlessWorld
+from .utils import get_config_values
+
+SOURCE_DIRECTORY = Path(__file__).parent
+
+
+class RunResult(TypedDict, total=False):
+    "Outputs of a headless run"
+    stats: dict[str, float]
+    series: list[dict[str, float]]
+    genomes: list[CreatureGenome]
+
+
+@lru_cache(maxsize=1)
+def get_source_fingerprint() -> str:
+    "Hash every source file of the simulation, so results from a different code are never reused"
+    digest = hashlib.sha256()
+    for path in sorted(SOURCE_DIRECTORY.rglob("*.py")):
+        digest.update(path.relative_to(SOURCE_DIRECTORY).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def get_run_key(seed: int, ticks: int, **options: Any) -> str:
+    "Compute the cache key of a run from the whole effective config, its parameters and the source code"
+    description = {
+        "config": get_config_values(),
+        "seed": seed,
+        "ticks": ticks,
+        "options": options,
+        "source": get_source_fingerprint(),
+    }
+    encoded = json.dumps(description, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class RunCache:
+    "Store run results on disk, keyed by their content hash, with a maximum total size"
+
+    def __init__(self, directory: Optional[str] = None, max_size: Optional[int] = None):
+        self.directory = Path(directory or config.RUN_CACHE_DIRECTORY)
+        self.max_size = config.RUN_CACHE_MAX_SIZE if max_size is None else max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str):
+        return self.directory / f"{key}.pickle"
+
+    def get(self, key: str) -> Optional[RunResult]:
+        "Return the cached result of a run, if any"
+        path = self._path(key)
+        try:
+            with path.open("rb") as file:
+                result = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # mark the entry as recently used, so it's evicted last
+        os.utime(path)
+        return result
+
+    def put(self, key: str, result: RunResult):
+        "Save the result of a run, then evict the oldest entries if the cache is too big"
+        path = self._path(key)
+        # write in a temporary file first, as several processes may use the cache at once
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with temporary_path.open("wb") as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+        self.evict()
+
+    def evict(self):
+        "Remove the least recently used entries until the cache fits in its maximum size"
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+
+def run_headless(seed: int, ticks: int, record_interval: Optional[int] = None,
+                 with_genomes: bool = False) -> RunResult:
+    "Run a headless world and gather its outputs"
+    world = HeadlessWorld(seed)
+    world.run(ticks, record_interval=record_interval)
+    result: RunResult = {"stats": world.get_stats(), "series": world.history}
+    if with_genomes:
+        result["genomes"] = [creature.to_genome() for creature in world.context.creatures.values()]
+    world.context.close()
+    return result
+
+def cached_run_headless(seed: int, ticks: int, record_interval: Optional[int] = None,
+                        with_genomes: bool = False, cache: Optional[RunCache] = None) -> RunResult:
+    "Same as run_headless, but reuse the result of an identical previous run if available"
+    if cache is None:
+        if not config.RUN_CACHE_ENABLED:
+            return run_headless(seed, ticks, record_interval, with_genomes)
+        cache = RunCache()
+    key = get_run_key(seed, ticks, record_interval=record_interval, with_genomes=with_genomes)
+    if (result := cache.get(key)) is not None:
+        return result
+    result = run_headless(seed, ticks, record_interval, with_genomes)
+    cache.put(key, result)
+    return result
@@ -0,0 +1,58 @@
+import heapq
+from itertools import count
+from typing import Callable, Optional
+
+
+class ScheduledEvent:
+    "An action to run at a given simulation time, possibly repeated at a fixed interval"
+
+    def __init__(self, name: str, callback: Callable[[], None], timestamp: float,
+                 interval: Optional[float] = None):
+        self.name = name
+        self.callback = callback
+        self.timestamp = timestamp
+        self.interval = interval
+        self.cancelled = False
+
+
+class SimulationScheduler:
+    """Run actions based on the simulation time instead of the wall-clock time
+    Events due at the same time are run in the order they were scheduled"""
+
+    def __init__(self):
+        self.queue: list[tuple[float, int, ScheduledEvent]] = []
+        self._counter = count()
+
+    def _push(self, event: ScheduledEvent):
+        heapq.heappush(self.queue, (event.timestamp, next(self._counter), event))
+
+    def schedule_once(self, name: str, callback: Callable[[], None], timestamp: float):
+        "Run an action once, when the simulation reaches the given time (in seconds)"
+        event = ScheduledEvent(name, callback, timestamp)
+        self._push(event)
+        return event
+
+    def schedule_periodic(self, name: str, callback: Callable[[], None], interval: float,
+                          start: float = 0.0):
+        "Run an action every interval seconds of simulation time, starting at start + interval"
+        if interval <= 0:
+            raise ValueError("The interval of a periodic event must be positive")
+        event = ScheduledEvent(name, callback, start + interval, interval)
+        self._push(event)
+        return event
+
+    def cancel(self, event: ScheduledEvent):
+        "Prevent an event from running again"
+        event.cancelled = True
+
+    def run_until(self, timestamp: float):
+        """Run every event due before or at the given simulation time
+        A periodic event is run as many times as its interval fits in the elapsed time"""
+        while self.queue and self.queue[0][0] <= timestamp:
+            _, _, event = heapq.heappop(self.queue)
+            if event.cancelled:
+                continue
+            if event.interval is not None:
+                event.timestamp += event.interval
+                self._push(event)
+            event.callback()
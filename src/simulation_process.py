@@ -0,0 +1,375 @@
+import queue
+import time
+from multiprocessing import Process, Queue
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+
+import numpy as np
+import pygame
+
+from . import config
+from .camera import Camera
+from .charts import ChartsManager, get_chart_values
+from .context_manager import ContextManager
+from .creatures_panel import PanelsManager, get_creature_texts
+from .dirty_rects import DirtyRectsTracker
+from .execution import create_backend
+from .fast_forward import FastForward
+from .interface import display_elapsed_time, display_fast_forward, display_fps
+from .neural import NeuralNetwork
+from .renderer import WorldSnapshot, draw_snapshot, pack_color, snapshot_from_context, unpack_color
+
+# renderable fields of each creature and food point, as stored in shared memory
+CREATURE_DTYPE = np.dtype([
+    ("id", np.int32), ("x", np.float32), ("y", np.float32), ("angle", np.float32),
+    ("life", np.float32), ("light", np.float32), ("damage", np.float32), ("velocity", np.float32),
+    ("size", np.int32), ("color", np.int32), ("vision_distance", np.int32), ("vision_angle", np.int32),
+])
+FOOD_DTYPE = np.dtype([("x", np.float32), ("y", np.float32), ("size", np.int32)])
+# index of the last published buffer, then the state of each of the 2 buffers
+HEADER_DTYPE = np.dtype([
+    ("latest", np.int64), ("sequences", np.int64, 2), ("ticks", np.int64, 2),
+    ("times", np.float64, 2), ("creatures_counts", np.int64, 2), ("foods_counts", np.int64, 2),
+])
+
+# number of attempts to copy a buffer while it's being overwritten
+READ_ATTEMPTS = 10
+# wall time in seconds between two messages with charts values and selected creature details
+DETAILS_INTERVAL = 0.2
+# wall time in seconds slept by the simulation while paused
+PAUSE_SLEEP = 0.02
+# maximum delay in seconds the simulation tries to catch up when it's slower than the wall time
+CATCH_UP_LIMIT = 0.25
+
+
+class SharedSnapshot:
+    """Double-buffered world snapshot in shared memory
+    The simulation writes into the back buffer and then publishes it, while the renderer copies the
+    front one. Each buffer has a sequence number, odd while being written, so a copy overlapping a
+    write (when 2 snapshots are published during a single copy) is detected and retried"""
+
+    def __init__(self, creatures_capacity: int, foods_capacity: int, name: Optional[str] = None):
+        self.creatures_capacity = creatures_capacity
+        self.foods_capacity = foods_capacity
+        buffer_size = (
+            creatures_capacity * CREATURE_DTYPE.itemsize + foods_capacity * FOOD_DTYPE.itemsize
+        )
+        if name is None:
+            self.memory = SharedMemory(create=True, size=HEADER_DTYPE.itemsize + 2 * buffer_size)
+            self.memory.buf[:HEADER_DTYPE.itemsize] = bytes(HEADER_DTYPE.itemsize)
+        else:
+            self.memory = SharedMemory(name=name)
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.memory.buf)
+        self.creatures: list[np.ndarray] = []
+        self.foods: list[np.ndarray] = []
+        offset = HEADER_DTYPE.itemsize
+        for _ in range(2):
+            self.creatures.append(np.ndarray(
+                (creatures_capacity,), CREATURE_DTYPE, buffer=self.memory.buf, offset=offset
+            ))
+            offset += creatures_capacity * CREATURE_DTYPE.itemsize
+            self.foods.append(np.ndarray(
+                (foods_capacity,), FOOD_DTYPE, buffer=self.memory.buf, offset=offset
+            ))
+            offset += foods_capacity * FOOD_DTYPE.itemsize
+
+    @property
+    def attach_arguments(self) -> tuple[int, int, str]:
+        "Arguments to give to the constructor to open the same memory from another process"
+        return self.creatures_capacity, self.foods_capacity, self.memory.name
+
+    def publish(self, snapshot: WorldSnapshot, tick: int):
+        "Write a snapshot into the back buffer, then make it the front one"
+        back = 1 - int(self.header["latest"])
+        sequences = self.header["sequences"]
+        sequences[back] += 1
+        creatures_count = min(snapshot.creatures_count, self.creatures_capacity)
+        creatures = self.creatures[back]
+        creatures["id"][:creatures_count] = snapshot.creature_ids[:creatures_count]
+        creatures["x"][:creatures_count] = snapshot.creature_x[:creatures_count]
+        creatures["y"][:creatures_count] = snapshot.creature_y[:creatures_count]
+        creatures["angle"][:creatures_count] = snapshot.creature_angles[:creatures_count]
+        creatures["life"][:creatures_count] = snapshot.creature_lives[:creatures_count]
+        creatures["light"][:creatures_count] = snapshot.creature_lights[:creatures_count]
+        creatures["damage"][:creatures_count] = snapshot.creature_damages[:creatures_count]
+        creatures["velocity"][:creatures_count] = snapshot.creature_velocities[:creatures_count]
+        creatures["size"][:creatures_count] = snapshot.creature_sizes[:creatures_count]
+        creatures["color"][:creatures_count] = snapshot.creature_colors[:creatures_count]
+        creatures["vision_distance"][:creatures_count] = (
+            snapshot.creature_vision_distances[:creatures_count]
+        )
+        creatures["vision_angle"][:creatures_count] = snapshot.creature_vision_angles[:creatures_count]
+        foods_count = min(len(snapshot.food_x), self.foods_capacity)
+        foods = self.foods[back]
+        foods["x"][:foods_count] = snapshot.food_x[:foods_count]
+        foods["y"][:foods_count] = snapshot.food_y[:foods_count]
+        foods["size"][:foods_count] = snapshot.food_sizes[:foods_count]
+        self.header["ticks"][back] = tick
+        self.header["times"][back] = snapshot.time
+        self.header["creatures_counts"][back] = creatures_count
+        self.header["foods_counts"][back] = foods_count
+        sequences[back] += 1
+        self.header["latest"] = back
+
+    def read(self) -> Optional[tuple[int, WorldSnapshot]]:
+        "Copy the front buffer, or return None if nothing was published yet"
+        for _ in range(READ_ATTEMPTS):
+            front = int(self.header["latest"])
+            sequence = int(self.header["sequences"][front])
+            if sequence == 0:
+                return None
+            if sequence % 2 == 1:
+                continue
+            creatures = self.creatures[front][:int(self.header["creatures_counts"][front])].copy()
+            foods = self.foods[front][:int(self.header["foods_counts"][front])].copy()
+            tick = int(self.header["ticks"][front])
+            timestamp = float(self.header["times"][front])
+            if int(self.header["sequences"][front]) == sequence:
+                return tick, WorldSnapshot(
+                    timestamp,
+                    {name: creatures[name] for name in CREATURE_DTYPE.names},  # type: ignore
+                    {name: foods[name] for name in FOOD_DTYPE.names},  # type: ignore
+                )
+        return None
+
+    def close(self, unlink: bool = False):
+        "Release the shared memory, and destroy it if unlink is set (by its creator only)"
+        del self.header
+        self.creatures.clear()
+        self.foods.clear()
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def get_panel_details(context: ContextManager, creature_id: int) -> Optional[dict[str, Any]]:
+    "Describe a creature for the panel of the renderer, using basic types only"
+    creature = context.creatures.get(creature_id)
+    if creature is None:
+        return None
+    return {
+        "creature_id": creature.creature_id,
+        "size": creature.size,
+        "color": pack_color(creature.color),
+        "texts": get_creature_texts(creature, context),
+        "network": creature.network.to_genome(),
+        "values": creature.network.get_values_by_name(),
+    }
+
+
+def simulation_worker(snapshot_arguments: tuple[int, int, str], commands: Queue, details: Queue):
+    """Run the simulation as fast as the chosen speed allows, publish its state after each step,
+    and execute the commands sent by the renderer"""
+    shared = SharedSnapshot(*snapshot_arguments)
+    context = ContextManager()
+    context.generate_initial_food()
+    tick = 0
+    is_pause = False
+    steps, unlimited = 1, False
+    selected_id: Optional[int] = None
+    # the simulation time is kept in sync with the wall time since the last speed change
+    anchor_wall, anchor_time = time.perf_counter(), context.time
+    last_details = 0.0
+    is_running = True
+    shared.publish(snapshot_from_context(context), tick)
+    with create_backend(list(context.creatures.values())) as backend:
+        while is_running:
+            while not commands.empty():
+                command, argument = commands.get()
+                if command == "stop":
+                    is_running = False
+                elif command == "pause":
+                    is_pause = argument
+                elif command == "speed":
+                    steps, unlimited = argument
+                elif command == "select":
+                    selected_id = argument
+                anchor_wall, anchor_time = time.perf_counter(), context.time
+            if not is_running:
+                break
+
+            if is_pause:
+                time.sleep(PAUSE_SLEEP)
+            else:
+                context.step(backend, config.SIMULATION_STEP)
+                tick += 1
+                shared.publish(snapshot_from_context(context), tick)
+
+            now = time.perf_counter()
+            if now - last_details > DETAILS_INTERVAL:
+                last_details = now
+                details.put({
+                    "time": context.time,
+                    "paused": is_pause,
+                    "charts": None if is_pause else get_chart_values(context),
+                    "panel": None if selected_id is None else get_panel_details(context, selected_id),
+                })
+
+            if not is_pause and not unlimited:
+                speed = config.GAME_SPEED * steps
+                delay = anchor_wall + (context.time - anchor_time) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -CATCH_UP_LIMIT:
+                    # too slow to keep up: don't try to catch up the lost time
+                    anchor_wall, anchor_time = time.perf_counter(), context.time
+    context.close()
+    shared.close()
+    details.cancel_join_thread()
+
+
+def detect_snapshot_selection(snapshot: WorldSnapshot, click: pygame.Vector2,
+                              margin: float = 5) -> Optional[int]:
+    "Same as detect_selection in start.py, using the arrays of a snapshot"
+    if snapshot.creatures_count == 0:
+        return None
+    distances = np.hypot(snapshot.creature_x - click.x, snapshot.creature_y - click.y)
+    distances[distances >= margin + snapshot.creature_sizes] = np.inf
+    closest = int(np.argmin(distances))
+    if np.isinf(distances[closest]):
+        return None
+    return int(snapshot.creature_ids[closest])
+
+
+# pylint: disable=too-many-branches,too-many-statements
+def run_split():
+    "Run the simulation in a separate process, and render its published state in this one"
+    shared = SharedSnapshot(
+        config.MAX_CREATURES_COUNT,
+        config.MAX_FOOD_QUANTITY + config.INITIAL_FOOD_QUANTITY * 3,
+    )
+    commands: Queue = Queue()
+    details: Queue = Queue()
+    process = Process(
+        target=simulation_worker, args=(shared.attach_arguments, commands, details)
+    )
+    process.start()
+
+    pygame.init()
+    clock = pygame.time.Clock()
+    pygame.display.set_caption('Evolution Game')
+    window_surface = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+    font = pygame.font.SysFont("Arial", 14)
+    charts = ChartsManager(window_surface)
+    panels = PanelsManager(window_surface)
+    dirty_rects = DirtyRectsTracker(window_surface.get_size())
+    camera = Camera(window_surface.get_size())
+    fast_forward = FastForward()
+
+    is_pause = False
+    show_graphs = False
+    selected_id: Optional[int] = None
+    snapshot: Optional[WorldSnapshot] = None
+    last_details: Optional[dict[str, Any]] = None
+    # networks of the selected creature, rebuilt from its genome
+    panel_network: Optional[tuple[int, NeuralNetwork]] = None
+    try:
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.WINDOWEXPOSED:
+                    dirty_rects.invalidate()
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_p:
+                        is_pause = not is_pause
+                        commands.put(("pause", is_pause))
+                    if event.key == pygame.K_g:
+                        show_graphs = not show_graphs
+                    if event.key == pygame.K_LEFT:
+                        charts.previous_graph()
+                    if event.key == pygame.K_RIGHT:
+                        charts.next_graph()
+                    if event.key == pygame.K_ESCAPE and selected_id is not None:
+                        selected_id = None
+                        commands.put(("select", None))
+                    if event.key in {pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS}:
+                        fast_forward.faster()
+                        commands.put(("speed", (fast_forward.steps, fast_forward.unlimited)))
+                    if event.key in {pygame.K_MINUS, pygame.K_KP_MINUS}:
+                        fast_forward.slower()
+                        commands.put(("speed", (fast_forward.steps, fast_forward.unlimited)))
+                    if event.key == pygame.K_u:
+                        fast_forward.toggle_unlimited()
+                        commands.put(("speed", (fast_forward.steps, fast_forward.unlimited)))
+                    if event.key == pygame.K_HOME:
+                        camera.reset()
+                        dirty_rects.invalidate()
+                if (
+                    event.type == pygame.MOUSEBUTTONUP and event.button == pygame.BUTTON_LEFT
+                    and snapshot is not None
+                ):
+                    click = camera.screen_to_world(pygame.Vector2(event.pos))
+                    selected_id = detect_snapshot_selection(snapshot, click, margin=5 / camera.zoom)
+                    commands.put(("select", selected_id))
+                if event.type == pygame.MOUSEWHEEL:
+                    camera.zoom_at(1.15 ** event.y, pygame.Vector2(pygame.mouse.get_pos()))
+                    dirty_rects.invalidate()
+                if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                    camera.pan(-event.rel[0], -event.rel[1])
+                    dirty_rects.invalidate()
+
+            pressed_keys = pygame.key.get_pressed()
+            pan_x = pressed_keys[pygame.K_d] - pressed_keys[pygame.K_a]
+            pan_y = pressed_keys[pygame.K_s] - pressed_keys[pygame.K_w]
+            if pan_x or pan_y:
+                camera.pan(pan_x * config.CAMERA_PAN_SPEED, pan_y * config.CAMERA_PAN_SPEED)
+                dirty_rects.invalidate()
+
+            # get the latest published state, and the latest details
+            if (published := shared.read()) is not None:
+                snapshot = published[1]
+            try:
+                while True:
+                    message = details.get_nowait()
+                    if message["charts"] is not None:
+                        charts.store_values(message["time"], clock.get_fps(), message["charts"])
+                    last_details = message
+            except queue.Empty:
+                pass
+
+            window_surface.fill((0, 0, 0))
+            if snapshot is not None:
+                draw_snapshot(window_surface, camera, snapshot, dirty_rects, selected_id)
+                dirty_rects.mark(
+                    "time", display_elapsed_time(window_surface, font, snapshot.time), changed=True
+                )
+            dirty_rects.mark("fps", display_fps(window_surface, font, clock), changed=True)
+            dirty_rects.mark(
+                "speed",
+                display_fast_forward(window_surface, font, fast_forward.label),
+                changed=True
+            )
+
+            panel = last_details["panel"] if last_details else None
+            if selected_id is not None and panel is not None and panel["creature_id"] == selected_id:
+                if panel_network is None or panel_network[0] != selected_id:
+                    panel_network = (selected_id, NeuralNetwork.from_genome(panel["network"]))
+                dirty_rects.mark("panel", panels.draw_panel(
+                    selected_id, panel["size"], unpack_color(panel["color"]),
+                    panel["texts"], panel_network[1].graph, panel["values"]
+                ), changed=True)
+            elif (
+                selected_id is not None and snapshot is not None
+                and selected_id not in snapshot.creature_ids
+            ):
+                # the selected creature died
+                selected_id = None
+                commands.put(("select", None))
+
+            if show_graphs:
+                dirty_rects.mark("chart", charts.draw_graph(), changed=True)
+
+            update_rects = dirty_rects.get_update_rects()
+            if update_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(update_rects)
+            clock.tick(config.FPS)
+    finally:
+        commands.put(("stop", None))
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+        pygame.quit()
+        shared.close(unlink=True)
@@ -0,0 +1,182 @@
+import argparse
+import cProfile
+import importlib
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+from typing import Iterator, Optional, Sequence
+
+
+def get_short_path(filename: str) -> str:
+    "Shorten the path of a source file, relatively to the game or to its installed package"
+    if filename == "~":
+        return "<built-in functions>"
+    if "site-packages" in filename:
+        return filename.split("site-packages" + os.sep, 1)[1]
+    if filename.startswith(os.getcwd()):
+        return os.path.relpath(filename)
+    return filename
+
+
+class TimedLoader(Loader):
+    "Wrap the loader of a module to measure how long executing it takes"
+
+    def __init__(self, loader: Loader, profiler: "StartupProfiler", name: str):
+        self.loader = loader
+        self.profiler = profiler
+        self.name = name
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType):
+        # give the module its real loader back, as some libraries inspect it
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        with self.profiler.measure_import(self.name):
+            self.loader.exec_module(module)
+
+
+class StartupProfiler(MetaPathFinder):
+    """Measure the time spent importing each module (using a hook in sys.meta_path)
+    and the time spent in each step of the world initialization"""
+
+    def __init__(self):
+        # module name -> (time including its own imports, time without them)
+        self.imports: dict[str, tuple[float, float]] = {}
+        # time spent by the imports nested in each import being measured
+        self.nested_durations: list[float] = []
+        # (step name, duration)
+        self.steps: list[tuple[str, float]] = []
+        # source file -> time spent in its functions during the initialization steps
+        self.steps_files: dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]],
+                  target: Optional[ModuleType] = None) -> Optional[ModuleSpec]:
+        "Find the module with the other finders, and wrap its loader"
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    @contextmanager
+    def measure_import(self, name: str) -> Iterator[None]:
+        "Measure the execution of a module, excluding the modules it imports from its own time"
+        self.nested_durations.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            nested = self.nested_durations.pop()
+            self.imports[name] = (duration, duration - nested)
+            if self.nested_durations:
+                self.nested_durations[-1] += duration
+
+    @contextmanager
+    def measure(self, step: str) -> Iterator[None]:
+        "Measure a step of the initialization, and the time spent in each source file during it"
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.steps.append((step, time.perf_counter() - start))
+            for (filename, _, _), (_, _, own_time, _, _) in pstats.Stats(profile).stats.items():  # type: ignore
+                name = get_short_path(filename)
+                self.steps_files[name] = self.steps_files.get(name, 0.0) + own_time
+
+    def install(self):
+        "Start measuring imports"
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        "Stop measuring imports"
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def format_report(self, top_count: int = 25) -> str:
+        "Describe the slowest modules and initialization steps"
+        packages: dict[str, float] = {}
+        for name, (_, self_duration) in self.imports.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_duration
+        lines = [f"Startup: {(time.perf_counter() - self.start) * 1000:.0f} ms", "", "Packages:"]
+        for package, duration in sorted(packages.items(), key=lambda item: -item[1])[:top_count]:
+            lines.append(f"  {duration * 1000:8.1f} ms  {package}")
+        lines += ["", "Modules (self / cumulative):"]
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1][1])[:top_count]
+        for name, (duration, self_duration) in slowest:
+            lines.append(f"  {self_duration * 1000:8.1f} / {duration * 1000:8.1f} ms  {name}")
+        lines += ["", "Initialization steps:"]
+        for step, duration in self.steps:
+            lines.append(f"  {duration * 1000:8.1f} ms  {step}")
+        lines += ["", "Initialization by file (slowed down by the profiling):"]
+        files = sorted(self.steps_files.items(), key=lambda item: -item[1])[:top_count]
+        for name, duration in files:
+            lines.append(f"  {duration * 1000:8.1f} ms  {name}")
+        return "\n".join(lines)
+
+
+def profile_startup(headless: bool) -> StartupProfiler:
+    "Import the game and create a world like the game (or a headless worker) does, without running it"
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        if headless:
+            with profiler.measure("import src.headless"):
+                headless_module = importlib.import_module("src.headless")
+            with profiler.measure("create the headless world"):
+                world = headless_module.HeadlessWorld()
+            world.context.close()
+            return profiler
+        with profiler.measure("import start"):
+            importlib.import_module("start")
+        # pylint: disable=import-outside-toplevel
+        import pygame
+
+        from . import config
+        from .charts import ChartsManager
+        from .context_manager import ContextManager
+        from .creatures_panel import PanelsManager
+        from .execution import create_backend
+        with profiler.measure("open the window"):
+            window_surface = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+        with profiler.measure("create the world"):
+            context = ContextManager()
+        with profiler.measure("generate the initial food"):
+            context.generate_initial_food()
+        with profiler.measure("create the charts and panels"):
+            ChartsManager(window_surface)
+            PanelsManager(window_surface)
+        with profiler.measure("start the execution backend"):
+            create_backend(list(context.creatures.values())).close()
+        context.close()
+        pygame.quit()
+    finally:
+        profiler.uninstall()
+    return profiler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the startup time of the game, module by module")
+    parser.add_argument("--headless", action="store_true", help="profile a headless world instead")
+    parser.add_argument("--top", type=int, default=25, help="number of modules shown")
+    args = parser.parse_args()
+    print(profile_startup(args.headless).format_report(args.top))
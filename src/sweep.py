@@ -0,0 +1,114 @@
+import argparse
+import ast
+import csv
+import itertools
+import random
+import time
+from multiprocessing import Pool
+from typing import Any, Optional, TypedDict, Union
+
+from . import config
+from .headless import POPULATION_STATS_KEYS
+from .run_cache import cached_run_headless
+from .utils import apply_config_overrides
+
+
+class SweepRun(TypedDict):
+    "A single combination of config overrides and seed to simulate"
+    run_id: int
+    seed: int
+    overrides: dict[str, Any]
+
+
+def grid_runs(parameters: dict[str, list[Any]], seeds: list[int]) -> list[SweepRun]:
+    "Create one run for each combination of the given values and seeds"
+    names = list(parameters.keys())
+    runs: list[SweepRun] = []
+    for values in itertools.product(*parameters.values()):
+        for seed in seeds:
+            runs.append({"run_id": len(runs), "seed": seed, "overrides": dict(zip(names, values))})
+    return runs
+
+def random_runs(parameters: dict[str, Union[list[Any], tuple[float, float]]], samples: int,
+                seeds: list[int], sampling_seed: Optional[int] = None) -> list[SweepRun]:
+    """Create runs from random combinations of values
+    A list means one of its values is picked, a tuple means a uniform value between its bounds"""
+    rng = random.Random(sampling_seed)
+    runs: list[SweepRun] = []
+    for _ in range(samples):
+        overrides: dict[str, Any] = {}
+        for name, values in parameters.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    overrides[name] = rng.randint(low, high)
+                else:
+                    overrides[name] = rng.uniform(low, high)
+            else:
+                overrides[name] = rng.choice(values)
+        for seed in seeds:
+            runs.append({"run_id": len(runs), "seed": seed, "overrides": overrides})
+    return runs
+
+
+def execute_run(arguments: tuple[SweepRun, int]) -> dict[str, Any]:
+    "Simulate one run in a headless world, and return its summary"
+    run, ticks = arguments
+    start = time.perf_counter()
+    apply_config_overrides(run["overrides"])
+    result = cached_run_headless(run["seed"], ticks)
+    return {
+        "run_id": run["run_id"],
+        "seed": run["seed"],
+        **run["overrides"],
+        "duration": round(time.perf_counter() - start, 3),
+        **result["stats"],
+    }
+
+
+def run_sweep(runs: list[SweepRun], ticks: int, output_path: str,
+              processes: Optional[int] = None, verbose: bool = False):
+    """Simulate every run in a pool of processes, and write each summary in a CSV file as soon as it's done
+    Each process is used for a single run, so config overrides never leak into another one"""
+    parameters_names = list(dict.fromkeys(name for run in runs for name in run["overrides"]))
+    fieldnames = ["run_id", "seed", *parameters_names, "duration", "ticks", *POPULATION_STATS_KEYS]
+    with open(output_path, "w", newline="", encoding="utf-8") as file, \
+            Pool(processes or config.PROCESSES_COUNT, maxtasksperchild=1) as pool:
+        writer = csv.DictWriter(file, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        arguments = [(run, ticks) for run in runs]
+        for i, result in enumerate(pool.imap_unordered(execute_run, arguments), start=1):
+            writer.writerow(result)
+            file.flush()
+            if verbose:
+                print(f"[{i}/{len(runs)}] run {result['run_id']} done in {result['duration']}s")
+
+
+def parse_parameter(text: str, as_range: bool) -> tuple[str, Union[list[Any], tuple[Any, Any]]]:
+    "Parse a 'NAME=1,2,3' (or 'NAME=1:3' for a range) command-line parameter"
+    name, _, values = text.partition("=")
+    if as_range and ":" in values:
+        low, high = values.split(":")
+        return name, (ast.literal_eval(low), ast.literal_eval(high))
+    return name, [ast.literal_eval(value) for value in values.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless simulations over a set of config values")
+    parser.add_argument("parameters", nargs="+",
+                        help="config values to try, like FRICTION=0.8,0.9 (or FRICTION=0.5:1.0 with --random)")
+    parser.add_argument("--random", type=int, default=None,
+                        help="number of random combinations to try, instead of the whole grid")
+    parser.add_argument("--seeds", type=int, default=1, help="number of seeds per combination")
+    parser.add_argument("--ticks", type=int, default=10000, help="simulation steps per run")
+    parser.add_argument("--processes", type=int, default=None, help="number of parallel processes")
+    parser.add_argument("--output", default="sweep_results.csv", help="CSV file to write results into")
+    args = parser.parse_args()
+
+    params = dict(parse_parameter(text, args.random is not None) for text in args.parameters)
+    seeds_list = list(range(args.seeds))
+    if args.random is None:
+        sweep_runs = grid_runs(params, seeds_list)  # type: ignore
+    else:
+        sweep_runs = random_runs(params, args.random, seeds_list)
+    run_sweep(sweep_runs, args.ticks, args.output, args.processes, verbose=True)
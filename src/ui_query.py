@@ -0,0 +1,38 @@
+from typing import TYPE_CHECKING, Optional
+
+from pygame import Rect, Vector2
+
+if TYPE_CHECKING:
+    from context_manager import ContextManager
+    from creature import Creature
+
+
+def pick_creature(context: "ContextManager", position: Vector2,
+                  margin: float = 5) -> Optional["Creature"]:
+    """Find the creature under a world position (for a click or a hover), or None
+    Only the grid cells around the position are checked, creatures being indexed by their center
+    (so creatures larger than a grid cell could be missed if clicked far from their center)"""
+    radius = margin + context.grid_cell_size
+    area = Rect(position.x - radius, position.y - radius, radius * 2, radius * 2)
+    best: Optional[tuple[float, int]] = None
+    picked: Optional["Creature"] = None
+    for creature in context.creatures_in_area(area):
+        distance = Vector2(creature.rectangle.center).distance_to(position)
+        if distance < margin + creature.size and (
+            best is None or (distance, creature.creature_id) < best
+        ):
+            best = (distance, creature.creature_id)
+            picked = creature
+    return picked
+
+def select_in_area(context: "ContextManager", area: Rect) -> list["Creature"]:
+    "Find every creature whose center is inside a world region, sorted by id"
+    area = area.copy()
+    area.normalize()
+    return sorted(
+        (
+            creature for creature in context.creatures_in_area(area)
+            if area.collidepoint(creature.rectangle.center)
+        ),
+        key=lambda creature: creature.creature_id
+    )
@@ -1,5 +1,13 @@
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
 from pygame import Vector2
 
+from . import config
+
+if TYPE_CHECKING:
+    from creature import Creature
+
 
 def sign(value: float):
     "Return the sign of a number (-1, 0, 1)"
@@ -10,3 +18,27 @@ def get_toroidal_distance(a: Vector2, b: Vector2, width: int, height: int) -> fl
     dx = abs(b.x - a.x) % width
     dy = abs(b.y - a.y) % height
     return (dx ** 2 + dy ** 2) ** 0.5
+
+def get_config_values() -> dict[str, Any]:
+    "Return every setting defined in the config module"
+    return {key: value for key, value in vars(config).items() if key.isupper()}
+
+def apply_config_overrides(overrides: dict[str, Any]):
+    "Replace some settings of the config module, making sure they exist"
+    for key, value in overrides.items():
+        if not key.isupper() or not hasattr(config, key):
+            raise KeyError(f"Unknown config setting: {key}")
+        setattr(config, key, value)
+
+def get_attribute_array(creatures: list["Creature"], attribute: str) -> np.ndarray:
+    "Gather an attribute of every creature into an array"
+    return np.fromiter(
+        (getattr(creature, attribute) for creature in creatures), np.float64, len(creatures)
+    )
+
+def get_positions(creatures: list["Creature"]) -> tuple[np.ndarray, np.ndarray]:
+    "Gather the x and y positions of every creature"
+    return (
+        np.fromiter((creature.position.x for creature in creatures), np.float64, len(creatures)),
+        np.fromiter((creature.position.y for creature in creatures), np.float64, len(creatures)),
+    )
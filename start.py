@@ -6,41 +6,26 @@ if py_version.major != 3 or py_version.minor < 10:
     print("You must use at least Python 3.10!", file=sys.stderr)
     sys.exit(1)
 
-import gc
-from multiprocessing import Pool
-from collections import defaultdict
-from typing import Optional, Iterable
+from typing import Optional
 
 import pygame
 
 from src import config
+from src.camera import Camera
 from src.charts import ChartsManager
 from src.context_manager import ContextManager
-from src.creature import Creature
 from src.creatures_panel import PanelsManager
-from src.game_events import GENERATE_FOOD, UPDATE_CREATURES_ENERGIES, events
-from src.interface import display_elapsed_time, display_fps
-from src.neural.graph import AnyNeuron
-
-if config.MEMORY_DEBUG:
-    before = defaultdict(int)
-    after = defaultdict(int)
-    before_ids: set[int] = set()
+from src.dirty_rects import DirtyRectsTracker
+from src.execution import create_backend
+from src.fast_forward import FastForward
+from src.frame_budget import SIMULATION_PHASE, FrameBudget
+from src.interface import (display_elapsed_time, display_fast_forward, display_fps,
+                           display_frame_budget, display_selection_count, display_tooltip)
+from src.simulation_process import run_split
+from src.ui_query import pick_creature, select_in_area
 
 pygame.init()
 
-def detect_selection(click: pygame.Vector2, creatures: Iterable[Creature]):
-    "Delect on which creature the user clicked"
-    potentials: list[tuple[float, int]] = []
-    for creature in creatures:
-        distance = pygame.Vector2(creature.rectangle.center).distance_to(click)
-        if distance < 5 + creature.size:
-            potentials.append((distance, creature.creature_id))
-    if potentials:
-        return sorted(potentials)[0][1]
-    return None
-
-
 # pylint: disable=too-many-branches
 def main():
     "Run everything"
@@ -56,41 +41,33 @@ def main():
     show_graphs = False
     delta_t = 0 # ms
     selected_creature_id: Optional[int] = None
+    # creatures selected with a rectangle (shift + drag), and where the rectangle started
+    group_selection: set[int] = set()
+    drag_start: Optional[pygame.Vector2] = None
     charts = ChartsManager(window_surface)
     panels = PanelsManager(window_surface)
+    dirty_rects = DirtyRectsTracker(window_surface.get_size())
+    camera = Camera(window_surface.get_size())
+    fast_forward = FastForward()
+    frame_budget = FrameBudget()
 
     # generate food
     context.generate_initial_food()
 
-    # launch events
-    for event_type, frequency in events.items():
-        pygame.time.set_timer(event_type, frequency)
-
-    if config.MEMORY_DEBUG:
-        counter  = 0
-        for i in gc.get_objects():
-            before[type(i)] += 1
-
-    with Pool(config.PROCESSES_COUNT) as pool:
+    with create_backend(list(context.creatures.values())) as backend:
         while is_running:
-            if config.MEMORY_DEBUG:
-                counter += 1 # type: ignore
-                # if counter > 3000:
-                #     print(counter)
-                #     break
-                if counter == 600:
-                    for i in gc.get_objects():
-                        if type(i) in before:
-                            before[type(i)] -= 1
-                        before_ids.add(id(i))
+            # the unlimited fast-forward mode already renders rarely
+            is_rendering = frame_budget.start_frame(adaptive=not fast_forward.unlimited)
             for event in pygame.event.get():
                 # name = pygame.event.event_name(event.type)
                 # if "Window" not in name and "MouseMotion" not in name:
                 #     print("EVENT", pygame.event.event_name(event.type))
+                if event.type == pygame.WINDOWEXPOSED:
+                    dirty_rects.invalidate()
                 if event.type == pygame.QUIT:
                     is_running = False
+                    context.close()
                     pygame.quit()
-                    pool.close()
                     return
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_p:
@@ -101,96 +78,195 @@ def main():
                         charts.previous_graph()
                     if event.key == pygame.K_RIGHT:
                         charts.next_graph()
-                    if event.key == pygame.K_ESCAPE and selected_creature_id:
+                    if event.key == pygame.K_ESCAPE:
                         selected_creature_id = None
-                if event.type == pygame.MOUSEBUTTONUP:
-                    click = pygame.Vector2(event.pos)
-                    selected_creature_id = detect_selection(click, context.creatures.values())
-                if event.type == UPDATE_CREATURES_ENERGIES and not is_pause:
-                    context.update_creatures_energies()
-                if event.type == GENERATE_FOOD and not is_pause:
-                    context.generate_food()
+                        group_selection.clear()
+                    if event.key in {pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS}:
+                        fast_forward.faster()
+                    if event.key in {pygame.K_MINUS, pygame.K_KP_MINUS}:
+                        fast_forward.slower()
+                    if event.key == pygame.K_u:
+                        fast_forward.toggle_unlimited()
+                    if event.key == pygame.K_HOME:
+                        camera.reset()
+                        dirty_rects.invalidate()
+                if (
+                    event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT
+                    and pygame.key.get_mods() & pygame.KMOD_SHIFT
+                ):
+                    drag_start = pygame.Vector2(event.pos)
+                if event.type == pygame.MOUSEBUTTONUP and event.button == pygame.BUTTON_LEFT:
+                    if drag_start is not None:
+                        corner1 = camera.screen_to_world(drag_start)
+                        corner2 = camera.screen_to_world(pygame.Vector2(event.pos))
+                        group = select_in_area(
+                            context, pygame.Rect(corner1, corner2 - corner1)
+                        )
+                        group_selection = {creature.creature_id for creature in group}
+                        selected_creature_id = group[0].creature_id if group else None
+                        drag_start = None
+                    else:
+                        picked = pick_creature(
+                            context,
+                            camera.screen_to_world(pygame.Vector2(event.pos)),
+                            margin=5 / camera.zoom
+                        )
+                        selected_creature_id = picked.creature_id if picked else None
+                        group_selection.clear()
+                if event.type == pygame.MOUSEWHEEL:
+                    camera.zoom_at(1.15 ** event.y, pygame.Vector2(pygame.mouse.get_pos()))
+                    dirty_rects.invalidate()
+                if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                    camera.pan(-event.rel[0], -event.rel[1])
+                    dirty_rects.invalidate()
+
+            # move the camera with the keyboard
+            pressed_keys = pygame.key.get_pressed()
+            pan_x = pressed_keys[pygame.K_d] - pressed_keys[pygame.K_a]
+            pan_y = pressed_keys[pygame.K_s] - pressed_keys[pygame.K_w]
+            if pan_x or pan_y:
+                camera.pan(pan_x * config.CAMERA_PAN_SPEED, pan_y * config.CAMERA_PAN_SPEED)
+                dirty_rects.invalidate()
+
+            if not is_rendering:
+                # only run the simulation, keeping the last rendered frame on the screen
+                if not is_pause:
+                    with frame_budget.measure(SIMULATION_PHASE):
+                        fast_forward.run(
+                            lambda step_delta_t: context.step(backend, step_delta_t), delta_t
+                        )
+                    charts.store_datas(clock, context)
+                frame_budget.end_frame()
+                delta_t = round(clock.tick(config.FPS) * config.GAME_SPEED)
+                continue
 
             window_surface.fill((0, 0, 0))
-
-            # draw lights
-            for entity in context.creatures.values():
-                entity.draw_light_circle(window_surface)
+            viewport = camera.viewport
+
+            # draw lights (including the ones emitted from outside the window)
+            if frame_budget.is_enabled("lights"):
+                with frame_budget.measure("lights"):
+                    lights_area = viewport.inflate(
+                        config.CREATURE_MAX_LIGHT_DISTANCE_EMISSION * 2,
+                        config.CREATURE_MAX_LIGHT_DISTANCE_EMISSION * 2
+                    )
+                    for entity in context.creatures_in_area(lights_area):
+                        dirty_rects.mark(
+                            ("light", entity.creature_id),
+                            entity.draw_light_circle(window_surface, camera)
+                        )
 
             # draw the grid
             if config.SHOW_GRID:
-                context.draw_grid(window_surface)
+                context.draw_grid(window_surface, camera)
 
 
             if not is_pause:
-                context.move_creatures(pool, delta_t)
-                context.update_creatures_grid()
-                context.time += delta_t / 1000
+                with frame_budget.measure(SIMULATION_PHASE):
+                    fast_forward.run(
+                        lambda step_delta_t: context.step(backend, step_delta_t), delta_t
+                    )
 
-            for entity in context.creatures.values():
-                if not is_pause:
-                    # make the creature eat
-                    context.detect_creature_eating(entity)
+            for entity in context.creatures_in_area(viewport):
                 # draw the creature (with special esthetic if it's selected)
                 is_selected = entity.creature_id == selected_creature_id
-                entity.draw(window_surface, is_selected=is_selected)
-
-            for generator in context.food_generators:
-                generator.draw(window_surface)
-
-            for food_list in context.foods_grid.values():
-                for food_point in food_list:
-                    food_point.draw(window_surface)
-
-            display_fps(window_surface, font, clock)
-            display_elapsed_time(window_surface, font, context.time)
+                in_group = entity.creature_id in group_selection
+                is_animated = is_selected or in_group or entity.damager.is_active
+                drawn_rectangle = entity.draw(window_surface, camera, is_selected=is_selected)
+                if in_group and not is_selected:
+                    drawn_rectangle.union_ip(entity.draw_selection_frame(window_surface, camera))
+                dirty_rects.mark(("creature", entity.creature_id), drawn_rectangle, changed=is_animated)
+
+            if frame_budget.is_enabled("food"):
+                with frame_budget.measure("food"):
+                    for generator in context.food_generators:
+                        generator.draw(window_surface, camera)
+
+                    for food_point in context.foods_in_area(viewport):
+                        dirty_rects.mark(food_point, food_point.draw(window_surface, camera))
+
+            dirty_rects.mark("fps", display_fps(window_surface, font, clock), changed=True)
+            dirty_rects.mark(
+                "time",
+                display_elapsed_time(window_surface, font, context.time),
+                changed=True
+            )
+            dirty_rects.mark(
+                "speed",
+                display_fast_forward(window_surface, font, fast_forward.label),
+                changed=True
+            )
+            dirty_rects.mark(
+                "budget",
+                display_frame_budget(window_surface, font, frame_budget.label),
+                changed=True
+            )
+
+            mouse_position = pygame.Vector2(pygame.mouse.get_pos())
+            if drag_start is not None:
+                # rectangle selection in progress
+                selection_rectangle = pygame.Rect(drag_start, mouse_position - drag_start)
+                selection_rectangle.normalize()
+                dirty_rects.mark(
+                    "drag",
+                    pygame.draw.rect(window_surface, "white", selection_rectangle, width=1),
+                    changed=True
+                )
+            elif hovered := pick_creature(
+                    context, camera.screen_to_world(mouse_position), margin=5 / camera.zoom):
+                dirty_rects.mark(
+                    "hover",
+                    display_tooltip(
+                        window_surface, font, f"Creature #{hovered.creature_id}",
+                        mouse_position + pygame.Vector2(12, 12)
+                    ),
+                    changed=True
+                )
+
+            if group_selection:
+                group_selection &= context.creatures.keys()
+            dirty_rects.mark(
+                "group",
+                display_selection_count(window_surface, font, len(group_selection)),
+                changed=True
+            )
 
             if selected_creature_id is not None:
-                if creature := next(
-                    (c
-                     for c in context.creatures.values()
-                     if c.creature_id == selected_creature_id
-                     ), None):
-                    panels.draw_creature_panel(creature, context)
+                if (creature := context.creatures.get(selected_creature_id)) is not None:
+                    if frame_budget.is_enabled("panel"):
+                        with frame_budget.measure("panel"):
+                            panel_rect = panels.draw_creature_panel(creature, context)
+                    else:
+                        # only refreshed from time to time
+                        panel_rect = panels.draw_creature_panel(
+                            creature, context, config.FRAME_BUDGET_PANEL_REFRESH_INTERVAL
+                        )
+                    dirty_rects.mark("panel", panel_rect, changed=True)
                 else:
                     selected_creature_id = None
 
-            if show_graphs:
-                charts.draw_graph()
+            if show_graphs and frame_budget.is_enabled("charts"):
+                with frame_budget.measure("charts"):
+                    dirty_rects.mark("chart", charts.draw_graph(), changed=True)
 
             if not is_pause:
                 # save datas for charts
                 charts.store_datas(clock, context)
-                # make children or smth
-                context.reproduce_creatures()
-                # and now kill everyone
-                context.attack_creatures()
-
-            pygame.display.update()
-            delta_t = round(clock.tick(config.FPS) * config.GAME_SPEED)
-
-
-def write_memory_debug(
-        before_ids_set: set[int], before_dict: dict[type, int], after_dict: dict[type, int]):
-    "Print the memory debug data"
-    filtered = []
-    after_objs = gc.get_objects()
-    for i in after_objs:
-        after_dict[type(i)] += 1 # type: ignore
-        if id(i) not in before_ids_set:
-            if type(i) in {tuple, dict, list, AnyNeuron} and "homebrew" not in str(i):
-                filtered.append((i, type(i)))
-    del before_ids_set, after_objs
-    diff = sorted(
-        ((k, after_dict[k] - before_dict[k]) # type: ignore
-        for k in after_dict # type: ignore
-        if abs(after_dict[k] - before_dict[k]) > 10 # type: ignore
-    ), key=lambda x: x[1], reverse=True)
-    print("\n".join(str(x) for x in diff))
-    print("end")
+
+            update_rects = dirty_rects.get_update_rects()
+            if update_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(update_rects)
+            frame_budget.end_frame()
+            if fast_forward.unlimited:
+                clock.tick()
+            else:
+                delta_t = round(clock.tick(config.FPS) * config.GAME_SPEED)
 
 
 if __name__ == '__main__':
-    main()
-    if config.MEMORY_DEBUG:
-        write_memory_debug(before_ids, before, after)
+    if config.SIMULATION_PROCESS_ENABLED:
+        run_split()
+    else:
+        main()
@@ -0,0 +1,45 @@
+import pytest
+
+from src import config
+from src.headless import HeadlessWorld
+
+STEPS = 300
+
+
+def get_grid_mismatches(world: HeadlessWorld) -> list[str]:
+    "Compare the creatures grid of a world with the grid built from the creatures positions"
+    context = world.context
+    expected: dict[tuple[int, int], list[int]] = {}
+    for creature in context.creatures.values():
+        expected.setdefault(context.get_grid_cell(creature.position), []).append(creature.creature_id)
+    actual = {
+        cell: [creature.creature_id for creature in creatures]
+        for cell, creatures in context.creatures_grid.items() if creatures
+    }
+    mismatches = [
+        f"cell {cell}: {sorted(actual.get(cell, []))} instead of {sorted(expected.get(cell, []))}"
+        for cell in set(expected) | set(actual)
+        # a list comparison also catches creatures listed twice in a cell
+        if sorted(actual.get(cell, [])) != sorted(expected.get(cell, []))
+    ]
+    cells = {
+        creature_id: divmod(cell, context.grid_size[1])
+        for creature_id, cell in context.creatures_cells.items()
+    }
+    if cells != {
+        creature.creature_id: context.get_grid_cell(creature.position)
+        for creature in context.creatures.values()
+    }:
+        mismatches.append("creatures_cells does not match the creatures positions")
+    return mismatches
+
+
+# 1 never rebuilds the whole grid, 0 rebuilds it whenever a creature changed of cell
+@pytest.mark.parametrize("rebuild_ratio", [1.0, 0.0])
+def test_grid_matches_positions(monkeypatch, rebuild_ratio: float):
+    monkeypatch.setattr(config, "CREATURES_GRID_REBUILD_RATIO", rebuild_ratio)
+    world = HeadlessWorld(5)
+    assert get_grid_mismatches(world) == []
+    for step in range(STEPS):
+        world.run(1)
+        assert get_grid_mismatches(world) == [], f"step {step}"
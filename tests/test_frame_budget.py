@@ -0,0 +1,93 @@
+import pytest
+
+from src import config
+from src.frame_budget import SHEDDING_ORDER, SIMULATION_PHASE, FrameBudget
+
+
+@pytest.fixture(autouse=True)
+def budget_config(monkeypatch):
+    "Change the quality at every frame, using the cost of the last frame only"
+    monkeypatch.setattr(config, "FRAME_BUDGET_ENABLED", True)
+    monkeypatch.setattr(config, "FRAME_BUDGET_ADJUST_DELAY", 0)
+    monkeypatch.setattr(config, "FRAME_BUDGET_SMOOTHING", 1.0)
+    monkeypatch.setattr(config, "FRAME_BUDGET_RESTORE_MARGIN", 0.8)
+    monkeypatch.setattr(config, "FRAME_BUDGET_RENDER_SHARE", 0.2)
+    monkeypatch.setattr(config, "FRAME_BUDGET_MAX_RENDER_INTERVAL", 8)
+
+
+def run_frame(budget: FrameBudget, costs: dict[str, float],
+              asked: tuple[str, ...] = SHEDDING_ORDER) -> list[str]:
+    """Run a frame with fake phase durations in milliseconds, the user asking for some features,
+    and return the features which were drawn"""
+    drawn = []
+    rendering = budget.start_frame()
+    budget.frame_costs = {SIMULATION_PHASE: costs.get(SIMULATION_PHASE, 0.0)}
+    if rendering:
+        for feature in asked:
+            if budget.is_enabled(feature):
+                budget.frame_costs[feature] = costs.get(feature, 0.0)
+                drawn.append(feature)
+    budget.end_frame()
+    return drawn
+
+
+def test_shedding_order():
+    budget = FrameBudget(target=10.0, policy="interactive")
+    costs = {SIMULATION_PHASE: 20.0, "lights": 3.0, "charts": 3.0, "food": 3.0, "panel": 3.0}
+    shed: list[str] = []
+    intervals = []
+    for _ in range(100):
+        drawn = run_frame(budget, costs)
+        if budget.is_rendering:
+            shed.extend(
+                feature for feature in SHEDDING_ORDER if feature not in drawn and feature not in shed
+            )
+        intervals.append(budget.render_interval)
+    assert shed == list(SHEDDING_ORDER)
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == config.FRAME_BUDGET_MAX_RENDER_INTERVAL
+    assert budget.level == budget.max_level
+
+
+def test_restore_margin():
+    budget = FrameBudget(target=10.0, policy="interactive")
+    run_frame(budget, {SIMULATION_PHASE: 4.0, "lights": 7.0})
+    assert budget.level == 1
+    # the frame would fit in the budget with the lights, but not in the restore margin
+    for _ in range(10):
+        run_frame(budget, {SIMULATION_PHASE: 2.0})
+    assert budget.level == 1
+    run_frame(budget, {SIMULATION_PHASE: 0.5})
+    assert budget.level == 0
+
+
+def test_features_not_asked_are_free():
+    costs = {SIMULATION_PHASE: 4.0, "lights": 4.0, "charts": 4.0}
+    asking = FrameBudget(target=10.0, policy="interactive")
+    not_asking = FrameBudget(target=10.0, policy="interactive")
+    for budget in (asking, not_asking):
+        # the charts cost is known, as they were displayed before
+        budget.target = 1000.0
+        run_frame(budget, costs, ("lights", "charts"))
+        budget.target = 10.0
+    for _ in range(5):
+        run_frame(asking, costs, ("lights", "charts"))
+        run_frame(not_asking, costs, ("lights",))
+    assert asking.level == 1
+    assert not_asking.level == 0
+
+
+def test_simulation_first_policy():
+    costs = {SIMULATION_PHASE: 50.0, "lights": 1.0}
+    interactive = FrameBudget(target=10.0, policy="interactive")
+    simulation_first = FrameBudget(target=10.0, policy="simulation-first")
+    assert simulation_first.budget == pytest.approx(2.0)
+    for _ in range(5):
+        run_frame(interactive, costs)
+        run_frame(simulation_first, costs)
+    assert interactive.level > 0
+    assert simulation_first.level == 0
+    # rendering alone still has to fit in its share of the frame time
+    for _ in range(5):
+        run_frame(simulation_first, {SIMULATION_PHASE: 50.0, "lights": 3.0})
+    assert simulation_first.level == 1
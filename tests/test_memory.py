@@ -0,0 +1,48 @@
+import random
+import tracemalloc
+
+from pygame import Vector2
+
+from src.creature import Creature
+from src.food import FoodPoint
+
+# maximum memory in bytes allocated by each entity, including its network for creatures
+# (about 10.8 KB per creature and 163 B per food point when this test was written)
+CREATURE_MAX_BYTES = 12_000
+FOOD_POINT_MAX_BYTES = 200
+
+CREATURES_COUNT = 1000
+FOOD_POINTS_COUNT = 10_000
+
+
+def measure_bytes_per_entity(create, count: int) -> float:
+    "Average memory allocated by each entity created by a function, the entities being kept alive"
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        entities = [create(i) for i in range(count)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    assert len(entities) == count
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / count
+
+
+def test_creature_memory():
+    random.seed(1)
+    creature = Creature(0, 0, 0.0)
+    assert not hasattr(creature, "__dict__")
+    assert not hasattr(creature.damager, "__dict__")
+    assert measure_bytes_per_entity(
+        lambda i: Creature(i, 0, 0.0), CREATURES_COUNT
+    ) < CREATURE_MAX_BYTES
+
+
+def test_food_point_memory():
+    random.seed(1)
+    food_point = FoodPoint(Vector2(10, 10), 20)
+    assert not hasattr(food_point, "__dict__")
+    assert measure_bytes_per_entity(
+        lambda i: FoodPoint(Vector2(random.randrange(1000), random.randrange(1000)), random.randint(2, 35)),
+        FOOD_POINTS_COUNT
+    ) < FOOD_POINT_MAX_BYTES
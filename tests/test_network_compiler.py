@@ -0,0 +1,98 @@
+import random
+from typing import Optional
+
+from src.execution import ExecutionBackend, ThreadBackend
+from src.neural.abc import InputNeuron, sigmoid
+from src.neural.inputs import ConstantNeuron
+from src.neural.network import NeuralNetwork, tick_networks
+
+NETWORKS_COUNT = 300
+TICKS = 20
+TOLERANCE = 1e-9
+
+
+def reference_tick(wires, values: dict, active: set) -> tuple[dict, set]:
+    "Uncompiled tick, going through every wire of the network"
+    received: dict = {}
+    for origin, weight, destination in wires:
+        if origin in active:
+            received.setdefault(destination, []).append(values[origin] * weight)
+    values = dict(values)
+    for destination, carried in received.items():
+        values[destination] = sigmoid(sum(carried))
+    return values, set(received)
+
+
+def run_against_reference(networks: list[NeuralNetwork], batched: bool,
+                          backend: Optional[ExecutionBackend] = None) -> float:
+    "Tick networks with both implementations, and return the largest difference between their actions"
+    states = []
+    for network in networks:
+        structure = network.structure
+        inputs = [neuron for neuron in structure.neurons if isinstance(neuron, InputNeuron)]
+        values = {neuron: float(value) for neuron, value in zip(structure.neurons, network.values)}
+        states.append((inputs, values, set(inputs)))
+    worst = 0.0
+    for _ in range(TICKS):
+        # inputs are not always given, so the gating of constants and the delays are checked too
+        given_inputs = random.random() < 0.7
+        for network, (inputs, values, active) in zip(networks, states):
+            if given_inputs:
+                given = {
+                    neuron: random.uniform(-1, 1) for neuron in inputs
+                    if not isinstance(neuron, ConstantNeuron)
+                }
+                values.update(given)
+                active |= set(inputs)
+                network.set_inputs([(neuron, given[neuron]) for neuron in network.input_neurons])
+        if batched:
+            tick_networks(networks, backend)
+        for i, network in enumerate(networks):
+            if not batched:
+                network.tick()
+            inputs, values, active = states[i]
+            values, active = reference_tick(network.structure.wires, values, active)
+            states[i] = (inputs, values, active)
+            for neuron in network.output_neurons:
+                index = network.structure.indexes[neuron]
+                worst = max(worst, abs(values[neuron] - float(network.values[index])))
+    return worst
+
+
+def create_networks(seed: int) -> list[NeuralNetwork]:
+    "Random networks of various sizes"
+    random.seed(seed)
+    return [
+        NeuralNetwork(random.randint(2, 40), random.randrange(8)) for _ in range(NETWORKS_COUNT)
+    ]
+
+
+def test_compiled_tick_matches_uncompiled_tick():
+    networks = create_networks(3)
+    assert run_against_reference(networks, batched=False) < TOLERANCE
+
+
+def create_shared_networks(seed: int) -> list[NeuralNetwork]:
+    "Random networks and copies of them, so structures are shared by several networks of a batch"
+    networks = create_networks(seed)
+    networks += [NeuralNetwork.__new__(NeuralNetwork) for _ in range(len(networks))]
+    for original, copy in zip(networks[:NETWORKS_COUNT], networks[NETWORKS_COUNT:]):
+        copy.set_structure(original.structure)
+    return networks
+
+
+def test_batched_tick_matches_uncompiled_tick():
+    assert run_against_reference(create_shared_networks(4), batched=True) < TOLERANCE
+
+
+def test_backend_tick_matches_uncompiled_tick():
+    # batches come back from the threads in any order
+    with ThreadBackend(4, chunksize=7) as backend:
+        assert run_against_reference(create_shared_networks(6), True, backend) < TOLERANCE
+
+
+def test_compiler_removes_dead_wires():
+    networks = create_networks(5)
+    wires = sum(len(network.structure.wires) for network in networks)
+    compiled_wires = sum(len(network.structure.weights) for network in networks)
+    assert compiled_wires < wires
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIRECTORY = Path(__file__).parent.parent
+
+# run in a fresh interpreter, as objects ids (and thus any id-based ordering) change between processes
+RUN_SCRIPT = """
+import json, sys
+from src.headless import HeadlessWorld
+world = HeadlessWorld(int(sys.argv[1]))
+world.run(int(sys.argv[2]), record_interval=50)
+print(json.dumps([world.history, [c.to_genome()["network"] for c in world.context.creatures.values()]]))
+"""
+
+
+def run_in_new_process(seed: int, ticks: int, hash_seed: str):
+    "Run a seeded headless world in a new interpreter, and return its history and networks"
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_SCRIPT, str(seed), str(ticks)],
+        cwd=ROOT_DIRECTORY, env={**os.environ, "PYTHONHASHSEED": hash_seed, "SDL_VIDEODRIVER": "dummy"},
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_same_seed_same_run():
+    first = run_in_new_process(7, 300, "1")
+    second = run_in_new_process(7, 300, "2")
+    assert first == second
+
+
+def test_different_seeds_differ():
+    assert run_in_new_process(7, 50, "1") != run_in_new_process(8, 50, "1")